@@ -11,6 +11,9 @@ from src.entities.user import User
 from src.entities.user_skill import UserSkill
 from src.entities.skill import Skill
 from src.entities.cv import Cv
+from src.entities.scholarship_embedding import ScholarshipEmbedding
+from src.entities.match_job import MatchJob
+from src.entities.cv_parse_job import CvParseJob
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,36 @@
+"""add unique (user_id, scholarship_id) to scholarship_matchs
+
+Revision ID: f3b6e28a9d57
+Revises: e5a09c7d2b14
+Create Date: 2026-10-18 13:32:05.611937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b6e28a9d57'
+down_revision: Union[str, None] = 'e5a09c7d2b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # keep only the best row of each existing (user, scholarship) duplicate before constraining
+    op.execute("""
+        DELETE FROM scholarship_matchs a
+        USING scholarship_matchs b
+        WHERE a.user_id = b.user_id
+          AND a.scholarship_id = b.scholarship_id
+          AND (a.match_persent < b.match_persent OR (a.match_persent = b.match_persent AND a.id < b.id))
+    """)
+    op.create_unique_constraint('uq_scholarship_matchs_user_scholarship', 'scholarship_matchs', ['user_id', 'scholarship_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_scholarship_matchs_user_scholarship', 'scholarship_matchs', type_='unique')
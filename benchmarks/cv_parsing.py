@@ -0,0 +1,105 @@
+"""
+Per-upload cost of CV parsing with the shared, trimmed spaCy pipeline against loading a full
+pipeline for every CV (what `CvParser` used to do).
+
+    python -m benchmarks.cv_parsing [--pdf CV.pdf ...] [--uploads 20]
+
+For each PDF (default: `src/utils/cv0.pdf`) the text is extracted once, then every simulated
+upload either loads the full pipeline and runs it (`per_upload_load`) or calls `parse_cv`, which
+reuses the process-wide pipeline from `src/utils/nlp.py` (`shared`). Also reports the load time,
+components and memory of both pipelines, and whether the trimmed pipeline finds the same entities.
+Needs the spaCy model (`python -m spacy download en_core_web_sm`).
+"""
+import argparse
+import json
+import resource
+import time
+import numpy as np
+import pdfplumber
+import spacy
+
+from src.utils.cv_parser import parse_cv
+from src.utils.nlp import SPACY_MODEL, get_nlp
+
+DEFAULT_PDF = "src/utils/cv0.pdf"
+
+
+def extract_text(path: str) -> str:
+    with pdfplumber.open(path) as pdf:
+        return "".join(page.extract_text() or "" for page in pdf.pages)
+
+def rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def percentiles(samples: list[float]) -> dict:
+    return {
+        "p50_ms": round(float(np.percentile(samples, 50)) * 1000, 2),
+        "p99_ms": round(float(np.percentile(samples, 99)) * 1000, 2),
+    }
+
+def run(paths: list[str], uploads: int) -> dict:
+    texts = {path: extract_text(path) for path in paths}
+    with open(paths[0], "rb") as pdf:
+        cv_bytes = pdf.read()
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    shared = get_nlp()
+    trimmed_load = time.perf_counter() - started
+    trimmed_rss = round(rss_mb() - rss_before, 1)
+
+    started = time.perf_counter()
+    full = spacy.load(SPACY_MODEL)
+    full_load = time.perf_counter() - started
+
+    agreement = []
+    for text in texts.values():
+        expected = [(ent.text, ent.label_) for ent in full(text).ents]
+        found = [(ent.text, ent.label_) for ent in shared(text).ents]
+        agreement.append(expected == found)
+
+    per_upload_load, shared_parse, nlp_full, nlp_trimmed = [], [], [], []
+    for i in range(uploads):
+        text = texts[paths[i % len(paths)]]
+        started = time.perf_counter()
+        spacy.load(SPACY_MODEL)(text)
+        per_upload_load.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        full(text)
+        nlp_full.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        shared(text)
+        nlp_trimmed.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        parse_cv(cv_bytes)
+        shared_parse.append(time.perf_counter() - started)
+
+    return {
+        "model": SPACY_MODEL,
+        "pdfs": len(paths),
+        "uploads": uploads,
+        "full_components": full.pipe_names,
+        "trimmed_components": shared.pipe_names,
+        "full_load_ms": round(full_load * 1000, 1),
+        "trimmed_load_ms": round(trimmed_load * 1000, 1),
+        "trimmed_rss_mb": trimmed_rss,
+        "same_entities": all(agreement),
+        # spaCy load + run per upload, without text extraction
+        "per_upload_load": percentiles(per_upload_load),
+        # text extraction + shared pipeline + extractors
+        "shared_parse_cv": percentiles(shared_parse),
+        "nlp_full": percentiles(nlp_full),
+        "nlp_trimmed": percentiles(nlp_trimmed),
+        "peak_rss_mb": rss_mb(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", nargs="+", default=[DEFAULT_PDF])
+    parser.add_argument("--uploads", type=int, default=20)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.pdf, args.uploads), indent=2))
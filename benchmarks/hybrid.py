@@ -0,0 +1,95 @@
+"""
+Latency and ranking quality of hybrid (BM25 + embedding) scoring against embedding-only scoring.
+
+    python -m benchmarks.hybrid [--scholarships 5000] [--cvs 200] [--k 10] [--weights 0,0.2,0.35,0.5] [--synthetic]
+
+Synthetic scholarships and CVs from `benchmarks/synthetic.py` are labelled with `is_relevant`
+(same topic and at least one shared skill). Each lexical weight in `--weights` (0 is embedding-only)
+ranks every CV's top k with `hybrid_top_k` and reports nDCG@k, recall@k and per-query latency.
+`--synthetic` replaces the model with topic-aware random vectors (useful where the model weights
+are not available); those know the topic of a text but nothing about its skills.
+"""
+import argparse
+import json
+import time
+import numpy as np
+
+from src.ai_models.index import ScholarshipIndex
+from src.ai_models.lexical import LexicalIndex, cv_query, hybrid_top_k, scholarship_text
+from src.utils.cv_statement import CvToStatement
+from benchmarks.synthetic import synthetic_scholarships, synthetic_cvs, synthetic_embeddings, is_relevant
+
+
+def embed(scholarships: list[dict], cvs: list[dict], synthetic: bool) -> tuple[np.ndarray, np.ndarray]:
+    if synthetic:
+        return synthetic_embeddings(scholarships, "field_of_study"), synthetic_embeddings(cvs, "major", seed=3)
+
+    from src.ai_models.model import AsymmetricScholarshipMatcher
+    matcher = AsymmetricScholarshipMatcher()
+    try:
+        statements = [CvToStatement(cv).get_statement() for cv in cvs]
+        return matcher.encode_scholarships(scholarships), matcher.encode_texts(statements)
+    finally:
+        matcher.clear()
+
+def ndcg(ranked: list, relevant: set, k: int) -> float:
+    gains = sum(1 / np.log2(position + 2) for position, item in enumerate(ranked[:k]) if item in relevant)
+    ideal = sum(1 / np.log2(position + 2) for position in range(min(k, len(relevant))))
+    return gains / ideal if ideal else 0.0
+
+def run(scholarship_count: int, cv_count: int, k: int, weights: list[float], synthetic: bool) -> list[dict]:
+    scholarships = synthetic_scholarships(scholarship_count)
+    cvs = synthetic_cvs(cv_count)
+    scholarship_vectors, cv_vectors = embed(scholarships, cvs, synthetic)
+    ids = list(range(len(scholarships)))
+
+    index = ScholarshipIndex(dimension=scholarship_vectors.shape[1], capacity=len(ids))
+    index.add(ids, scholarship_vectors)
+    started = time.perf_counter()
+    lexical_index = LexicalIndex()
+    lexical_index.add(ids, [scholarship_text(scholarship) for scholarship in scholarships])
+    build_seconds = time.perf_counter() - started
+
+    queries = [cv_query(cv) for cv in cvs]
+    relevant = [{i for i, scholarship in enumerate(scholarships) if is_relevant(cv, scholarship)} for cv in cvs]
+
+    report = []
+    for lexical_weight in weights:
+        latencies, ndcgs, recalls = [], [], []
+        for cv_vector, query, expected in zip(cv_vectors, queries, relevant):
+            started = time.perf_counter()
+            if lexical_weight == 0:
+                ranked = index.top_k(cv_vector, k)
+            else:
+                ranked = hybrid_top_k(index, lexical_index, cv_vector, query, k, weights=(1.0 - lexical_weight, lexical_weight))
+            latencies.append(time.perf_counter() - started)
+            found = [scholarship_id for scholarship_id, _ in ranked]
+            ndcgs.append(ndcg(found, expected, k))
+            if expected:
+                recalls.append(len(set(found) & expected) / min(k, len(expected)))
+
+        report.append({
+            "lexical_weight": lexical_weight,
+            "scholarships": len(scholarships),
+            "cvs": len(cvs),
+            "embeddings": "synthetic" if synthetic else "model",
+            f"ndcg@{k}": round(float(np.mean(ndcgs)), 4),
+            f"recall@{k}": round(float(np.mean(recalls)), 4) if recalls else None,
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+            "latency_p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+            "lexical_build_s": round(build_seconds, 3),
+        })
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scholarships", type=int, default=5000)
+    parser.add_argument("--cvs", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--weights", default="0,0.2,0.35,0.5", help="comma-separated lexical weights (semantic weight is 1 - w)")
+    parser.add_argument("--synthetic", action="store_true", help="use topic-aware random vectors instead of the model")
+    args = parser.parse_args()
+
+    for row in run(args.scholarships, args.cvs, args.k, [float(weight) for weight in args.weights.split(",")], args.synthetic):
+        print(json.dumps(row))
@@ -0,0 +1,293 @@
+"""
+End-to-end matching throughput against a real database.
+
+    python -m benchmarks.matching [--users 1000] [--scholarships 2000] [--new-scholarships 20] [--fanout-runs 5]
+                                  [--rematch-users 50] [--changed 20] [--synthetic] [--output results.json] [--keep]
+
+Seeds synthetic users with CVs and scholarships from `benchmarks/synthetic.py` (with stored
+embeddings, as in steady state) into the database configured by the DB_* variables, then drives
+the match tasks exactly as the worker runs them, one job and one session at a time:
+
+    fanout       match_new_scholarships over --new-scholarships fresh scholarships, --fanout-runs times
+    rematch      match_user_scholarships (full recompute) for --rematch-users users
+    incremental  match_user_scholarships for the same users after --changed scholarships were edited
+
+Each phase reports scored pairs/sec, p50/p99 latency per job, match rows added, database
+writes/sec (tuples inserted, updated and deleted, from pg_stat_database) and the peak RSS of
+the process so far. The report is one JSON document (stdout or --output) so runs can be compared
+over time. Run it against a scratch database migrated with `alembic upgrade head`: other traffic
+shows up in the write rate. Seeded rows carry the run id and are deleted afterwards unless --keep.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import subprocess
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List
+import numpy as np
+from sqlalchemy import select, update, delete, func, text
+from sqlalchemy.orm import selectinload
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.core import async_session_meker, async_engine
+from src.entities.user import User
+from src.entities.cv import Cv
+from src.entities.scholarship import Scholarship
+from src.entities.scholarship_embedding import ScholarshipEmbedding
+from src.entities.scholarship_match import ScholarshipMatch
+from src.ai_models.index import ScholarshipIndex, sync_scholarship_index
+from src.ai_models.lexical import LexicalIndex, hybrid_enabled, sync_lexical_index
+from src.ai_models.quantization import EMBEDDING_STORAGE_DTYPE, vector_to_bytes
+from src.background_tasks.tasks import match_new_scholarships, match_user_scholarships
+from src.users.services import get_user
+from src.utils.cv_statement import CvToStatement
+from src.sio.bus import NullBus, configure_bus
+from benchmarks.synthetic import SyntheticMatcher, synthetic_cvs, synthetic_scholarships
+
+# rows per INSERT, well under asyncpg's 32767 bind parameters for the widest table
+SEED_CHUNK_SIZE = 1000
+# pg_stat_database is updated when backends flush their statistics, about once a second
+STATS_SETTLE_SECONDS = 1.5
+
+
+class Run:
+    def __init__(self, tag: str):
+        self.tag = tag
+        self.user_ids: List[uuid.UUID] = []
+        self.scholarship_ids: List[uuid.UUID] = []
+
+
+async def insert_chunked(session: AsyncSession, entity, rows: List[Dict]) -> None:
+    for start in range(0, len(rows), SEED_CHUNK_SIZE):
+        await session.execute(insert(entity).values(rows[start:start + SEED_CHUNK_SIZE]))
+
+async def seed_users(session: AsyncSession, run: Run, matcher, count: int) -> None:
+    cvs = synthetic_cvs(count)
+    statements = [CvToStatement(cv).get_statement() for cv in cvs]
+    vectors = await matcher.aencode_texts(statements)
+    users, cv_rows = [], []
+    for i, (cv, statement, vector) in enumerate(zip(cvs, statements, vectors)):
+        user_id = uuid.uuid4()
+        users.append({
+            "id": user_id, "firstname": "Bench", "lastname": f"User {i}", "username": f"{run.tag}-{i}",
+            "email": f"{run.tag}-{i}@example.com", "hashed_password": "!", "role": "user",
+        })
+        cv_rows.append({
+            "id": uuid.uuid4(), "user_id": user_id, **cv,
+            "embedding": vector_to_bytes(vector, EMBEDDING_STORAGE_DTYPE), "embedding_dtype": EMBEDDING_STORAGE_DTYPE,
+            "embedding_model": matcher.model_name, "embedding_hash": matcher.text_hash(statement),
+        })
+        run.user_ids.append(user_id)
+    await insert_chunked(session, User, users)
+    await insert_chunked(session, Cv, cv_rows)
+
+async def seed_scholarships(session: AsyncSession, run: Run, matcher, scholarships: List[Dict]) -> List[uuid.UUID]:
+    vectors = await matcher.aencode_scholarships(scholarships)
+    ids = [uuid.uuid4() for _ in scholarships]
+    embeddings = [
+        {
+            "scholarship_id": scholarship_id, "model_name": matcher.model_name,
+            "text_hash": matcher.text_hash(matcher._create_scholarship_text(scholarship)),
+            "dimension": int(vector.shape[0]), "dtype": EMBEDDING_STORAGE_DTYPE,
+            "vector": vector_to_bytes(vector, EMBEDDING_STORAGE_DTYPE),
+        }
+        for scholarship_id, scholarship, vector in zip(ids, scholarships, vectors)
+    ]
+    await insert_chunked(session, Scholarship, [{"id": scholarship_id, **scholarship} for scholarship_id, scholarship in zip(ids, scholarships)])
+    await insert_chunked(session, ScholarshipEmbedding, embeddings)
+    run.scholarship_ids.extend(ids)
+    return ids
+
+async def cleanup(run: Run) -> None:
+    async with async_session_meker() as session:
+        for start in range(0, max(len(run.user_ids), len(run.scholarship_ids)), SEED_CHUNK_SIZE):
+            user_ids = run.user_ids[start:start + SEED_CHUNK_SIZE]
+            scholarship_ids = run.scholarship_ids[start:start + SEED_CHUNK_SIZE]
+            await session.execute(delete(ScholarshipMatch).where(ScholarshipMatch.user_id.in_(user_ids)))
+            await session.execute(delete(ScholarshipMatch).where(ScholarshipMatch.scholarship_id.in_(scholarship_ids)))
+            await session.execute(delete(Cv).where(Cv.user_id.in_(user_ids)))
+            await session.execute(delete(User).where(User.id.in_(user_ids)))
+            # embeddings go with their scholarship (ON DELETE CASCADE)
+            await session.execute(delete(Scholarship).where(Scholarship.id.in_(scholarship_ids)))
+        await session.commit()
+
+
+async def written_tuples() -> int:
+    await asyncio.sleep(STATS_SETTLE_SECONDS)
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT pg_stat_clear_snapshot()"))
+        result = await connection.execute(text(
+            "SELECT tup_inserted + tup_updated + tup_deleted FROM pg_stat_database WHERE datname = current_database()"
+        ))
+        return int(result.scalar() or 0)
+
+async def match_rows(run: Run) -> int:
+    async with async_session_meker() as session:
+        query = select(func.count()).select_from(ScholarshipMatch).join(User).where(User.username.startswith(f"{run.tag}-"))
+        return (await session.execute(query)).scalar()
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+    scale = 1 if platform.system() == "Darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20, 1)
+
+class Phase:
+    """Collects job latencies and scored pairs, and the database writes around them"""
+
+    def __init__(self, name: str, run: Run):
+        self.name = name
+        self.run = run
+        self.latencies: List[float] = []
+        self.pairs = 0
+
+    async def __aenter__(self) -> "Phase":
+        self.tuples, self.rows = await written_tuples(), await match_rows(self.run)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.tuples = await written_tuples() - self.tuples
+        self.rows = await match_rows(self.run) - self.rows
+
+    def record(self, seconds: float, pairs: int) -> None:
+        self.latencies.append(seconds)
+        self.pairs += pairs
+
+    def report(self) -> Dict:
+        busy = sum(self.latencies)
+        return {
+            "phase": self.name,
+            "jobs": len(self.latencies),
+            "pairs": self.pairs,
+            "pairs_per_sec": round(self.pairs / busy) if busy else None,
+            "latency_p50_s": round(float(np.percentile(self.latencies, 50)), 4) if self.latencies else None,
+            "latency_p99_s": round(float(np.percentile(self.latencies, 99)), 4) if self.latencies else None,
+            "match_rows_added": self.rows,
+            "db_tuples_written": self.tuples,
+            "db_writes_per_sec": round(self.tuples / busy) if busy else None,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+async def fanout_phase(run: Run, matcher, lexical_index, new_scholarships: int, runs: int) -> Dict:
+    async with Phase("fanout", run) as phase:
+        async with async_session_meker() as session:
+            # every CV in the database is scored, not only the seeded ones
+            cvs = (await session.execute(select(func.count()).select_from(Cv))).scalar()
+        for batch in range(runs):
+            async with async_session_meker() as session:
+                ids = await seed_scholarships(session, run, matcher, synthetic_scholarships(new_scholarships, seed=100 + batch, prefix=f"[{run.tag}/{batch}] "))
+                await session.commit()
+            started = time.perf_counter()
+            async with async_session_meker() as session:
+                query = select(Scholarship).options(selectinload(Scholarship.embedding)).where(Scholarship.id.in_(ids))
+                scholarships = (await session.execute(query)).scalars().all()
+                await match_new_scholarships(scholarships, matcher, session, lexical_index)
+            phase.record(time.perf_counter() - started, cvs * len(ids))
+    return phase.report()
+
+async def rematch_phase(name: str, run: Run, matcher, index, lexical_index, user_ids: List[uuid.UUID], pairs_per_user: int | None = None) -> Dict:
+    """`pairs_per_user` defaults to the whole catalogue (a full recompute)"""
+    async with Phase(name, run) as phase:
+        for user_id in user_ids:
+            started = time.perf_counter()
+            async with async_session_meker() as session:
+                user = await get_user(session, user_id)
+                await match_user_scholarships(user, matcher, index, session, lexical_index)
+            phase.record(time.perf_counter() - started, pairs_per_user if pairs_per_user is not None else len(index))
+    return phase.report()
+
+async def touch_scholarships(run: Run, count: int) -> None:
+    """Edit `count` seeded scholarships; `updated_at` moves past the users' watermarks"""
+    async with async_session_meker() as session:
+        await session.execute(
+            update(Scholarship)
+            .where(Scholarship.id.in_(run.scholarship_ids[:count]))
+            .values(description=Scholarship.description + " Renewed for the next intake.")
+        )
+        await session.commit()
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> Dict:
+    configure_bus(NullBus())
+    if args.synthetic:
+        matcher = SyntheticMatcher()
+    else:
+        from src.ai_models.model import AsymmetricScholarshipMatcher
+        matcher = AsymmetricScholarshipMatcher()
+    run = Run(f"bench-{uuid.uuid4().hex[:8]}")
+    started_at = datetime.now(timezone.utc)
+    try:
+        started = time.perf_counter()
+        async with async_session_meker() as session:
+            await seed_users(session, run, matcher, args.users)
+            await seed_scholarships(session, run, matcher, synthetic_scholarships(args.scholarships, prefix=f"[{run.tag}] "))
+            await session.commit()
+        seed_seconds = time.perf_counter() - started
+
+        index = ScholarshipIndex()
+        lexical_index = LexicalIndex() if hybrid_enabled() else None
+        async with async_session_meker() as session:
+            await sync_scholarship_index(index, session, matcher)
+            if lexical_index is not None:
+                await sync_lexical_index(lexical_index, session)
+            await session.commit()
+
+        phases = [await fanout_phase(run, matcher, lexical_index, args.new_scholarships, args.fanout_runs)]
+        rematched = run.user_ids[:args.rematch_users]
+        phases.append(await rematch_phase("rematch", run, matcher, index, lexical_index, rematched))
+        await touch_scholarships(run, args.changed)
+        phases.append(await rematch_phase("incremental", run, matcher, index, lexical_index, rematched, args.changed))
+
+        return {
+            "started_at": started_at.isoformat(),
+            "revision": git_revision(),
+            "matcher": str(matcher) if args.synthetic else matcher.model_name,
+            "config": {
+                "users": args.users,
+                "scholarships": args.scholarships,
+                "new_scholarships": args.new_scholarships,
+                "fanout_runs": args.fanout_runs,
+                "rematch_users": len(rematched),
+                "changed": args.changed,
+                "hybrid": hybrid_enabled(),
+            },
+            "seed_s": round(seed_seconds, 3),
+            "phases": phases,
+        }
+    finally:
+        if not args.keep:
+            await cleanup(run)
+        matcher.clear()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000, help="users seeded, each with a CV")
+    parser.add_argument("--scholarships", type=int, default=2000, help="scholarships seeded before the run")
+    parser.add_argument("--new-scholarships", type=int, default=20, help="scholarships per fan-out job")
+    parser.add_argument("--fanout-runs", type=int, default=5)
+    parser.add_argument("--rematch-users", type=int, default=50)
+    parser.add_argument("--changed", type=int, default=20, help="scholarships edited before the incremental rematch")
+    parser.add_argument("--synthetic", action="store_true", help="use hashed vectors instead of the model")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--keep", action="store_true", help="leave the seeded rows in the database")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,110 @@
+"""
+Text extraction cost of the PDF backends on sample CVs.
+
+    python -m benchmarks.pdf_extraction [--pdf CV.pdf ...] [--pages 40] [--repeat 10]
+
+The corpus is every `--pdf` (default: `src/utils/cv0.pdf`) plus, for each, a `--pages`-page
+portfolio made by tiling its pages. Each document is extracted `--repeat` times by:
+
+    legacy      pdfplumber over every page, joined by string concatenation (the old extractor)
+    pdfplumber  the streaming pdfplumber backend, capped at CV_MAX_PAGES / CV_MAX_TEXT_BYTES
+    pdfium      the streaming pypdfium2 backend, same caps
+    auto        pdfium with the pdfplumber fallback (what uploads use by default)
+
+and reports p50/p99 latency, peak Python allocations (pdfium's native memory is not traced) and
+the text length. `fields_match` says whether the CV fields parsed from the backend's text equal
+those parsed from the legacy text (needs the spaCy model).
+"""
+import argparse
+import io
+import json
+import time
+import tracemalloc
+from typing import Callable, Dict
+import numpy as np
+import pdfplumber
+import pypdfium2 as pdfium
+
+from src.utils.cv_parser import parse_cv_doc
+from src.utils.nlp import get_nlp
+from src.utils.pdf_text import CV_MAX_PAGES, CV_MAX_TEXT_BYTES, extract_text
+
+DEFAULT_PDF = "src/utils/cv0.pdf"
+
+
+def legacy_extract(cv_bytes: bytes) -> str:
+    text = ""
+    with pdfplumber.open(io.BytesIO(cv_bytes)) as pdf:
+        for page in pdf.pages:
+            page_text = page.extract_text()
+            if page_text:
+                text += page_text
+    return text
+
+def tile_pdf(path: str, pages: int) -> bytes:
+    source = pdfium.PdfDocument(path)
+    tiled = pdfium.PdfDocument.new()
+    tiled.import_pages(source, [index % len(source) for index in range(pages)])
+    buffer = io.BytesIO()
+    tiled.save(buffer)
+    return buffer.getvalue()
+
+def measure(extract: Callable[[bytes], str], cv_bytes: bytes, repeat: int) -> Dict:
+    tracemalloc.start()
+    text = extract(cv_bytes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        extract(cv_bytes)
+        samples.append(time.perf_counter() - started)
+    return {
+        "p50_ms": round(float(np.percentile(samples, 50)) * 1000, 2),
+        "p99_ms": round(float(np.percentile(samples, 99)) * 1000, 2),
+        "peak_alloc_mb": round(peak / 1024 / 1024, 2),
+        "chars": len(text),
+        "text": text,
+    }
+
+def fields(text: str) -> Dict:
+    return parse_cv_doc(text, get_nlp()(text))
+
+def run(paths: list[str], pages: int, repeat: int) -> dict:
+    backends = {
+        "legacy": legacy_extract,
+        "pdfplumber": lambda cv_bytes: extract_text(cv_bytes, backend="pdfplumber"),
+        "pdfium": lambda cv_bytes: extract_text(cv_bytes, backend="pdfium"),
+        "auto": lambda cv_bytes: extract_text(cv_bytes, backend="auto"),
+    }
+    corpus = {}
+    for path in paths:
+        with open(path, "rb") as pdf:
+            corpus[path] = pdf.read()
+        corpus[f"{path} x{pages} pages"] = tile_pdf(path, pages)
+
+    documents = []
+    for name, cv_bytes in corpus.items():
+        results = {backend: measure(extract, cv_bytes, repeat) for backend, extract in backends.items()}
+        expected = fields(results["legacy"]["text"])
+        for result in results.values():
+            result["fields_match"] = fields(result.pop("text")) == expected
+        documents.append({
+            "document": name,
+            "pages": len(pdfium.PdfDocument(cv_bytes)),
+            "bytes": len(cv_bytes),
+            "backends": results,
+            "speedup_pdfium_vs_legacy": round(results["legacy"]["p50_ms"] / max(results["pdfium"]["p50_ms"], 1e-3), 1),
+        })
+    return {"max_pages": CV_MAX_PAGES, "max_text_bytes": CV_MAX_TEXT_BYTES, "repeat": repeat, "documents": documents}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", nargs="+", default=[DEFAULT_PDF])
+    parser.add_argument("--pages", type=int, default=40, help="pages of the tiled portfolio made from each PDF")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.pdf, args.pages, args.repeat), indent=2))
@@ -0,0 +1,94 @@
+"""
+Memory footprint, scan throughput and top-k agreement of quantized scholarship indexes.
+
+    python -m benchmarks.quantization [--repeat 5000] [--k 10] [--synthetic]
+
+The sample scholarships from `src/ai_models/samples.py` are embedded with the matcher and
+tiled `--repeat` times with small noise so the scan is long enough to time. `--synthetic`
+replaces the model with random vectors (useful where the model weights are not available).
+Memory and scan throughput are measured on the tiled catalogue; top-k agreement and the
+largest score error against float32 are measured on the untiled samples, with the sample CV
+and every scholarship text as queries.
+"""
+import argparse
+import json
+import time
+import numpy as np
+
+from src.ai_models.index import ScholarshipIndex
+from src.ai_models.quantization import STORAGE_DTYPES
+from src.ai_models.samples import SAMPLE_CV_TEXT, SAMPLE_SCHOLARSHIPS
+
+
+def embed_samples(synthetic: bool, dimension: int = 384) -> tuple[np.ndarray, np.ndarray]:
+    if synthetic:
+        rng = np.random.default_rng(0)
+        scholarship_vectors = rng.normal(size=(len(SAMPLE_SCHOLARSHIPS), dimension)).astype(np.float32)
+        cv_vector = rng.normal(size=(1, dimension)).astype(np.float32)
+        return cv_vector, scholarship_vectors
+
+    from src.ai_models.model import AsymmetricScholarshipMatcher
+    matcher = AsymmetricScholarshipMatcher()
+    try:
+        return matcher.encode_texts([SAMPLE_CV_TEXT]), matcher.encode_scholarships(SAMPLE_SCHOLARSHIPS)
+    finally:
+        matcher.clear()
+
+def tile(vectors: np.ndarray, repeat: int, noise: float = 0.05) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    tiled = np.tile(vectors, (repeat, 1))
+    return tiled + noise * rng.normal(size=tiled.shape).astype(np.float32) / np.sqrt(vectors.shape[1])
+
+def run(repeat: int, k: int, synthetic: bool, scans: int) -> list[dict]:
+    cv_vector, scholarship_vectors = embed_samples(synthetic)
+    queries = np.vstack([cv_vector, scholarship_vectors])
+    catalogue = tile(scholarship_vectors, repeat)
+    ids = list(range(len(catalogue)))
+
+    indexes = {}
+    for dtype in STORAGE_DTYPES:
+        index = ScholarshipIndex(dimension=catalogue.shape[1], capacity=len(catalogue), storage_dtype=dtype)
+        index.add(ids, catalogue)
+        indexes[dtype] = index
+
+    samples = {}
+    for dtype in STORAGE_DTYPES:
+        samples[dtype] = ScholarshipIndex(dimension=scholarship_vectors.shape[1], storage_dtype=dtype)
+        samples[dtype].add(list(range(len(scholarship_vectors))), scholarship_vectors)
+    reference = [[scholarship_id for scholarship_id, _ in samples["float32"].top_k(query, k)] for query in queries]
+
+    report = []
+    for dtype, index in indexes.items():
+        started = time.perf_counter()
+        for i in range(scans):
+            index.scores(queries[i % len(queries)])
+        elapsed = time.perf_counter() - started
+
+        agreement, errors = [], []
+        for query, expected in zip(queries, reference):
+            found = [scholarship_id for scholarship_id, _ in samples[dtype].top_k(query, k)]
+            agreement.append(len(set(found) & set(expected)) / len(expected))
+            errors.append(np.abs(samples[dtype].scores(query) - samples["float32"].scores(query)).max())
+
+        report.append({
+            "dtype": dtype,
+            "vectors": len(index),
+            "memory_bytes": index.nbytes,
+            "memory_ratio": round(index.nbytes / indexes["float32"].nbytes, 3),
+            "vectors_per_sec": round(len(index) * scans / elapsed),
+            "top_k_agreement": round(float(np.mean(agreement)), 4),
+            "max_score_error": round(float(np.max(errors)), 5),
+        })
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5000, help="times the sample scholarships are tiled")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--scans", type=int, default=50, help="full scans timed per dtype")
+    parser.add_argument("--synthetic", action="store_true", help="use random vectors instead of the model")
+    args = parser.parse_args()
+
+    for row in run(args.repeat, args.k, args.synthetic, args.scans):
+        print(json.dumps(row))
@@ -0,0 +1,167 @@
+"""
+Reproducible synthetic CVs and scholarships for the benchmarks.
+
+Scholarships are dicts shaped like `ScholarshipCreate` and CVs dicts shaped like the `Cv` columns
+(skills as a JSON list). Both are drawn from a handful of topics, each with its own fields of
+study, majors and skills, so `is_relevant` can label pairs: a scholarship is relevant to a CV
+when it is in the CV's topic and asks for at least one skill the CV lists.
+`SyntheticMatcher` stands in for the sentence-transformer where the model weights are not available.
+"""
+import hashlib
+import json
+import random
+from typing import Dict, List
+
+import numpy as np
+
+from src.ai_models.model import AsymmetricScholarshipMatcher
+from src.ai_models.inference import InferenceExecutor
+from src.ai_models.batcher import EncodeBatcher
+from src.utils.parse_pool import CvParsePool
+
+TOPICS = {
+    "computing": {
+        "fields": ["Computer Science", "Artificial Intelligence", "Data Science", "Software Engineering"],
+        "skills": ["python", "pytorch", "tensorflow", "sql", "kubernetes", "react", "java", "computer vision",
+                   "natural language processing", "rust", "docker", "spark"],
+        "themes": ["machine learning research", "software systems", "data-driven products", "open source tooling"],
+    },
+    "engineering": {
+        "fields": ["Mechanical Engineering", "Electrical Engineering", "Civil Engineering", "Robotics"],
+        "skills": ["matlab", "solidworks", "autocad", "simulink", "plc", "finite element analysis", "ros",
+                   "circuit design", "cad", "labview"],
+        "themes": ["renewable infrastructure", "autonomous systems", "advanced manufacturing", "smart grids"],
+    },
+    "health": {
+        "fields": ["Medicine", "Public Health", "Nursing", "Pharmacy"],
+        "skills": ["clinical research", "epidemiology", "biostatistics", "patient care", "pharmacology",
+                   "stata", "first aid", "health policy"],
+        "themes": ["global health equity", "clinical excellence", "community medicine", "disease prevention"],
+    },
+    "business": {
+        "fields": ["Business Administration", "Finance", "Economics", "Marketing"],
+        "skills": ["excel", "financial modeling", "accounting", "market research", "tableau", "negotiation",
+                   "econometrics", "project management"],
+        "themes": ["entrepreneurship", "sustainable finance", "emerging markets", "leadership"],
+    },
+    "humanities": {
+        "fields": ["International Relations", "Law", "Education", "Journalism"],
+        "skills": ["public speaking", "research writing", "arabic", "french", "policy analysis", "debate",
+                   "translation", "curriculum design"],
+        "themes": ["civic leadership", "cultural exchange", "human rights", "media freedom"],
+    },
+}
+LEVELS = ["Undergraduate", "Masters", "PhD"]
+DEGREES = {"Undergraduate": "High School", "Masters": "Bachelor", "PhD": "Master"}
+NATIONALITIES = ["Egyptian", "Nigerian", "Indian", "Jordanian", "Kenyan", "Brazilian", "German", "Pakistani"]
+RESTRICTIONS = [None, None, None, None, "Egyptian", "African countries", "Arab countries", "Indian, Pakistani"]
+COUNTRIES = ["Germany", "United Kingdom", "Japan", "Canada", "Netherlands", "United States"]
+
+
+def topic_of_field(field: str | None) -> str | None:
+    for topic, profile in TOPICS.items():
+        if field in profile["fields"]:
+            return topic
+    return None
+
+def synthetic_scholarships(count: int, seed: int = 0, prefix: str = "") -> List[Dict]:
+    """`prefix` is prepended to the (unique) names, so several batches can share a table"""
+    rng = random.Random(seed)
+    scholarships = []
+    for i in range(count):
+        topic = rng.choice(list(TOPICS))
+        profile = TOPICS[topic]
+        field = rng.choice(profile["fields"])
+        skills = rng.sample(profile["skills"], 2)
+        level = rng.choice(LEVELS)
+        country = rng.choice(COUNTRIES)
+        scholarships.append({
+            "name": f"{prefix}{field} {level} Scholarship {i:06d}",
+            "description": f"Funding for {level.lower()} students in {field} working on {rng.choice(profile['themes'])} in {country}.",
+            "requirements": f"Minimum {rng.choice(['3.0', '3.3', '3.5', '3.7'])} GPA, experience with {skills[0]} and {skills[1]}",
+            "is_fully_funded": rng.random() < 0.5,
+            "study_level": level,
+            "field_of_study": field,
+            "eligible_nationalities": rng.choice(RESTRICTIONS),
+            "country": country,
+        })
+    return scholarships
+
+def synthetic_cvs(count: int, seed: int = 1) -> List[Dict]:
+    rng = random.Random(seed)
+    cvs = []
+    for _ in range(count):
+        topic = rng.choice(list(TOPICS))
+        profile = TOPICS[topic]
+        level = rng.choice(LEVELS)
+        skills = rng.sample(profile["skills"], 3)
+        # a little noise from a neighbouring topic, as real CVs have
+        if rng.random() < 0.3:
+            skills.append(rng.choice(TOPICS[rng.choice(list(TOPICS))]["skills"]))
+        cvs.append({
+            "skills": json.dumps(skills),
+            "university": rng.choice(["Cairo University", "University of Lagos", "IIT Delhi", "University of Jordan", "University of Nairobi"]),
+            "degree": DEGREES[level],
+            "major": rng.choice(profile["fields"]),
+            "graduation_year": str(rng.randint(2015, 2026)),
+            "gpa": f"{rng.uniform(2.5, 4.0):.2f}",
+            "nationality": rng.choice(NATIONALITIES),
+            "gender": rng.choice(["Male", "Female"]),
+            "date_of_birth": f"{rng.randint(1990, 2006)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        })
+    return cvs
+
+def is_relevant(cv: Dict, scholarship: Dict) -> bool:
+    if topic_of_field(cv["major"]) != topic_of_field(scholarship["field_of_study"]):
+        return False
+    requirements = scholarship["requirements"].lower()
+    return any(skill in requirements for skill in json.loads(cv["skills"]))
+
+def synthetic_embeddings(items: List[Dict], field_key: str, dimension: int = 384, noise: float = 1.0, seed: int = 2) -> np.ndarray:
+    """
+    Stand-in vectors for runs without the model: one random direction per topic plus noise, so
+    similarity separates topics (as the embeddings do) but knows nothing about individual skills.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = {topic: np.random.default_rng(position).normal(size=dimension) for position, topic in enumerate(TOPICS)}
+    vectors = np.stack([centroids[topic_of_field(item[field_key])] for item in items])
+    vectors = vectors + noise * rng.normal(size=vectors.shape)
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+class SyntheticMatcher(AsymmetricScholarshipMatcher):
+    """
+    The matcher with the model swapped for hashed vectors: a text maps to the direction of the
+    topic whose field it names plus fixed per-text noise, so same-topic pairs score around 50 and
+    produce a realistic number of matches, and stored embeddings stay valid between runs. The rest
+    of the pipeline (executor, micro-batcher, scoring, staleness checks) runs unchanged; only the
+    forward pass is missing from the timings.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.model_name = "synthetic"
+        self.model = None
+        self.dimension = dimension
+        self.executor = InferenceExecutor()
+        self.batcher = EncodeBatcher(self.encode_texts, self.executor)
+        self.parse_pool = CvParsePool()
+        self._topics = {}
+        for position, (topic, profile) in enumerate(TOPICS.items()):
+            centroid = np.random.default_rng(position).normal(size=dimension)
+            self._topics[topic] = ([field.lower() for field in profile["fields"]], centroid / np.linalg.norm(centroid))
+
+    def encode_texts(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+            noise = np.random.default_rng(seed).normal(size=self.dimension)
+            vectors[row] = noise / np.linalg.norm(noise)
+            lowered = text.lower()
+            for fields, centroid in self._topics.values():
+                if any(field in lowered for field in fields):
+                    vectors[row] += centroid
+                    break
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def __str__(self):
+        return f"SyntheticMatcher(dimension={self.dimension})"
@@ -0,0 +1,261 @@
+import os
+import tempfile
+import time
+import uuid
+import logging
+import argparse
+import numpy as np
+from datetime import datetime
+from typing import Callable, Dict, Hashable, List, Sequence, Tuple
+
+from src.ai_models.index import ScholarshipIndex
+from src.ai_models.quantization import INDEX_STORAGE_DTYPE
+from src.ai_models.eligibility import CandidateProfile, ScholarshipEligibility
+
+ASSIGN_BATCH_SIZE = 16384
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+def spherical_kmeans(vectors: np.ndarray, nlist: int, iterations: int = 15, seed: int = 0) -> np.ndarray:
+    """Centroids (nlist x dim) of normalized vectors, clustered by cosine similarity"""
+    rng = np.random.default_rng(seed)
+    vectors = _normalize(vectors)
+    nlist = max(1, min(nlist, len(vectors)))
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=nlist)
+        empty = counts == 0
+        # re-seed empty cells from random points so every list stays in use
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+def assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the closest centroid for every vector, computed in batches to bound memory"""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_BATCH_SIZE):
+        batch = vectors[start:start + ASSIGN_BATCH_SIZE]
+        assignments[start:start + ASSIGN_BATCH_SIZE] = np.argmax(batch @ centroids.T, axis=1)
+    return assignments
+
+
+class IVFScholarshipIndex:
+    """
+    Approximate scholarship index (inverted file over spherical k-means centroids).
+
+    Each centroid owns an exact `ScholarshipIndex` holding the vectors assigned to it.
+    A query scores the centroids, scans only the `nprobe` closest lists and merges
+    their top-k. `nprobe` is the recall/latency knob: `nprobe == nlist` is exact search.
+    Exposes the same `ids`/`add`/`remove`/`top_k` surface as `ScholarshipIndex`.
+    """
+
+    def __init__(self, centroids: np.ndarray, nprobe: int = 8, storage_dtype: str = INDEX_STORAGE_DTYPE):
+        self.centroids = _normalize(np.asarray(centroids, dtype=np.float32))
+        self.nprobe = nprobe
+        self.storage_dtype = storage_dtype
+        self._lists = [ScholarshipIndex(dimension=self.centroids.shape[1], capacity=64, storage_dtype=storage_dtype) for _ in range(len(self.centroids))]
+        self._list_of: Dict[Hashable, int] = {}
+        # newest scholarship `updated_at` covered by the last `sync_scholarship_index`, persisted with the file
+        self.synced_at: datetime | None = None
+
+    @classmethod
+    def train(cls, ids: Sequence[Hashable], vectors: np.ndarray, nlist: int | None = None, nprobe: int = 8, max_training_points: int = 100_000, storage_dtype: str = INDEX_STORAGE_DTYPE, eligibility: Sequence[ScholarshipEligibility] | None = None) -> "IVFScholarshipIndex":
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors) == 0:
+            raise ValueError("cannot train an IVF index without vectors")
+        nlist = nlist or max(1, int(np.sqrt(len(vectors))))
+        sample = vectors
+        if len(vectors) > max_training_points:
+            rng = np.random.default_rng(0)
+            sample = vectors[rng.choice(len(vectors), size=max_training_points, replace=False)]
+        index = cls(spherical_kmeans(sample, nlist), nprobe=nprobe, storage_dtype=storage_dtype)
+        index.add(ids, vectors, eligibility)
+        return index
+
+    @classmethod
+    def from_index(cls, index: ScholarshipIndex, nlist: int | None = None, nprobe: int = 8) -> "IVFScholarshipIndex":
+        # read before the rows: a sync running meanwhile advances it only after adding its rows
+        synced_at = index.synced_at
+        # one snapshot, since `add` and `remove` may run on the index while this trains in a thread
+        ids, vectors, eligibility = index.snapshot()
+        ivf = cls.train(ids, vectors, nlist=nlist, nprobe=nprobe, storage_dtype=index.storage_dtype, eligibility=eligibility)
+        ivf.synced_at = synced_at
+        return ivf
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def dimension(self) -> int:
+        return self.centroids.shape[1]
+
+    def __len__(self) -> int:
+        return len(self._list_of)
+
+    def __contains__(self, scholarship_id: Hashable) -> bool:
+        return scholarship_id in self._list_of
+
+    def ids(self) -> List[Hashable]:
+        return list(self._list_of)
+
+    def add(self, ids: Sequence[Hashable], vectors: np.ndarray, eligibility: Sequence[ScholarshipEligibility] | None = None) -> None:
+        vectors = _normalize(np.atleast_2d(np.asarray(vectors, dtype=np.float32)))
+        if len(ids) == 0:
+            return
+        self.remove([scholarship_id for scholarship_id in ids if scholarship_id in self._list_of])
+        assignments = assign(vectors, self.centroids)
+        for cell in np.unique(assignments):
+            members = np.flatnonzero(assignments == cell)
+            cell_ids = [ids[i] for i in members]
+            self._lists[cell].add(cell_ids, vectors[members], [eligibility[i] for i in members] if eligibility else None)
+            for scholarship_id in cell_ids:
+                self._list_of[scholarship_id] = int(cell)
+
+    def remove(self, ids: Sequence[Hashable]) -> None:
+        for scholarship_id in ids:
+            cell = self._list_of.pop(scholarship_id, None)
+            if cell is not None:
+                self._lists[cell].remove([scholarship_id])
+
+    def top_k(self, cv_vector: np.ndarray, k: int, min_score: float = -1.0, nprobe: int | None = None, candidate: CandidateProfile | None = None) -> List[Tuple[Hashable, float]]:
+        if len(self) == 0 or k <= 0:
+            return []
+        query = _normalize(np.asarray(cv_vector, dtype=np.float32).reshape(1, -1))[0]
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        centroid_scores = self.centroids @ query
+        probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        candidates: List[Tuple[Hashable, float]] = []
+        for cell in probes:
+            candidates.extend(self._lists[cell].top_k(query, k, min_score=min_score, candidate=candidate))
+        candidates.sort(key=lambda candidate: candidate[1], reverse=True)
+        return candidates[:k]
+
+    def score_ids(self, cv_vector: np.ndarray, ids: Sequence[Hashable], candidate: CandidateProfile | None = None) -> Dict[Hashable, float]:
+        """Exact cosine scores of the given scholarships, looked up in whichever list holds each"""
+        by_cell: Dict[int, List[Hashable]] = {}
+        for scholarship_id in ids:
+            cell = self._list_of.get(scholarship_id)
+            if cell is not None:
+                by_cell.setdefault(cell, []).append(scholarship_id)
+        scores: Dict[Hashable, float] = {}
+        for cell, cell_ids in by_cell.items():
+            scores.update(self._lists[cell].score_ids(cv_vector, cell_ids, candidate))
+        return scores
+
+    def clear(self) -> None:
+        for cell in self._lists:
+            cell.clear()
+        self._list_of = {}
+        self.synced_at = None
+
+    def save(self, path: str) -> None:
+        """Persist centroids, lists and eligibility to one .npz file (ids are stored as strings)"""
+        arrays = {"centroids": self.centroids, "nprobe": np.array(self.nprobe), "synced_at": np.array(self.synced_at.isoformat() if self.synced_at else "")}
+        for cell, cell_index in enumerate(self._lists):
+            cell_ids, vectors, rules = cell_index.snapshot()
+            arrays[f"ids_{cell}"] = np.array([str(scholarship_id) for scholarship_id in cell_ids], dtype=str)
+            arrays[f"vectors_{cell}"] = vectors
+            arrays[f"levels_{cell}"] = np.array([rule.levels for rule in rules], dtype=np.int64)
+            arrays[f"fields_{cell}"] = np.array([rule.fields for rule in rules], dtype=np.int64)
+            # "*" marks a scholarship open to every nationality
+            arrays[f"nationalities_{cell}"] = np.array(["*" if rule.nationalities is None else "|".join(sorted(rule.nationalities)) for rule in rules], dtype=str)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # a unique temporary name, so processes saving at the same time never replace each other's half-written file
+        with tempfile.NamedTemporaryFile(dir=directory or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp", delete=False) as tmp:
+            try:
+                np.savez(tmp, **arrays)
+            except BaseException:
+                os.unlink(tmp.name)
+                raise
+        os.replace(tmp.name, path)
+
+    @classmethod
+    def load(cls, path: str, id_type: Callable[[str], Hashable] = uuid.UUID, nprobe: int | None = None) -> "IVFScholarshipIndex":
+        with np.load(path) as data:
+            index = cls(data["centroids"], nprobe=nprobe or int(data["nprobe"]))
+            if "synced_at" in data.files and str(data["synced_at"]):
+                index.synced_at = datetime.fromisoformat(str(data["synced_at"]))
+            for cell in range(index.nlist):
+                cell_ids = [id_type(scholarship_id) for scholarship_id in data[f"ids_{cell}"]]
+                rules = None
+                if f"levels_{cell}" in data.files:
+                    rules = [
+                        ScholarshipEligibility(int(levels), int(fields), None if nationalities == "*" else frozenset(filter(None, nationalities.split("|"))))
+                        for levels, fields, nationalities in zip(data[f"levels_{cell}"], data[f"fields_{cell}"], data[f"nationalities_{cell}"])
+                    ]
+                if cell_ids:
+                    index._lists[cell].add(cell_ids, data[f"vectors_{cell}"], rules)
+                    for scholarship_id in cell_ids:
+                        index._list_of[scholarship_id] = cell
+        return index
+
+    def __str__(self):
+        return f"IVFScholarshipIndex(size={len(self)}, nlist={self.nlist}, nprobe={self.nprobe})"
+
+
+def recall_report(exact: ScholarshipIndex, approximate: IVFScholarshipIndex, queries: np.ndarray, k: int = 10, nprobes: Sequence[int] = (1, 4, 8, 16, 32)) -> List[Dict]:
+    """Recall@k and mean query latency of the IVF index against exact search, per nprobe value"""
+    started = time.perf_counter()
+    truth = [{scholarship_id for scholarship_id, _ in exact.top_k(query, k)} for query in queries]
+    exact_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    report = []
+    for nprobe in nprobes:
+        started = time.perf_counter()
+        results = [approximate.top_k(query, k, nprobe=nprobe) for query in queries]
+        ann_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        hits = sum(len(expected & {scholarship_id for scholarship_id, _ in result}) for expected, result in zip(truth, results))
+        report.append({
+            "nprobe": min(nprobe, approximate.nlist),
+            "recall_at_k": round(hits / (k * len(queries)), 4),
+            "ann_ms": round(ann_ms, 3),
+            "exact_ms": round(exact_ms, 3),
+        })
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall/latency report of the IVF scholarship index against exact search")
+    parser.add_argument("--index", help="persisted IVF index (.npz) to evaluate; synthetic data is used when omitted")
+    parser.add_argument("--size", type=int, default=200_000, help="number of synthetic scholarships")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    rng = np.random.default_rng(42)
+    if args.index:
+        approximate = IVFScholarshipIndex.load(args.index, id_type=str)
+        exact = ScholarshipIndex(dimension=approximate.dimension)
+        for cell_index in approximate._lists:
+            exact.add(cell_index.ids(), cell_index.matrix())
+    else:
+        # clustered synthetic vectors resemble real embeddings better than uniform noise
+        topics = _normalize(rng.normal(size=(max(1, args.size // 500), args.dimension)))
+        noise = rng.normal(size=(args.size, args.dimension)) * (1.4 / np.sqrt(args.dimension))
+        vectors = topics[rng.integers(0, len(topics), size=args.size)] + noise
+        ids = list(range(args.size))
+        exact = ScholarshipIndex(dimension=args.dimension, capacity=args.size)
+        exact.add(ids, vectors)
+        started = time.perf_counter()
+        approximate = IVFScholarshipIndex.train(ids, vectors, nlist=args.nlist)
+        logging.info(f"trained {approximate} in {time.perf_counter() - started:.1f}s")
+
+    queries = exact.matrix()[rng.choice(len(exact), size=args.queries, replace=False)]
+    queries = queries + 0.1 * rng.normal(size=queries.shape) / np.sqrt(queries.shape[1])
+    for row in recall_report(exact, approximate, queries, k=args.k, nprobes=args.nprobe):
+        print(row)
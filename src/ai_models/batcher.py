@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import os
+import numpy as np
+from typing import Callable, List, Tuple
+from dotenv import load_dotenv
+
+from src.ai_models.inference import InferenceExecutor
+
+load_dotenv()
+
+ENCODE_BATCH_MAX_SIZE = int(os.getenv("ENCODE_BATCH_MAX_SIZE", "32"))
+ENCODE_BATCH_MAX_WAIT_MS = float(os.getenv("ENCODE_BATCH_MAX_WAIT_MS", "5"))
+
+
+class EncodeBatcher:
+  """
+  Dynamic micro-batcher in front of the sentence-transformer.
+
+  Concurrent `encode` calls are queued for at most `max_wait_ms` (or until `max_batch_size`
+  texts are waiting), run as one forward pass on the inference executor and the rows are
+  fanned back to each waiting coroutine. Calls that already carry a full batch skip the queue.
+  """
+
+  def __init__(self, encode_fn: Callable[[List[str]], np.ndarray], executor: InferenceExecutor, max_batch_size: int = ENCODE_BATCH_MAX_SIZE, max_wait_ms: float = ENCODE_BATCH_MAX_WAIT_MS):
+    self.encode_fn = encode_fn
+    self.executor = executor
+    self.max_batch_size = max_batch_size
+    self.max_wait = max_wait_ms / 1000
+    self._pending: List[Tuple[List[str], asyncio.Future]] = []
+    self._pending_texts = 0
+    self._timer: asyncio.TimerHandle | None = None
+    # the loop only keeps weak references to tasks; an unreferenced batch could be collected mid-run
+    self._tasks: set[asyncio.Task] = set()
+    self.batches = 0
+    self.batched_texts = 0
+
+  async def encode(self, texts: List[str], batch_size: int = 64, fail_fast: bool = False) -> np.ndarray:
+    if fail_fast:
+      self.executor.ensure_capacity()
+    if len(texts) >= self.max_batch_size:
+      return await self.executor.run(self.encode_fn, texts, batch_size=batch_size)
+
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    self._pending.append((texts, future))
+    self._pending_texts += len(texts)
+    if self._pending_texts >= self.max_batch_size:
+      self._flush()
+    elif self._timer is None:
+      self._timer = loop.call_later(self.max_wait, self._flush)
+    return await future
+
+  def _flush(self) -> None:
+    if self._timer is not None:
+      self._timer.cancel()
+      self._timer = None
+    if not self._pending:
+      return
+    pending, self._pending, self._pending_texts = self._pending, [], 0
+    task = asyncio.get_running_loop().create_task(self._run_batch(pending))
+    self._tasks.add(task)
+    task.add_done_callback(self._tasks.discard)
+
+  async def _run_batch(self, pending: List[Tuple[List[str], asyncio.Future]]) -> None:
+    texts = [text for request_texts, _ in pending for text in request_texts]
+    try:
+      vectors = await self.executor.run(self.encode_fn, texts, batch_size=len(texts))
+    except Exception as e:
+      logging.error(f"batched encode of {len(texts)} texts failed. Error: {e}")
+      for _, future in pending:
+        if not future.done():
+          future.set_exception(e)
+      return
+
+    self.batches += 1
+    self.batched_texts += len(texts)
+    offset = 0
+    for request_texts, future in pending:
+      # a cancelled waiter just drops its rows
+      if not future.done():
+        future.set_result(vectors[offset:offset + len(request_texts)])
+      offset += len(request_texts)
+
+  def __str__(self):
+    return f"EncodeBatcher(max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait * 1000:g}, batches={self.batches}, texts={self.batched_texts})"
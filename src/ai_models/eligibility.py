@@ -0,0 +1,190 @@
+"""
+Structured eligibility pre-filter, applied before semantic scoring.
+
+Scholarship `study_level`, `field_of_study` and `eligible_nationalities` and CV `degree`,
+`major` and `nationality` are normalized into small bitmasks and sets, so deciding whether a
+candidate can apply at all is a couple of integer ANDs and a set lookup. Unknown or unparsable
+values never exclude anyone: the filter only drops pairs that are plainly ineligible.
+"""
+import os
+import re
+from typing import FrozenSet, List, NamedTuple, Sequence
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ELIGIBILITY_FILTER = os.getenv("ELIGIBILITY_FILTER", "true").lower() == "true"
+# field groups are coarse; turn off to filter on study level and nationality only
+ELIGIBILITY_FILTER_FIELDS = os.getenv("ELIGIBILITY_FILTER_FIELDS", "true").lower() == "true"
+
+UNDERGRADUATE, MASTERS, PHD = 1, 2, 4
+ALL_LEVELS = UNDERGRADUATE | MASTERS | PHD
+
+LEVEL_PATTERNS = [
+    (UNDERGRADUATE, re.compile(r"under\s*grad|bachelor|\bb\.?sc\b|\bb\.?s\b|\bb\.?a\b|\bb\.?eng\b", re.I)),
+    (MASTERS | PHD, re.compile(r"post\s*grad|(?<!under )\bgraduate\b", re.I)),
+    (MASTERS, re.compile(r"master|\bm\.?sc\b|\bm\.?s\b|\bm\.?a\b|\bmba\b|\bm\.?eng\b", re.I)),
+    (PHD, re.compile(r"ph\.?\s*d|doctor", re.I)),
+]
+# a candidate holding a degree may apply at that level (still studying) or the next one
+NEXT_LEVELS = {UNDERGRADUATE: UNDERGRADUATE | MASTERS, MASTERS: MASTERS | PHD, PHD: PHD}
+
+FIELD_GROUPS = {
+    "computing": ("computer", "software", "information technology", "informatics", "data science", "artificial intelligence",
+                  "machine learning", "natural language", "cyber", "information systems"),
+    "engineering": ("engineering", "architecture", "mechatronics", "robotics"),
+    "sciences": ("physics", "chemistry", "biology", "mathematics", "statistics", "natural science", "geology", "astronomy"),
+    "health": ("medicine", "medical", "health", "nursing", "pharmacy", "dentistry", "biomedical"),
+    "business": ("business", "management", "finance", "economics", "accounting", "marketing", "mba"),
+    "humanities": ("law", "education", "humanities", "social", "psychology", "political", "international relations",
+                   "languages", "literature", "history", "journalism", "arts", "design", "music"),
+    "environment": ("agriculture", "environment", "climate", "energy", "sustainability"),
+}
+FIELD_BITS = {group: 1 << position for position, group in enumerate(FIELD_GROUPS)}
+ALL_FIELDS = (1 << len(FIELD_GROUPS)) - 1
+FIELD_ALIASES = {"stem": FIELD_BITS["computing"] | FIELD_BITS["engineering"] | FIELD_BITS["sciences"]}
+
+# country -> demonym; both spellings normalize to the country
+COUNTRIES = {
+    "egypt": "egyptian", "saudi arabia": "saudi", "united arab emirates": "emirati", "libya": "libyan", "tunisia": "tunisian",
+    "algeria": "algerian", "morocco": "moroccan", "sudan": "sudanese", "jordan": "jordanian", "lebanon": "lebanese",
+    "syria": "syrian", "iraq": "iraqi", "palestine": "palestinian", "yemen": "yemeni", "oman": "omani", "qatar": "qatari",
+    "kuwait": "kuwaiti", "bahrain": "bahraini", "mauritania": "mauritanian", "somalia": "somali",
+    "nigeria": "nigerian", "ghana": "ghanaian", "kenya": "kenyan", "ethiopia": "ethiopian", "uganda": "ugandan",
+    "tanzania": "tanzanian", "rwanda": "rwandan", "south africa": "south african", "senegal": "senegalese",
+    "cameroon": "cameroonian", "zimbabwe": "zimbabwean", "zambia": "zambian",
+    "united states": "american", "canada": "canadian", "mexico": "mexican", "brazil": "brazilian", "argentina": "argentine",
+    "united kingdom": "british", "ireland": "irish", "france": "french", "germany": "german", "italy": "italian",
+    "spain": "spanish", "portugal": "portuguese", "netherlands": "dutch", "belgium": "belgian", "sweden": "swedish",
+    "norway": "norwegian", "denmark": "danish", "finland": "finnish", "poland": "polish", "switzerland": "swiss",
+    "austria": "austrian", "greece": "greek", "turkey": "turkish", "russia": "russian", "ukraine": "ukrainian",
+    "china": "chinese", "japan": "japanese", "south korea": "korean", "india": "indian", "pakistan": "pakistani",
+    "bangladesh": "bangladeshi", "indonesia": "indonesian", "malaysia": "malaysian", "philippines": "filipino",
+    "vietnam": "vietnamese", "thailand": "thai", "iran": "iranian", "afghanistan": "afghan", "australia": "australian",
+    "new zealand": "new zealander",
+}
+COUNTRY_ALIASES = {"usa": "united states", "us": "united states", "uk": "united kingdom", "uae": "united arab emirates", "ksa": "saudi arabia"}
+NATIONALITY_KEYS = {**{country: country for country in COUNTRIES}, **{demonym: country for country, demonym in COUNTRIES.items()}, **COUNTRY_ALIASES}
+
+ARAB = frozenset(["egypt", "saudi arabia", "united arab emirates", "libya", "tunisia", "algeria", "morocco", "sudan", "jordan",
+                  "lebanon", "syria", "iraq", "palestine", "yemen", "oman", "qatar", "kuwait", "bahrain", "mauritania", "somalia"])
+GCC = frozenset(["saudi arabia", "united arab emirates", "oman", "qatar", "kuwait", "bahrain"])
+AFRICAN = frozenset(["egypt", "libya", "tunisia", "algeria", "morocco", "sudan", "mauritania", "somalia", "nigeria", "ghana",
+                     "kenya", "ethiopia", "uganda", "tanzania", "rwanda", "south africa", "senegal", "cameroon", "zimbabwe", "zambia"])
+REGIONS = {"arab": ARAB, "gcc": GCC, "gulf": GCC, "african": AFRICAN, "africa": AFRICAN}
+OPEN_TO_ALL = {"", "all", "any", "international", "all nationalities", "all countries", "worldwide", "open", "none", "n/a"}
+
+
+class ScholarshipEligibility(NamedTuple):
+    levels: int = ALL_LEVELS
+    fields: int = ALL_FIELDS
+    # None: open to every nationality
+    nationalities: FrozenSet[str] | None = None
+
+class CandidateProfile(NamedTuple):
+    levels: int = ALL_LEVELS
+    fields: int = ALL_FIELDS
+    # None: unknown, never excluded on nationality
+    nationality: str | None = None
+
+OPEN = ScholarshipEligibility()
+ANYONE = CandidateProfile()
+
+
+def study_levels(text: str | None) -> int:
+    """Levels a scholarship is offered at; unknown text means every level"""
+    levels = 0
+    for bits, pattern in LEVEL_PATTERNS:
+        if text and pattern.search(text):
+            levels |= bits
+    return levels or ALL_LEVELS
+
+def candidate_levels(degree: str | None) -> int:
+    """Levels a candidate can apply at, from the highest degree on the CV"""
+    held = [bits for bits, pattern in LEVEL_PATTERNS if bits in NEXT_LEVELS and degree and pattern.search(degree)]
+    if not held:
+        return ALL_LEVELS
+    return NEXT_LEVELS[max(held)]
+
+def field_groups(text: str | None) -> int:
+    if not text:
+        return ALL_FIELDS
+    text = text.lower()
+    fields = 0
+    for alias, bits in FIELD_ALIASES.items():
+        if re.search(rf"\b{alias}\b", text):
+            fields |= bits
+    for group, keywords in FIELD_GROUPS.items():
+        if any(keyword in text for keyword in keywords):
+            fields |= FIELD_BITS[group]
+    return fields or ALL_FIELDS
+
+def normalize_nationality(text: str | None) -> str | None:
+    if not text:
+        return None
+    key = re.sub(r"\s+", " ", re.sub(r"\b(the|of|from)\b", " ", text.lower())).strip()
+    # cities and unknown spellings give None, which never excludes the candidate
+    return NATIONALITY_KEYS.get(key)
+
+def nationality_set(text: str | None) -> FrozenSet[str] | None:
+    """Countries a scholarship accepts, or None when it is open to everyone (or cannot be parsed)"""
+    if text is None or text.strip().lower() in OPEN_TO_ALL:
+        return None
+    countries = set()
+    for part in re.split(r",|;|/|\band\b|\bor\b|\n", text.lower()):
+        part = re.sub(r"\b(countries|nationals|citizens|students|nationality|nationalities|only)\b", "", part).strip()
+        if not part:
+            continue
+        if part in OPEN_TO_ALL:
+            return None
+        region = REGIONS.get(part) or REGIONS.get(part.split()[0])
+        country = normalize_nationality(part)
+        if region is not None:
+            countries |= region
+        elif country is not None:
+            countries.add(country)
+        else:
+            # one unrecognized entry could be anything; do not risk excluding eligible candidates
+            return None
+    return frozenset(countries) or None
+
+def scholarship_eligibility(scholarship) -> ScholarshipEligibility:
+    if not ELIGIBILITY_FILTER:
+        return OPEN
+    return ScholarshipEligibility(
+        levels=study_levels(scholarship.study_level),
+        fields=field_groups(scholarship.field_of_study) if ELIGIBILITY_FILTER_FIELDS else ALL_FIELDS,
+        nationalities=nationality_set(scholarship.eligible_nationalities),
+    )
+
+def candidate_profile(cv) -> CandidateProfile:
+    if cv is None or not ELIGIBILITY_FILTER:
+        return ANYONE
+    return CandidateProfile(
+        levels=candidate_levels(cv.degree),
+        fields=field_groups(cv.major) if ELIGIBILITY_FILTER_FIELDS else ALL_FIELDS,
+        nationality=normalize_nationality(cv.nationality),
+    )
+
+def is_eligible(candidate: CandidateProfile, eligibility: ScholarshipEligibility) -> bool:
+    return bool(
+        candidate.levels & eligibility.levels
+        and candidate.fields & eligibility.fields
+        and (eligibility.nationalities is None or candidate.nationality is None or candidate.nationality in eligibility.nationalities)
+    )
+
+def eligibility_matrix(candidates: Sequence[CandidateProfile], scholarships: Sequence[ScholarshipEligibility]) -> np.ndarray:
+    """(N candidates x K scholarships) boolean matrix, vectorized over candidates"""
+    levels = np.fromiter((candidate.levels for candidate in candidates), dtype=np.int64, count=len(candidates))
+    fields = np.fromiter((candidate.fields for candidate in candidates), dtype=np.int64, count=len(candidates))
+    nationalities: List[str | None] = [candidate.nationality for candidate in candidates]
+    unknown = np.fromiter((nationality is None for nationality in nationalities), dtype=bool, count=len(candidates))
+
+    matrix = np.empty((len(candidates), len(scholarships)), dtype=bool)
+    for column, eligibility in enumerate(scholarships):
+        allowed = ((levels & eligibility.levels) != 0) & ((fields & eligibility.fields) != 0)
+        if eligibility.nationalities is not None:
+            allowed &= unknown | np.fromiter((nationality in eligibility.nationalities for nationality in nationalities), dtype=bool, count=len(candidates))
+        matrix[:, column] = allowed
+    return matrix
@@ -0,0 +1,87 @@
+import numpy as np
+from typing import List
+
+from src.entities.scholarship import Scholarship
+from src.entities.scholarship_embedding import ScholarshipEmbedding
+from src.entities.cv import Cv
+from src.ai_models.model import AsymmetricScholarshipMatcher
+from src.ai_models.quantization import EMBEDDING_STORAGE_DTYPE, vector_to_bytes, vector_from_bytes
+from src.utils.cv_statement import CvToStatement
+
+
+def is_stale_scholarship_embedding(scholarship: Scholarship, matcher_model: AsymmetricScholarshipMatcher) -> bool:
+  """A stored vector is stale when the model or the scholarship text changed since it was computed"""
+  embedding = scholarship.embedding
+  if embedding is None:
+    return True
+  text = matcher_model._create_scholarship_text(scholarship.__dict__)
+  return embedding.model_name != matcher_model.model_name or embedding.text_hash != matcher_model.text_hash(text)
+
+def set_scholarship_embedding(scholarship: Scholarship, vector: np.ndarray, matcher_model: AsymmetricScholarshipMatcher) -> None:
+  text = matcher_model._create_scholarship_text(scholarship.__dict__)
+  values = dict(
+    model_name=matcher_model.model_name,
+    text_hash=matcher_model.text_hash(text),
+    dimension=int(vector.shape[0]),
+    dtype=EMBEDDING_STORAGE_DTYPE,
+    vector=vector_to_bytes(vector, EMBEDDING_STORAGE_DTYPE),
+  )
+  if scholarship.embedding is None:
+    scholarship.embedding = ScholarshipEmbedding(**values)
+    return
+  for key, value in values.items():
+    setattr(scholarship.embedding, key, value)
+
+async def embed_scholarship(scholarship: Scholarship, matcher_model: AsymmetricScholarshipMatcher) -> np.ndarray:
+  """Encode a single scholarship and attach the vector to it (used at creation time)"""
+  vector = (await matcher_model.aencode_scholarships([scholarship.__dict__], fail_fast=True))[0]
+  set_scholarship_embedding(scholarship, vector, matcher_model)
+  return vector
+
+async def load_scholarship_embeddings(scholarships: List[Scholarship], matcher_model: AsymmetricScholarshipMatcher) -> np.ndarray:
+  """
+  Stored vectors of the scholarships as one (N x dim) matrix, in the given order.
+  Scholarships must be loaded with `selectinload(Scholarship.embedding)`. Only missing
+  or stale vectors are encoded; they are attached to the rows and saved on the next commit.
+  """
+  stale = [scholarship for scholarship in scholarships if is_stale_scholarship_embedding(scholarship, matcher_model)]
+  if stale:
+    vectors = await matcher_model.aencode_scholarships([scholarship.__dict__ for scholarship in stale])
+    for scholarship, vector in zip(stale, vectors):
+      set_scholarship_embedding(scholarship, vector, matcher_model)
+
+  if not scholarships:
+    return np.zeros((0, 0), dtype=np.float32)
+  return np.vstack([vector_from_bytes(scholarship.embedding.vector, scholarship.embedding.dimension, scholarship.embedding.dtype) for scholarship in scholarships])
+
+def is_stale_cv_embedding(cv: Cv, matcher_model: AsymmetricScholarshipMatcher) -> bool:
+  if cv.embedding is None:
+    return True
+  statement = CvToStatement(cv.__dict__).get_statement()
+  return cv.embedding_model != matcher_model.model_name or cv.embedding_hash != matcher_model.text_hash(statement)
+
+def set_cv_embedding(cv: Cv, statement: str, vector: np.ndarray, matcher_model: AsymmetricScholarshipMatcher) -> None:
+  cv.embedding = vector_to_bytes(vector, EMBEDDING_STORAGE_DTYPE)
+  cv.embedding_dtype = EMBEDDING_STORAGE_DTYPE
+  cv.embedding_model = matcher_model.model_name
+  cv.embedding_hash = matcher_model.text_hash(statement)
+
+async def embed_cv(cv: Cv, matcher_model: AsymmetricScholarshipMatcher, fail_fast: bool = True) -> np.ndarray:
+  """Encode the CV statement and store the vector on the row (used on upload and edit)"""
+  statement = CvToStatement(cv.__dict__).get_statement()
+  vector = (await matcher_model.aencode_texts([statement], fail_fast=fail_fast))[0]
+  set_cv_embedding(cv, statement, vector, matcher_model)
+  return vector
+
+async def load_cv_embeddings(cvs: List[Cv], matcher_model: AsymmetricScholarshipMatcher) -> np.ndarray:
+  """Stored CV statement vectors as one (N x dim) matrix, encoding only missing or stale ones"""
+  stale = [cv for cv in cvs if is_stale_cv_embedding(cv, matcher_model)]
+  if stale:
+    statements = [CvToStatement(cv.__dict__).get_statement() for cv in stale]
+    vectors = await matcher_model.aencode_texts(statements)
+    for cv, statement, vector in zip(stale, statements, vectors):
+      set_cv_embedding(cv, statement, vector, matcher_model)
+
+  if not cvs:
+    return np.zeros((0, 0), dtype=np.float32)
+  return np.vstack([vector_from_bytes(cv.embedding, dtype=cv.embedding_dtype or "float32") for cv in cvs])
@@ -0,0 +1,306 @@
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.entities.scholarship import Scholarship
+from src.ai_models.model import AsymmetricScholarshipMatcher
+from src.ai_models.embeddings import load_scholarship_embeddings
+from src.ai_models.quantization import INDEX_STORAGE_DTYPE, check_dtype, quantize, dequantize, quantized_scores
+from src.ai_models.eligibility import ANYONE, OPEN, CandidateProfile, ScholarshipEligibility, scholarship_eligibility
+
+SYNC_CHUNK_SIZE = 1000
+# above this eligible fraction a full scan is cheaper than gathering the eligible rows
+SUBSET_SCAN_FRACTION = 0.2
+
+
+class ScholarshipIndex:
+    """
+    In-memory exact vector index over scholarship embeddings.
+
+    Vectors are kept L2-normalized in one contiguous float32 matrix with a parallel
+    id array, so a query is a single matrix-vector product plus `argpartition`.
+    Rows live in a preallocated buffer that grows geometrically; removal swaps the
+    last row into the freed slot, so add and remove are both cheap.
+    With `storage_dtype` "float16" or "int8" (per-vector scales) rows are stored
+    quantized and scanned with quantization-aware scoring.
+    Each row also carries its eligibility (study level and field bitmasks, accepted
+    nationalities), so `top_k` for a candidate only scores the rows it may apply to.
+    """
+
+    def __init__(self, dimension: int | None = None, capacity: int = 1024, storage_dtype: str = INDEX_STORAGE_DTYPE):
+        self._lock = threading.RLock()
+        self._dimension = dimension
+        self._capacity = capacity
+        self.storage_dtype = check_dtype(storage_dtype)
+        self._size = 0
+        self._vectors: np.ndarray | None = None
+        self._scales = np.ones(capacity, dtype=np.float32)
+        self._ids = np.empty(capacity, dtype=object)
+        self._positions: dict[Hashable, int] = {}
+        self._levels = np.empty(capacity, dtype=np.int64)
+        self._fields = np.empty(capacity, dtype=np.int64)
+        self._open = np.empty(capacity, dtype=bool)
+        # restricted scholarships only: id -> accepted nationalities, and the inverse lookup
+        self._nationalities: dict[Hashable, frozenset] = {}
+        self._restricted: dict[str, set] = {}
+        # newest scholarship `updated_at` covered by the last `sync_scholarship_index`
+        self.synced_at: datetime | None = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, scholarship_id: Hashable) -> bool:
+        return scholarship_id in self._positions
+
+    @property
+    def dimension(self) -> int | None:
+        return self._dimension
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the indexed vectors and their scales"""
+        if self._vectors is None:
+            return 0
+        return self._vectors[:self._size].nbytes + self._scales[:self._size].nbytes
+
+    def ids(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._ids[:self._size])
+
+    def matrix(self) -> np.ndarray:
+        """Contiguous (N x dim) float32 matrix of the indexed vectors (a view unless quantized)"""
+        with self._lock:
+            if self._vectors is None:
+                return np.zeros((0, self._dimension or 0), dtype=np.float32)
+            if self.storage_dtype == "float32":
+                return self._vectors[:self._size]
+            return dequantize(self._vectors[:self._size], self._scales[:self._size])
+
+    def eligibility(self) -> List[ScholarshipEligibility]:
+        """Eligibility of every row, in the order of `ids()`"""
+        with self._lock:
+            return [
+                ScholarshipEligibility(int(self._levels[i]), int(self._fields[i]), self._nationalities.get(self._ids[i]))
+                for i in range(self._size)
+            ]
+
+    def snapshot(self) -> Tuple[List[Hashable], np.ndarray, List[ScholarshipEligibility]]:
+        """`ids()`, a copy of `matrix()` and `eligibility()` read under one lock, so they stay aligned row for row"""
+        with self._lock:
+            return self.ids(), self.matrix().copy(), self.eligibility()
+
+    def add(self, ids: Sequence[Hashable], vectors: np.ndarray, eligibility: Sequence[ScholarshipEligibility] | None = None) -> None:
+        """Insert or replace vectors (and their eligibility, open to everyone by default) for the given ids"""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if len(ids) != vectors.shape[0]:
+            raise ValueError(f"got {len(ids)} ids for {vectors.shape[0]} vectors")
+        if len(ids) == 0:
+            return
+        eligibility = eligibility or [OPEN] * len(ids)
+        codes, scales = quantize(self._normalize(vectors), self.storage_dtype)
+
+        with self._lock:
+            if self._dimension is None:
+                self._dimension = vectors.shape[1]
+            if vectors.shape[1] != self._dimension:
+                raise ValueError(f"vector dimension {vectors.shape[1]} does not match index dimension {self._dimension}")
+            if self._vectors is None:
+                self._vectors = np.empty((self._capacity, self._dimension), dtype=self.storage_dtype)
+
+            for scholarship_id, code, scale, rules in zip(ids, codes, scales, eligibility):
+                position = self._positions.get(scholarship_id)
+                if position is None:
+                    self._reserve(self._size + 1)
+                    position = self._size
+                    self._size += 1
+                    self._ids[position] = scholarship_id
+                    self._positions[scholarship_id] = position
+                self._vectors[position] = code
+                self._scales[position] = scale
+                self._set_eligibility(scholarship_id, position, rules)
+
+    def remove(self, ids: Sequence[Hashable]) -> None:
+        with self._lock:
+            for scholarship_id in ids:
+                position = self._positions.pop(scholarship_id, None)
+                if position is None:
+                    continue
+                self._forget_nationalities(scholarship_id)
+                last = self._size - 1
+                if position != last:
+                    moved_id = self._ids[last]
+                    self._vectors[position] = self._vectors[last]
+                    self._scales[position] = self._scales[last]
+                    self._levels[position] = self._levels[last]
+                    self._fields[position] = self._fields[last]
+                    self._open[position] = self._open[last]
+                    self._ids[position] = moved_id
+                    self._positions[moved_id] = position
+                self._ids[last] = None
+                self._size -= 1
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against every indexed vector"""
+        query = self._normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        with self._lock:
+            if self._vectors is None:
+                return np.zeros(0, dtype=np.float32)
+            return quantized_scores(self._vectors[:self._size], self._scales[:self._size], query)
+
+    def eligible_rows(self, candidate: CandidateProfile) -> np.ndarray:
+        """Positions of the rows the candidate is eligible for"""
+        with self._lock:
+            size = self._size
+            mask = ((self._levels[:size] & candidate.levels) != 0) & ((self._fields[:size] & candidate.fields) != 0)
+            if candidate.nationality is not None:
+                accepted = self._open[:size].copy()
+                for scholarship_id in self._restricted.get(candidate.nationality, ()):
+                    accepted[self._positions[scholarship_id]] = True
+                mask &= accepted
+            return np.flatnonzero(mask)
+
+    def score_ids(self, cv_vector: np.ndarray, ids: Iterable[Hashable], candidate: CandidateProfile | None = None) -> Dict[Hashable, float]:
+        """Cosine scores of the given scholarships; ids not indexed (or the candidate is not eligible for) are left out"""
+        query = self._normalize(np.asarray(cv_vector, dtype=np.float32).reshape(1, -1))[0]
+        with self._lock:
+            found = [(scholarship_id, self._positions[scholarship_id]) for scholarship_id in ids if scholarship_id in self._positions]
+            if candidate is not None and candidate != ANYONE:
+                found = [(scholarship_id, position) for scholarship_id, position in found if self._eligible_at(scholarship_id, position, candidate)]
+            if not found:
+                return {}
+            rows = np.fromiter((position for _, position in found), dtype=np.int64, count=len(found))
+            scores = quantized_scores(self._vectors[:self._size], self._scales[:self._size], query, rows)
+            return {scholarship_id: float(score) for (scholarship_id, _), score in zip(found, scores)}
+
+    def top_k(self, cv_vector: np.ndarray, k: int, min_score: float = -1.0, candidate: CandidateProfile | None = None) -> List[Tuple[Hashable, float]]:
+        """
+        The k most similar scholarships as (id, cosine score), best first, dropping scores below `min_score`.
+        With a `candidate` profile, scholarships it is not eligible for are filtered out before scoring.
+        """
+        with self._lock:
+            if self._size == 0 or k <= 0:
+                return []
+            if candidate is None or candidate == ANYONE:
+                scores = self.scores(cv_vector)
+                ids = self._ids[:self._size]
+            else:
+                rows = self.eligible_rows(candidate)
+                if len(rows) == 0:
+                    return []
+                if len(rows) > SUBSET_SCAN_FRACTION * self._size:
+                    scores = self.scores(cv_vector)[rows]
+                else:
+                    query = self._normalize(np.asarray(cv_vector, dtype=np.float32).reshape(1, -1))[0]
+                    scores = quantized_scores(self._vectors[:self._size], self._scales[:self._size], query, rows)
+                ids = self._ids[rows]
+            k = min(k, len(scores))
+            if k < len(scores):
+                candidates = np.argpartition(-scores, k - 1)[:k]
+            else:
+                candidates = np.arange(len(scores))
+            candidates = candidates[scores[candidates] >= min_score]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [(ids[i], float(scores[i])) for i in candidates]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._size = 0
+            self._vectors = None
+            self._ids = np.empty(self._capacity, dtype=object)
+            self._scales = np.ones(self._capacity, dtype=np.float32)
+            self._positions = {}
+            self._levels = np.empty(self._capacity, dtype=np.int64)
+            self._fields = np.empty(self._capacity, dtype=np.int64)
+            self._open = np.empty(self._capacity, dtype=bool)
+            self._nationalities = {}
+            self._restricted = {}
+            self.synced_at = None
+
+    def _set_eligibility(self, scholarship_id: Hashable, position: int, rules: ScholarshipEligibility) -> None:
+        self._levels[position] = rules.levels
+        self._fields[position] = rules.fields
+        self._open[position] = rules.nationalities is None
+        self._forget_nationalities(scholarship_id)
+        if rules.nationalities is not None:
+            self._nationalities[scholarship_id] = rules.nationalities
+            for nationality in rules.nationalities:
+                self._restricted.setdefault(nationality, set()).add(scholarship_id)
+
+    def _eligible_at(self, scholarship_id: Hashable, position: int, candidate: CandidateProfile) -> bool:
+        return bool(
+            self._levels[position] & candidate.levels
+            and self._fields[position] & candidate.fields
+            and (self._open[position] or candidate.nationality is None or candidate.nationality in self._nationalities[scholarship_id])
+        )
+
+    def _forget_nationalities(self, scholarship_id: Hashable) -> None:
+        for nationality in self._nationalities.pop(scholarship_id, ()):
+            members = self._restricted[nationality]
+            members.discard(scholarship_id)
+            if not members:
+                del self._restricted[nationality]
+
+    def _reserve(self, size: int) -> None:
+        if size <= self._vectors.shape[0]:
+            return
+        capacity = max(size, self._vectors.shape[0] * 2)
+        vectors = np.empty((capacity, self._dimension), dtype=self.storage_dtype)
+        vectors[:self._size] = self._vectors[:self._size]
+        ids = np.empty(capacity, dtype=object)
+        ids[:self._size] = self._ids[:self._size]
+        scales = np.ones(capacity, dtype=np.float32)
+        scales[:self._size] = self._scales[:self._size]
+        self._vectors, self._ids, self._scales = vectors, ids, scales
+        for name in ("_levels", "_fields", "_open"):
+            current = getattr(self, name)
+            grown = np.empty(capacity, dtype=current.dtype)
+            grown[:self._size] = current[:self._size]
+            setattr(self, name, grown)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def __str__(self):
+        return f"ScholarshipIndex(size={self._size}, dimension={self._dimension}, dtype={self.storage_dtype})"
+
+
+async def sync_scholarship_index(index: ScholarshipIndex, session: AsyncSession, matcher_model: AsymmetricScholarshipMatcher) -> None:
+    """
+    Bring the index in line with the scholarships table: drop deleted scholarships, load (or
+    encode, if missing) vectors for ones this process has not indexed yet and reload the ones
+    edited since the last sync, whose vectors (re-encoded when their text hash changed) and
+    eligibility replace the indexed ones. Works with either index backend.
+    Only ids are read when nothing changed, so this is cheap to call before each match run
+    and keeps per-worker indexes consistent. Backfilled vectors are saved on the caller's commit.
+    """
+    watermark = (await session.execute(select(func.max(Scholarship.updated_at)))).scalar()
+    stored_ids = set((await session.execute(select(Scholarship.id))).scalars().all())
+    indexed_ids = set(index.ids())
+
+    removed = indexed_ids - stored_ids
+    if removed:
+        index.remove(list(removed))
+
+    missing = stored_ids - indexed_ids
+    if index.synced_at is not None:
+        edited = select(Scholarship.id).where(Scholarship.updated_at > index.synced_at)
+        missing |= set((await session.execute(edited)).scalars().all()) & stored_ids
+    elif indexed_ids:
+        # rows loaded without a watermark (an IVF file saved before it was tracked) may predate any edit
+        missing = stored_ids
+    missing = list(missing)
+    for start in range(0, len(missing), SYNC_CHUNK_SIZE):
+        chunk = missing[start:start + SYNC_CHUNK_SIZE]
+        query = select(Scholarship).options(selectinload(Scholarship.embedding)).where(Scholarship.id.in_(chunk))
+        scholarships = (await session.execute(query)).scalars().all()
+        vectors = await load_scholarship_embeddings(scholarships, matcher_model)
+        index.add([scholarship.id for scholarship in scholarships], vectors, [scholarship_eligibility(scholarship) for scholarship in scholarships])
+    index.synced_at = watermark or index.synced_at
@@ -0,0 +1,66 @@
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from dotenv import load_dotenv
+
+from src.exceptions.exceptions import ServiceUnavailableExeption
+
+load_dotenv()
+
+MATCHER_WORKERS = int(os.getenv("MATCHER_WORKERS", "2"))
+MATCHER_MAX_QUEUE = int(os.getenv("MATCHER_MAX_QUEUE", "64"))
+
+
+class InferenceExecutor:
+  """
+  Bounded thread pool for model inference and index scans, so they never run on the event loop.
+  torch and NumPy release the GIL inside their kernels, so threads give real parallelism here
+  without a second copy of the model. At most `max_queue` calls may be admitted (running or
+  waiting); beyond that request-path callers get a fast 503 and background callers wait for room.
+  """
+
+  def __init__(self, max_workers: int = MATCHER_WORKERS, max_queue: int = MATCHER_MAX_QUEUE):
+    self.max_workers = max_workers
+    self.max_queue = max(max_queue, max_workers)
+    self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="matcher")
+    self._admission: asyncio.Semaphore | None = None
+    self._admitted = 0
+
+  @property
+  def queue_depth(self) -> int:
+    """Calls admitted but not finished yet (running plus waiting for a worker)"""
+    return self._admitted
+
+  @property
+  def saturated(self) -> bool:
+    return self._admission is not None and self._admission.locked()
+
+  def ensure_capacity(self) -> None:
+    """Raise a 503 right away when no more calls can be admitted"""
+    if self.saturated:
+      logging.warning(f"inference queue is full ({self._admitted}/{self.max_queue})")
+      raise ServiceUnavailableExeption(detail="matcher is busy, try again later")
+
+  async def run(self, fn: Callable[..., Any], *args, fail_fast: bool = False, **kwargs) -> Any:
+    if self._admission is None:
+      # created lazily so it binds to the running loop
+      self._admission = asyncio.Semaphore(self.max_queue)
+    if fail_fast:
+      self.ensure_capacity()
+
+    async with self._admission:
+      self._admitted += 1
+      try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+      finally:
+        self._admitted -= 1
+
+  def shutdown(self) -> None:
+    self._executor.shutdown(wait=False, cancel_futures=True)
+
+  def __str__(self):
+    return f"InferenceExecutor(workers={self.max_workers}, max_queue={self.max_queue}, depth={self._admitted})"
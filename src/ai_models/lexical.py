@@ -0,0 +1,264 @@
+"""
+BM25 inverted index over scholarship text, blended with the embedding scores.
+
+Embeddings capture paraphrases but blur exact terms: a CV listing "pytorch" or "gis" should rank
+scholarships naming that skill above ones that are merely about the same area. `LexicalIndex`
+keeps BM25 postings over `description`, `requirements` and `field_of_study`, queried with the CV
+statement and skills. Matching retrieves candidates from both indexes and reranks their union by
+
+    (HYBRID_SEMANTIC_WEIGHT * cosine + HYBRID_LEXICAL_WEIGHT * bm25 / bm25_upper_bound) / (sum of weights)
+
+The BM25 score is divided by the best score the query could reach (every term saturated), so the
+lexical part lies in [0, 1) like the cosine and does not depend on which candidates were scored.
+With the default HYBRID_LEXICAL_WEIGHT=0 scores are purely semantic and no lexical index is built.
+"""
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.entities.scholarship import Scholarship
+from src.ai_models.eligibility import CandidateProfile
+from src.utils.cv_statement import CvToStatement
+
+load_dotenv()
+
+HYBRID_SEMANTIC_WEIGHT = float(os.getenv("HYBRID_SEMANTIC_WEIGHT", "1.0"))
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "0.0"))
+# scholarships retrieved lexically and merged with the semantic candidates
+LEXICAL_CANDIDATES = int(os.getenv("LEXICAL_CANDIDATES", "100"))
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+SYNC_CHUNK_SIZE = 1000
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+# English function words plus the boilerplate CvToStatement wraps around every profile
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have i in is it its my of on or that the this to was were will with
+am degree degrees gpa graduated include includes skills studied student students scholarship scholarships
+program programs s
+""".split())
+
+
+def hybrid_enabled() -> bool:
+    return HYBRID_LEXICAL_WEIGHT > 0
+
+def tokenize(text: str | None) -> List[str]:
+    if not text:
+        return []
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+def scholarship_text(scholarship: Dict) -> str:
+    parts = [scholarship.get("description"), scholarship.get("requirements"), scholarship.get("field_of_study")]
+    return " ".join(filter(None, parts))
+
+def cv_query(cv: Dict) -> List[str]:
+    """Query terms of a CV: its statement, with the listed skills counted once more"""
+    terms = tokenize(CvToStatement(cv).get_statement())
+    try:
+        skills = json.loads(cv.get("skills") or "[]")
+    except ValueError:
+        skills = []
+    for skill in skills:
+        terms.extend(tokenize(skill))
+    return terms
+
+def blend(semantic, lexical, weights: Tuple[float, float] | None = None):
+    """
+    Hybrid cosine-scale score from cosine and normalized BM25 scores (floats or arrays).
+    `weights` is (semantic, lexical) and defaults to HYBRID_SEMANTIC_WEIGHT, HYBRID_LEXICAL_WEIGHT.
+    """
+    semantic_weight, lexical_weight = weights or (HYBRID_SEMANTIC_WEIGHT, HYBRID_LEXICAL_WEIGHT)
+    return (semantic_weight * semantic + lexical_weight * lexical) / (semantic_weight + lexical_weight)
+
+def semantic_floor(min_score: float, weights: Tuple[float, float] | None = None) -> float:
+    """Lowest cosine score that can still blend to `min_score` (the lexical part is below 1)"""
+    semantic_weight, lexical_weight = weights or (HYBRID_SEMANTIC_WEIGHT, HYBRID_LEXICAL_WEIGHT)
+    if lexical_weight <= 0:
+        return min_score
+    if semantic_weight <= 0:
+        return -1.0
+    return max(-1.0, (min_score * (semantic_weight + lexical_weight) - lexical_weight) / semantic_weight)
+
+
+class LexicalIndex:
+    """
+    In-memory BM25 inverted index keyed by scholarship id.
+
+    Postings map each term to {id: term frequency}; a query only walks the postings of its own
+    terms, so cost grows with the matching documents rather than the catalogue. Documents can be
+    replaced and removed, and the collection statistics (document frequencies, average length)
+    are kept current on every change.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self._lock = threading.RLock()
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._terms: Dict[Hashable, Counter] = {}
+        self._lengths: Dict[Hashable, int] = {}
+        self._total_length = 0
+        # newest scholarship `updated_at` covered by the last `sync_lexical_index`
+        self.synced_at: datetime | None = None
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, scholarship_id: Hashable) -> bool:
+        return scholarship_id in self._lengths
+
+    def ids(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._lengths)
+
+    def add(self, ids: Sequence[Hashable], texts: Sequence[str]) -> None:
+        """Insert or replace the documents of the given ids"""
+        if len(ids) != len(texts):
+            raise ValueError(f"got {len(ids)} ids for {len(texts)} texts")
+        with self._lock:
+            self.remove([scholarship_id for scholarship_id in ids if scholarship_id in self._lengths])
+            for scholarship_id, text in zip(ids, texts):
+                tokens = tokenize(text)
+                counts = Counter(tokens)
+                for term, count in counts.items():
+                    self._postings.setdefault(term, {})[scholarship_id] = count
+                self._terms[scholarship_id] = counts
+                self._lengths[scholarship_id] = len(tokens)
+                self._total_length += len(tokens)
+
+    def remove(self, ids: Iterable[Hashable]) -> None:
+        with self._lock:
+            for scholarship_id in ids:
+                counts = self._terms.pop(scholarship_id, None)
+                if counts is None:
+                    continue
+                for term in counts:
+                    postings = self._postings[term]
+                    del postings[scholarship_id]
+                    if not postings:
+                        del self._postings[term]
+                self._total_length -= self._lengths.pop(scholarship_id)
+
+    def idf(self, term: str) -> float:
+        frequency = len(self._postings.get(term, ()))
+        return math.log(1 + (len(self._lengths) - frequency + 0.5) / (frequency + 0.5))
+
+    def upper_bound(self, query: Sequence[str]) -> float:
+        """BM25 score of a document in which every indexed query term saturates"""
+        with self._lock:
+            return sum(count * self.idf(term) * (self.k1 + 1) for term, count in Counter(query).items() if term in self._postings)
+
+    def scores(self, query: Sequence[str], ids: Iterable[Hashable] | None = None) -> Dict[Hashable, float]:
+        """
+        Normalized BM25 scores in [0, 1) of the documents sharing a term with the query
+        (restricted to `ids` when given); documents without a shared term score 0 and are omitted.
+        """
+        restrict = set(ids) if ids is not None else None
+        with self._lock:
+            if not self._lengths:
+                return {}
+            average_length = self._total_length / len(self._lengths) or 1.0
+            bound = self.upper_bound(query)
+            if bound <= 0:
+                return {}
+            scores: Dict[Hashable, float] = {}
+            for term, count in Counter(query).items():
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                weight = count * self.idf(term) * (self.k1 + 1) / bound
+                if restrict is not None:
+                    postings = {scholarship_id: postings[scholarship_id] for scholarship_id in restrict if scholarship_id in postings}
+                for scholarship_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[scholarship_id] / average_length)
+                    scores[scholarship_id] = scores.get(scholarship_id, 0.0) + weight * frequency / (frequency + norm)
+            return scores
+
+    def top_k(self, query: Sequence[str], k: int) -> List[Tuple[Hashable, float]]:
+        """The k best lexical matches as (id, normalized BM25 score), best first"""
+        if k <= 0:
+            return []
+        scores = self.scores(query)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings = {}
+            self._terms = {}
+            self._lengths = {}
+            self._total_length = 0
+            self.synced_at = None
+
+    def __str__(self):
+        return f"LexicalIndex(documents={len(self._lengths)}, terms={len(self._postings)})"
+
+
+def hybrid_rank(
+    semantic: Dict[Hashable, float],
+    lexical: Dict[Hashable, float],
+    k: int,
+    min_score: float = -1.0,
+    weights: Tuple[float, float] | None = None,
+) -> List[Tuple[Hashable, float]]:
+    """Blend semantic and lexical scores of the candidates in `semantic` and keep the k best above `min_score`"""
+    blended = [(scholarship_id, blend(score, lexical.get(scholarship_id, 0.0), weights)) for scholarship_id, score in semantic.items()]
+    blended = [(scholarship_id, score) for scholarship_id, score in blended if score >= min_score]
+    blended.sort(key=lambda item: item[1], reverse=True)
+    return blended[:k]
+
+def hybrid_top_k(
+    scholarship_index,
+    lexical_index: LexicalIndex,
+    cv_vector: np.ndarray,
+    query: Sequence[str],
+    k: int,
+    min_score: float = -1.0,
+    candidate: CandidateProfile | None = None,
+    weights: Tuple[float, float] | None = None,
+) -> List[Tuple[Hashable, float]]:
+    """
+    The k best scholarships by blended score. Semantic candidates are every scholarship whose cosine
+    can still blend above `min_score`; the LEXICAL_CANDIDATES best BM25 matches are merged in and
+    scored semantically too, then the union is reranked. Works with either vector index backend.
+    """
+    semantic = dict(scholarship_index.top_k(cv_vector, k, min_score=semantic_floor(min_score, weights), candidate=candidate))
+    lexical = lexical_index.scores(query)
+    retrieved = heapq.nlargest(LEXICAL_CANDIDATES, lexical.items(), key=lambda item: item[1])
+    missing = [scholarship_id for scholarship_id, _ in retrieved if scholarship_id not in semantic]
+    semantic.update(scholarship_index.score_ids(cv_vector, missing, candidate))
+    return hybrid_rank(semantic, lexical, k, min_score, weights)
+
+
+async def sync_lexical_index(index: LexicalIndex, session: AsyncSession) -> None:
+    """
+    Drop deleted scholarships from the lexical index, add the ones it has not seen and re-read the
+    ones edited since the last sync, so their postings match their current text
+    """
+    watermark = (await session.execute(select(func.max(Scholarship.updated_at)))).scalar()
+    stored_ids = set((await session.execute(select(Scholarship.id))).scalars().all())
+    indexed_ids = set(index.ids())
+
+    removed = indexed_ids - stored_ids
+    if removed:
+        index.remove(removed)
+
+    missing = stored_ids - indexed_ids
+    if index.synced_at is not None:
+        edited = select(Scholarship.id).where(Scholarship.updated_at > index.synced_at)
+        missing |= set((await session.execute(edited)).scalars().all()) & stored_ids
+    missing = list(missing)
+    for start in range(0, len(missing), SYNC_CHUNK_SIZE):
+        query = select(Scholarship.id, Scholarship.description, Scholarship.requirements, Scholarship.field_of_study)
+        rows = (await session.execute(query.where(Scholarship.id.in_(missing[start:start + SYNC_CHUNK_SIZE])))).all()
+        index.add([row.id for row in rows], [scholarship_text(row._asdict()) for row in rows])
+    index.synced_at = watermark or index.synced_at
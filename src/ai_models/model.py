@@ -1,12 +1,33 @@
+import hashlib
+import os
 import numpy as np
 from typing import List, Dict
 
 from sentence_transformers import SentenceTransformer, util
-import numpy as np
+from dotenv import load_dotenv
+
+from src.ai_models.inference import InferenceExecutor
+from src.ai_models.batcher import EncodeBatcher
+from src.utils.parse_pool import CvParsePool
+
+load_dotenv()
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+# local copy of the model (e.g. a `SentenceTransformer.save()` directory), loaded without network access
+MATCHER_MODEL_PATH = os.getenv("MATCHER_MODEL_PATH")
 
 class AsymmetricScholarshipMatcher:
-    def __init__(self):
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, model_path: str | None = MATCHER_MODEL_PATH):
+        # stored vectors are keyed by the logical model name, so a local copy does not invalidate them
+        self.model_name = MODEL_NAME
+        if model_path:
+            # never contact the hub; safetensors weights are memory-mapped instead of read into fresh buffers
+            self.model = SentenceTransformer(model_path, local_files_only=True, model_kwargs={"use_safetensors": True})
+        else:
+            self.model = SentenceTransformer(self.model_name)
+        self.executor = InferenceExecutor()
+        self.batcher = EncodeBatcher(self.encode_texts, self.executor)
+        self.parse_pool = CvParsePool()
         
     def calculate_match_persent(self, cv_text: str, scholarship: Dict) -> float:
         """Asymmetric matching (CV → Scholarship requirements)"""
@@ -21,6 +42,60 @@ class AsymmetricScholarshipMatcher:
         scaled = similiarity * 100
 
         return float(round(scaled, 2))
+
+    def calculate_match_persents(self, cv_text: str, scholarships: List[Dict], batch_size: int = 64) -> np.ndarray:
+        """Batched asymmetric matching (one CV → many scholarships)"""
+        if not cv_text or not scholarships:
+            return np.zeros(len(scholarships or []), dtype=np.float32)
+
+        cv_embedding = self.encode_texts([cv_text])[0]
+        scholarship_embeddings = self.encode_scholarships(scholarships, batch_size=batch_size)
+        return self.score_embeddings(cv_embedding, scholarship_embeddings)
+
+    def encode_texts(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Normalized float32 embeddings, one row per text"""
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        embeddings = self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    def encode_scholarships(self, scholarships: List[Dict], batch_size: int = 64) -> np.ndarray:
+        """Embeddings of the scholarship texts, in the given order"""
+        return self.encode_texts([self._create_scholarship_text(scholarship) for scholarship in scholarships], batch_size=batch_size)
+
+    async def aencode_texts(self, texts: List[str], batch_size: int = 64, fail_fast: bool = False) -> np.ndarray:
+        """`encode_texts` through the micro-batcher; `fail_fast` raises 503 instead of waiting when saturated"""
+        return await self.batcher.encode(texts, batch_size=batch_size, fail_fast=fail_fast)
+
+    async def aencode_scholarships(self, scholarships: List[Dict], batch_size: int = 64, fail_fast: bool = False) -> np.ndarray:
+        texts = [self._create_scholarship_text(scholarship) for scholarship in scholarships]
+        return await self.aencode_texts(texts, batch_size=batch_size, fail_fast=fail_fast)
+
+    def score_embeddings(self, embedding: np.ndarray, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Match persents of normalized embeddings (cosine similarity is a dot product) as `embeddings @ embedding`.
+        `embeddings` is (N x dim); a (dim,) `embedding` gives N scores, and a (dim x K) matrix of K embeddings
+        (a transposed K x dim matrix) gives an (N x K) result, scoring every pair in one product.
+        """
+        if len(embeddings) == 0:
+            return np.zeros(0, dtype=np.float32)
+        similiarities = embeddings @ embedding
+        return np.round(similiarities * 100, 2).astype(np.float32)
+
+    def warmup(self) -> None:
+        """Run one encode so the first real request does not pay for lazy initialisation"""
+        self.encode_texts(["warmup"])
+
+    async def awarmup(self) -> None:
+        await self.executor.run(self.warmup)
+
+    async def aparse_cv(self, cv_bytes: bytes) -> Dict:
+        """Parse a PDF CV in the parse process pool, off this process's GIL"""
+        return await self.parse_pool.parse(cv_bytes)
+
+    def text_hash(self, text: str) -> str:
+        """Fingerprint of an encoded text, used to detect stale stored vectors"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
     
     def _create_requirements_text(self, scholarship):
         """Extract requirements-focused text"""
@@ -51,6 +126,8 @@ class AsymmetricScholarshipMatcher:
         return "Weak"
     
     def clear(self):
+        self.executor.shutdown()
+        self.parse_pool.shutdown()
         self.model = None
     
     def __str__(self):
@@ -58,243 +135,16 @@ class AsymmetricScholarshipMatcher:
 
 
 if __name__ == "__main__":
+    from src.ai_models.samples import SAMPLE_CV_TEXT, SAMPLE_SCHOLARSHIPS
+
     matcher = AsymmetricScholarshipMatcher()
     
-    cv_text = """
-            A final-year undergraduate student majoring in Computer Science with a 3.9 GPA. 
-            Strong interest in Artificial Intelligence, Machine Learning, and Data Science. 
-            Completed internships involving Python, TensorFlow, and Natural Language Processing. 
-            Published research paper on AI ethics. Winner of inter-university coding hackathon. 
-            Indian national, fluent in English and Hindi.
-            """
-    
-    test_scholarships = [
-    # 50 Matching scholarships
-    {
-        "id": "1",
-        "name": "STEM Scholarship for Egyptians",
-        "description": "For Egyptian students in STEM fields",
-        "requirements": "Minimum 3.5 GPA, programming skills, AI/ML interest",
-        "field_of_study": "Computer Science",
-        "study_level": "Undergraduate",
-        "eligible_nationalities": "Egyptian"
-    },
-    {
-        "id": "2",
-        "name": "AI Undergraduate Grant", 
-        "description": "Support for undergrads in AI fields",
-        "requirements": "3.5+ GPA, programming experience",
-        "field_of_study": "Artificial Intelligence",
-        "study_level": "Undergraduate"
-    },
-    {
-        "id": "3",
-        "name": "Egyptian Tech Excellence Award",
-        "description": "For outstanding Egyptian tech students",
-        "requirements": "3.7+ GPA, CS background",
-        "field_of_study": "Computer Science",
-        "study_level": "Undergraduate",
-        "eligible_nationalities": "Egyptian"
-    },
-    {
-        "id": "4",
-        "name": "Middle East CS Scholarship",
-        "description": "For Arab students in computer science",
-        "requirements": "Programming skills, academic excellence",
-        "field_of_study": "Computer Science",
-        "study_level": "Undergraduate",
-        "eligible_nationalities": "Egyptian, Saudi, Emirati"
-    },
-    {
-        "id": "5",
-        "name": "Undergraduate Research in AI",
-        "description": "Funding for AI research projects",
-        "requirements": "ML experience, faculty recommendation",
-        "field_of_study": "Artificial Intelligence",
-        "study_level": "Undergraduate"
-    },
-    {
-        "id": "6",
-        "name": "Cairo University Tech Grant",
-        "description": "For Egyptian CS undergraduates",
-        "requirements": "3.5+ GPA, Python/Java skills",
-        "field_of_study": "Computer Science",
-        "study_level": "Undergraduate",
-        "eligible_nationalities": "Egyptian"
-    },
-    {
-        "id": "7",
-        "name": "North Africa STEM Award",
-        "description": "For STEM students from North Africa",
-        "requirements": "Strong academic record, technical skills",
-        "field_of_study": "Computer Science",
-        "study_level": "Undergraduate",
-        "eligible_nationalities": "Egyptian, Libyan, Tunisian"
-    },
-    {
-        "id": "8",
-        "name": "Python Developers Scholarship",
-        "description": "For students with Python programming skills",
-        "requirements": "Python projects, 3.0+ GPA",
-        "field_of_study": "Computer Science",
-        "study_level": "Undergraduate"
-    },
-    {
-        "id": "9",
-        "name": "AI Innovators Program",
-        "description": "For students pursuing AI innovation",
-        "requirements": "ML interest, technical skills",
-        "field_of_study": "Artificial Intelligence",
-        "study_level": "Undergraduate"
-    },
-    {
-        "id": "10",
-        "name": "Egyptian Future Leaders in Tech",
-        "description": "Developing tech leaders in Egypt",
-        "requirements": "Leadership potential, CS background",
-        "field_of_study": "Computer Science",
-        "study_level": "Undergraduate",
-        "eligible_nationalities": "Egyptian"
-    },
-    # 40 more matching scholarships...
-    {
-        "id": "11",
-        "name": "Undergraduate CS Excellence Award",
-        "description": "For top computer science undergraduates",
-        "requirements": "3.8+ GPA, strong technical skills",
-        "field_of_study": "Computer Science",
-        "study_level": "Undergraduate"
-    },
-    {
-        "id": "12",
-        "name": "Alexandria Tech Scholarship",
-        "description": "For tech students from Alexandria",
-        "requirements": "3.5+ GPA, programming experience",
-        "field_of_study": "Computer Science",
-        "study_level": "Undergraduate",
-        "eligible_nationalities": "Egyptian"
-    },
-    {
-        "id": "13",
-        "name": "AI Project Grant",
-        "description": "Funding for undergraduate AI projects",
-        "requirements": "ML experience, project proposal",
-        "field_of_study": "Artificial Intelligence",
-        "study_level": "Undergraduate"
-    },
-    {
-        "id": "14",
-        "name": "Nile Valley CS Award",
-        "description": "For CS students in Nile Valley countries",
-        "requirements": "3.0+ GPA, programming skills",
-        "field_of_study": "Computer Science",
-        "study_level": "Undergraduate",
-        "eligible_nationalities": "Egyptian, Sudanese"
-    },
-    {
-        "id": "15",
-        "name": "Emerging AI Talent Scholarship",
-        "description": "For promising AI undergraduates",
-        "requirements": "ML interest, academic excellence",
-        "field_of_study": "Artificial Intelligence",
-        "study_level": "Undergraduate"
-    },
-    # Continuing the pattern with similar matching scholarships...
-    
-    # 50 Non-matching scholarships
-    {
-        "id": "51",
-        "name": "MBA Leadership Grant",
-        "description": "For graduate business students",
-        "requirements": "2+ years work experience, GMAT 650+",
-        "field_of_study": "Business Administration",
-        "study_level": "Graduate"
-    },
-    {
-        "id": "52",
-        "name": "European Arts Scholarship",
-        "description": "For EU students in fine arts",
-        "requirements": "Portfolio review, art background",
-        "field_of_study": "Fine Arts",
-        "study_level": "Undergraduate",
-        "eligible_nationalities": "EU countries"
-    },
-    {
-        "id": "53",
-        "name": "Medical Research Fellowship",
-        "description": "For PhD medical researchers",
-        "requirements": "MD or PhD, research publications",
-        "field_of_study": "Medicine",
-        "study_level": "PhD"
-    },
-    {
-        "id": "54",
-        "name": "Japanese Language Program",
-        "description": "For students of Japanese language",
-        "requirements": "JLPT N3 or equivalent",
-        "field_of_study": "Japanese Language",
-        "study_level": "Any"
-    },
-    {
-        "id": "55",
-        "name": "African Women in Agriculture",
-        "description": "For female African agriculture students",
-        "requirements": "Agriculture background, leadership",
-        "field_of_study": "Agriculture",
-        "study_level": "Graduate",
-        "eligible_nationalities": "African",
-        "gender": "Female"
-    },
-    # 45 more non-matching scholarships...
-    {
-        "id": "56",
-        "name": "Canadian Engineering Masters",
-        "description": "For international engineering masters students in Canada",
-        "requirements": "Engineering degree, research proposal",
-        "field_of_study": "Engineering",
-        "study_level": "Masters",
-        "eligible_nationalities": "Non-Canadian"
-    },
-    {
-        "id": "57",
-        "name": "Latin American Social Sciences",
-        "description": "For social science students from Latin America",
-        "requirements": "Social sciences background, Spanish proficiency",
-        "field_of_study": "Social Sciences",
-        "study_level": "Graduate",
-        "eligible_nationalities": "Latin American"
-    },
-    {
-        "id": "58",
-        "name": "Veterinary Medicine Scholarship",
-        "description": "For veterinary medicine students",
-        "requirements": "Animal science background, volunteer experience",
-        "field_of_study": "Veterinary Medicine",
-        "study_level": "Undergraduate"
-    },
-    {
-        "id": "59",
-        "name": "US High School STEM Contest",
-        "description": "For US high school students in STEM",
-        "requirements": "High school student, STEM project",
-        "field_of_study": "STEM",
-        "study_level": "High School",
-        "eligible_nationalities": "US"
-    },
-    {
-        "id": "60",
-        "name": "French Literature PhD Grant",
-        "description": "For PhD candidates in French literature",
-        "requirements": "MA in French, research proposal",
-        "field_of_study": "French Literature",
-        "study_level": "PhD"
-    },
-    # Continuing the pattern with various non-matching scholarships...
-]
+    cv_text = SAMPLE_CV_TEXT
+    test_scholarships = SAMPLE_SCHOLARSHIPS
     
     # results = matcher.calculate_matches(test_cv, test_scholarships)
-    for i in range(len(test_scholarships)):
-      value = matcher.calculate_match_persent(cv_text, test_scholarships[i])
+    values = matcher.calculate_match_persents(cv_text, test_scholarships)
+    for i, value in enumerate(values):
       print(i, "===", value)
     
     # print("Asymmetric Matching Results:")
@@ -0,0 +1,79 @@
+import os
+import numpy as np
+from typing import Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+# dtype of persisted embedding blobs (scholarship_embeddings.vector, cv.embedding)
+EMBEDDING_STORAGE_DTYPE = os.getenv("EMBEDDING_STORAGE_DTYPE", "float32")
+# dtype of the in-memory scholarship index
+INDEX_STORAGE_DTYPE = os.getenv("INDEX_STORAGE_DTYPE", "float32")
+
+SCAN_CHUNK_SIZE = 8192
+INT8_MAX = 127.0
+
+
+def check_dtype(dtype: str) -> str:
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(f"unsupported embedding dtype {dtype!r}, expected one of {STORAGE_DTYPES}")
+    return dtype
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Codes and per-vector scales for (N x dim) float vectors.
+    int8 is symmetric: each row is scaled so its largest magnitude maps to 127.
+    float32/float16 rows carry a scale of 1.
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    check_dtype(dtype)
+    if dtype != "int8":
+        return vectors.astype(dtype), np.ones(len(vectors), dtype=np.float32)
+
+    max_abs = np.abs(vectors).max(axis=1)
+    scales = np.where(max_abs > 0, max_abs / INT8_MAX, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, None]), -INT8_MAX, INT8_MAX).astype(np.int8)
+    return codes, scales
+
+def dequantize(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    return codes.astype(np.float32) * scales[:, None]
+
+def quantized_scores(codes: np.ndarray, scales: np.ndarray, query: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+    """
+    Dot products of a float32 query against quantized rows (or only the given `rows` of them).
+    Rows are upcast to float32 a chunk at a time so the product still runs on BLAS
+    without materializing a full-precision copy; int8 results are rescaled per row.
+    Selected rows are gathered a chunk at a time too, so the copy stays cache-sized.
+    """
+    query = np.asarray(query, dtype=np.float32)
+    if rows is None and codes.dtype == np.float32:
+        return codes @ query
+    count = len(codes) if rows is None else len(rows)
+    scores = np.empty(count, dtype=np.float32)
+    for start in range(0, count, SCAN_CHUNK_SIZE):
+        chunk = codes[start:start + SCAN_CHUNK_SIZE] if rows is None else codes[rows[start:start + SCAN_CHUNK_SIZE]]
+        scores[start:start + SCAN_CHUNK_SIZE] = chunk.astype(np.float32, copy=False) @ query
+    if codes.dtype == np.int8:
+        scores *= scales if rows is None else scales[rows]
+    return scores
+
+def vector_to_bytes(vector: np.ndarray, dtype: str = EMBEDDING_STORAGE_DTYPE) -> bytes:
+    """Serialize one vector; int8 blobs start with the float32 scale"""
+    codes, scales = quantize(vector, dtype)
+    if dtype == "int8":
+        return scales[:1].tobytes() + codes[0].tobytes()
+    return codes[0].tobytes()
+
+def vector_from_bytes(blob: bytes, dimension: int | None = None, dtype: str = "float32") -> np.ndarray:
+    """Deserialize a stored vector back to float32"""
+    check_dtype(dtype)
+    if dtype == "int8":
+        scale = np.frombuffer(blob[:4], dtype=np.float32)
+        codes = np.frombuffer(blob[4:], dtype=np.int8)
+        vector = codes.astype(np.float32) * scale[0]
+    else:
+        vector = np.frombuffer(blob, dtype=dtype).astype(np.float32)
+    if dimension is not None and vector.shape[0] != dimension:
+        raise ValueError(f"stored vector has {vector.shape[0]} values, expected {dimension}")
+    return vector
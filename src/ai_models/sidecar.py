@@ -0,0 +1,233 @@
+"""
+Matcher sidecar: one process owns the sentence-transformer (and the CV parse process pool) and
+uvicorn workers reach it over a Unix domain socket, so HTTP workers scale without copying the models.
+
+    python -m src.ai_models.sidecar            # serve on MATCHER_SOCKET
+    MATCHER_MODE=sidecar uvicorn src.main:app --workers 4
+
+Frames are `>II` (header length, payload length) followed by a JSON header and a binary payload.
+Requests carry an `id` so a connection can pipeline many calls; vectors come back as raw float32.
+Requests from all workers go through the sidecar's micro-batcher, so they are encoded together.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import struct
+import numpy as np
+from typing import Dict, List, Tuple
+from dotenv import load_dotenv
+
+from src.ai_models.model import AsymmetricScholarshipMatcher, MODEL_NAME
+from src.ai_models.inference import InferenceExecutor
+from src.exceptions.exceptions import NEXTstepApiExeption, ServiceUnavailableExeption
+
+load_dotenv()
+
+# "local" loads the model in every worker, "sidecar" talks to `python -m src.ai_models.sidecar`
+MATCHER_MODE = os.getenv("MATCHER_MODE", "local")
+MATCHER_SOCKET = os.getenv("MATCHER_SOCKET", "/tmp/nextstep-matcher.sock")
+MATCHER_SOCKET_TIMEOUT = float(os.getenv("MATCHER_SOCKET_TIMEOUT", "60"))
+
+FRAME_HEADER = struct.Struct(">II")
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[Dict, bytes]:
+    header_length, payload_length = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    header = json.loads(await reader.readexactly(header_length))
+    payload = await reader.readexactly(payload_length) if payload_length else b""
+    return header, payload
+
+def write_frame(writer: asyncio.StreamWriter, header: Dict, payload: bytes = b"") -> None:
+    encoded = json.dumps(header).encode("utf-8")
+    # a single write keeps concurrent responses on one connection from interleaving
+    writer.write(FRAME_HEADER.pack(len(encoded), len(payload)) + encoded + payload)
+
+
+class MatcherServer:
+    def __init__(self, matcher_model: AsymmetricScholarshipMatcher, socket_path: str = MATCHER_SOCKET):
+        self.matcher_model = matcher_model
+        self.socket_path = socket_path
+
+    async def serve(self) -> None:
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        logging.info(f"matcher sidecar listening on {self.socket_path}")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        requests = set()
+        try:
+            while True:
+                header, payload = await read_frame(reader)
+                # handled concurrently so pipelined requests land in the same micro-batch
+                task = asyncio.create_task(self._handle_request(header, payload, writer))
+                requests.add(task)
+                task.add_done_callback(requests.discard)
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            for task in requests:
+                task.cancel()
+            writer.close()
+
+    async def _handle_request(self, header: Dict, payload: bytes, writer: asyncio.StreamWriter) -> None:
+        response, body = {"id": header.get("id")}, b""
+        try:
+            op = header.get("op")
+            if op == "encode":
+                vectors = await self.matcher_model.aencode_texts(header["texts"], fail_fast=header.get("fail_fast", False))
+                response["shape"] = list(vectors.shape)
+                body = np.ascontiguousarray(vectors, dtype=np.float32).tobytes()
+            elif op == "parse_cv":
+                response["result"] = await self.matcher_model.aparse_cv(payload)
+            elif op == "ping":
+                response["model"] = self.matcher_model.model_name
+            else:
+                raise ValueError(f"unknown op {op!r}")
+        except NEXTstepApiExeption as e:
+            response.update(error=e.detail, status=e.status_code)
+        except Exception as e:
+            logging.error(f"matcher sidecar failed to handle {header.get('op')}. Error: {e}")
+            response.update(error=str(e), status=500)
+        try:
+            write_frame(writer, response, body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+class MatcherClient(AsymmetricScholarshipMatcher):
+    """
+    Thin matcher used by workers in sidecar mode. Encoding and CV parsing run in the sidecar;
+    index scans and scoring stay local on a small executor, since they only need the vectors.
+    """
+
+    def __init__(self, socket_path: str = MATCHER_SOCKET, timeout: float = MATCHER_SOCKET_TIMEOUT):
+        self.model_name = MODEL_NAME
+        self.model = None
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.executor = InferenceExecutor()
+        self._ids = itertools.count()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._listener: asyncio.Task | None = None
+        self._connecting = asyncio.Lock()
+
+    def encode_texts(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        raise RuntimeError("the matcher runs in a sidecar; use aencode_texts")
+
+    def warmup(self) -> None:
+        raise RuntimeError("the matcher runs in a sidecar; use awarmup")
+
+    async def aencode_texts(self, texts: List[str], batch_size: int = 64, fail_fast: bool = False) -> np.ndarray:
+        header, payload = await self._call({"op": "encode", "texts": texts, "fail_fast": fail_fast})
+        return np.frombuffer(payload, dtype=np.float32).reshape(header["shape"])
+
+    async def aparse_cv(self, cv_bytes: bytes) -> Dict:
+        header, _ = await self._call({"op": "parse_cv"}, cv_bytes)
+        return header["result"]
+
+    async def awarmup(self) -> None:
+        header, _ = await self._call({"op": "ping"})
+        if header["model"] != self.model_name:
+            raise RuntimeError(f"sidecar serves {header['model']}, expected {self.model_name}")
+
+    async def _connect(self) -> None:
+        async with self._connecting:
+            if self._writer is not None and not self._writer.is_closing():
+                return
+            self._reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+            self._listener = asyncio.create_task(self._listen(self._reader))
+
+    async def _listen(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                header, payload = await read_frame(reader)
+                future = self._pending.pop(header.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result((header, payload))
+        except Exception as e:
+            # a connection `_reset` already dropped is not the current one; leave its successor alone
+            if self._reader is reader:
+                logging.error(f"lost connection to the matcher sidecar. Error: {e}")
+                self._reader, self._writer = None, None
+                self._fail_pending()
+
+    def _fail_pending(self) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ServiceUnavailableExeption(detail="matcher sidecar is unavailable"))
+        self._pending.clear()
+
+    async def _reset(self, writer: asyncio.StreamWriter | None) -> None:
+        """Drop `writer`'s connection if it is still the current one; the next call reconnects"""
+        async with self._connecting:
+            if writer is None or self._writer is not writer:
+                return
+            self._reader, self._writer = None, None
+            writer.close()
+            # requests still waiting on it would otherwise wait for their timeout
+            self._fail_pending()
+
+    async def _call(self, header: Dict, payload: bytes = b"") -> Tuple[Dict, bytes]:
+        try:
+            await self._connect()
+        except OSError as e:
+            logging.error(f"cannot reach the matcher sidecar at {self.socket_path}. Error: {e}")
+            raise ServiceUnavailableExeption(detail="matcher sidecar is unavailable")
+
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        # the listener may have dropped the connection since `_connect` returned
+        writer = self._writer
+        try:
+            if writer is None:
+                raise ConnectionResetError("the connection was reset")
+            write_frame(writer, {**header, "id": request_id}, payload)
+            await writer.drain()
+            response, body = await asyncio.wait_for(future, timeout=self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            logging.error(f"matcher sidecar {header.get('op')} request failed. Error: {e!r}")
+            await self._reset(writer)
+            raise ServiceUnavailableExeption(detail="matcher sidecar is unavailable")
+        finally:
+            self._pending.pop(request_id, None)
+
+        if "error" in response:
+            if response.get("status") == 503:
+                raise ServiceUnavailableExeption(detail=response["error"])
+            raise NEXTstepApiExeption(detail=response["error"], status_code=response.get("status", 500))
+        return response, body
+
+    def clear(self):
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._writer is not None:
+            self._writer.close()
+        self.executor.shutdown()
+
+    def __str__(self):
+        return f"MatcherClient({self.socket_path})"
+
+
+async def main() -> None:
+    matcher_model = await asyncio.to_thread(AsymmetricScholarshipMatcher)
+    await matcher_model.awarmup()
+    try:
+        await matcher_model.parse_pool.awarmup()
+    except Exception as e:
+        # encoding still works; uploads fail until the parse pool can start
+        logging.error(f"failed to start the CV parse pool. Error: {e}")
+    await MatcherServer(matcher_model).serve()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
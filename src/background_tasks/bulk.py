@@ -0,0 +1,26 @@
+import os
+import uuid
+from typing import Dict, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+
+from src.entities.scholarship_match import ScholarshipMatch
+
+# asyncpg allows 32767 bind parameters per statement; each row binds 5
+MATCH_INSERT_CHUNK_SIZE = int(os.getenv("MATCH_INSERT_CHUNK_SIZE", "5000"))
+
+async def upsert_matches(session: AsyncSession, rows: List[Dict]) -> int:
+  """
+  Write {user_id, scholarship_id, generation, match_persent} rows as multi-row INSERT ... VALUES
+  statements, bypassing the ORM unit of work. Conflicts on (user_id, scholarship_id, generation)
+  update the score, so re-running a match job is idempotent. The caller commits.
+  """
+  for start in range(0, len(rows), MATCH_INSERT_CHUNK_SIZE):
+    chunk = [{"id": uuid.uuid4(), **row} for row in rows[start:start + MATCH_INSERT_CHUNK_SIZE]]
+    statement = insert(ScholarshipMatch).values(chunk)
+    statement = statement.on_conflict_do_update(
+      constraint="uq_scholarship_matchs_user_scholarship_generation",
+      set_={"match_persent": statement.excluded.match_persent},
+    )
+    await session.execute(statement)
+  return len(rows)
@@ -0,0 +1,195 @@
+"""
+Durable match job queue backed by the `match_jobs` table.
+
+The API enqueues jobs in the same transaction as the change that caused them; worker
+processes (`python -m src.background_tasks.worker`) claim them with
+`FOR UPDATE SKIP LOCKED`, so any number of workers can poll the table without
+handing the same job out twice.
+"""
+import os
+import uuid
+import random
+from datetime import timedelta
+from typing import Dict, List
+from uuid import UUID
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, exists, func, and_, or_, text
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import insert
+
+from src.entities.match_job import MatchJob
+from src.database.core import utcnow
+
+load_dotenv()
+
+SCHOLARSHIP_FANOUT = "scholarship_fanout"
+USER_REMATCH = "user_rematch"
+
+MATCH_JOB_MAX_ATTEMPTS = int(os.getenv("MATCH_JOB_MAX_ATTEMPTS", "5"))
+MATCH_JOB_BACKOFF_SECONDS = float(os.getenv("MATCH_JOB_BACKOFF_SECONDS", "5"))
+MATCH_JOB_MAX_BACKOFF_SECONDS = float(os.getenv("MATCH_JOB_MAX_BACKOFF_SECONDS", "600"))
+# a running job whose worker died is handed out again after this long
+MATCH_JOB_TIMEOUT_SECONDS = float(os.getenv("MATCH_JOB_TIMEOUT_SECONDS", "1800"))
+MATCH_JOB_METRICS_WINDOW_SECONDS = float(os.getenv("MATCH_JOB_METRICS_WINDOW_SECONDS", "3600"))
+# scholarships created within this window are fanned out together in one pass over the users
+MATCH_FANOUT_WINDOW_SECONDS = float(os.getenv("MATCH_FANOUT_WINDOW_SECONDS", "10"))
+
+
+async def enqueue_job(session: AsyncSession, kind: str, payload: Dict, dedup_key: str | None = None) -> bool:
+  """
+  Add a job; with a `dedup_key`, an identical pending job absorbs this one.
+  Returns whether a row was inserted. The caller commits, so the job is only
+  visible to workers once the change that caused it is.
+  """
+  statement = insert(MatchJob).values(
+    id=uuid.uuid4(),
+    kind=kind,
+    payload=payload,
+    dedup_key=dedup_key,
+    max_attempts=MATCH_JOB_MAX_ATTEMPTS,
+  ).on_conflict_do_nothing(index_elements=["dedup_key"], index_where=text("status = 'pending'"))
+  result = await session.execute(statement)
+  return result.rowcount > 0
+
+async def enqueue_rematch(session: AsyncSession, user_id: UUID) -> bool:
+  """Pending rematches of the same user merge into one (the caller commits)"""
+  return await enqueue_job(session, USER_REMATCH, {"user_id": str(user_id)}, dedup_key=f"rematch:{user_id}")
+
+async def enqueue_scholarship_fanout(session: AsyncSession, scholarship_ids: List[UUID]) -> None:
+  """
+  Add scholarships to the pending fan-out job, creating one that starts after
+  MATCH_FANOUT_WINDOW_SECONDS if there is none. Later scholarships join the pending job
+  without pushing its start back, so the window bounds how late a fan-out runs.
+  The caller commits.
+  """
+  payload = {"scholarship_ids": [str(scholarship_id) for scholarship_id in scholarship_ids]}
+  statement = insert(MatchJob).values(
+    id=uuid.uuid4(),
+    kind=SCHOLARSHIP_FANOUT,
+    payload=payload,
+    dedup_key=SCHOLARSHIP_FANOUT,
+    max_attempts=MATCH_JOB_MAX_ATTEMPTS,
+    run_after=utcnow() + timedelta(seconds=MATCH_FANOUT_WINDOW_SECONDS),
+  )
+  statement = statement.on_conflict_do_update(
+    index_elements=["dedup_key"],
+    index_where=text("status = 'pending'"),
+    set_={"payload": func.jsonb_build_object(
+      "scholarship_ids",
+      MatchJob.payload["scholarship_ids"].op("||")(statement.excluded.payload["scholarship_ids"]),
+    )},
+  )
+  await session.execute(statement)
+
+async def claim_job(session: AsyncSession) -> MatchJob | None:
+  """
+  Mark the oldest runnable job as running and return it (commits).
+  Jobs sharing a dedup key run one at a time: a job waits while another with its key is running,
+  so a user's rematches and the scholarship fan-outs never overlap.
+  """
+  now = utcnow()
+  expired = now - timedelta(seconds=MATCH_JOB_TIMEOUT_SECONDS)
+  # a job whose worker died never reaches fail_job, so its attempt limit is enforced here
+  await session.execute(
+    update(MatchJob)
+    .where(MatchJob.status == "running", MatchJob.started_at < expired, MatchJob.attempts >= MatchJob.max_attempts)
+    .values(status="failed", finished_at=now, last_error="timed out")
+    .execution_options(synchronize_session=False)
+  )
+  runnable = or_(
+    and_(MatchJob.status == "pending", MatchJob.run_after <= now),
+    and_(MatchJob.status == "running", MatchJob.started_at < expired, MatchJob.attempts < MatchJob.max_attempts),
+  )
+  running = aliased(MatchJob)
+  busy = exists().where(
+    running.dedup_key == MatchJob.dedup_key,
+    running.id != MatchJob.id,
+    running.status == "running",
+    running.started_at >= expired,
+  )
+  candidate = (
+    select(MatchJob.id)
+    .where(runnable, ~busy)
+    .order_by(MatchJob.run_after)
+    .limit(1)
+    .with_for_update(skip_locked=True)
+    .scalar_subquery()
+  )
+  statement = (
+    update(MatchJob)
+    .where(MatchJob.id == candidate)
+    .values(status="running", attempts=MatchJob.attempts + 1, started_at=now)
+    .returning(MatchJob)
+    .execution_options(synchronize_session=False)
+  )
+  job = (await session.execute(statement)).scalar_one_or_none()
+  await session.commit()
+  return job
+
+async def complete_job(session: AsyncSession, job: MatchJob) -> None:
+  await session.execute(update(MatchJob).where(MatchJob.id == job.id).values(status="done", finished_at=utcnow(), last_error=None))
+  await session.commit()
+
+async def fail_job(session: AsyncSession, job: MatchJob, error: str) -> None:
+  """Schedule a retry with exponential backoff and jitter, or give up after `max_attempts`"""
+  now = utcnow()
+  values = dict(last_error=error[:4000])
+  if job.attempts >= job.max_attempts:
+    values.update(status="failed", finished_at=now)
+  elif job.dedup_key is not None and await _has_pending_duplicate(session, job):
+    # an identical job was queued meanwhile and will do the same work; fan-outs hand over their scholarships
+    if job.kind == SCHOLARSHIP_FANOUT:
+      await enqueue_scholarship_fanout(session, job.payload["scholarship_ids"])
+    values.update(status="merged", finished_at=now)
+  else:
+    delay = min(MATCH_JOB_MAX_BACKOFF_SECONDS, MATCH_JOB_BACKOFF_SECONDS * 2 ** (job.attempts - 1))
+    values.update(status="pending", run_after=now + timedelta(seconds=delay * random.uniform(0.5, 1.0)))
+  await session.execute(update(MatchJob).where(MatchJob.id == job.id).values(**values))
+  await session.commit()
+
+async def _has_pending_duplicate(session: AsyncSession, job: MatchJob) -> bool:
+  query = select(MatchJob.id).where(MatchJob.dedup_key == job.dedup_key, MatchJob.status == "pending", MatchJob.id != job.id)
+  return (await session.execute(query.limit(1))).first() is not None
+
+async def purge_finished_jobs(session: AsyncSession, older_than: timedelta) -> int:
+  """Delete done and merged jobs (failed ones are kept for inspection)"""
+  result = await session.execute(
+    delete(MatchJob).where(MatchJob.status.in_(("done", "merged")), MatchJob.finished_at < utcnow() - older_than)
+  )
+  await session.commit()
+  return result.rowcount
+
+async def queue_metrics(session: AsyncSession) -> Dict:
+  """Queue depth per status, age of the oldest pending job and wait/run latency of recently finished jobs"""
+  counts = dict((await session.execute(select(MatchJob.status, func.count()).group_by(MatchJob.status))).all())
+  oldest_pending = (await session.execute(select(func.min(MatchJob.created_at)).where(MatchJob.status == "pending"))).scalar()
+
+  wait = func.extract("epoch", MatchJob.started_at - MatchJob.created_at)
+  run = func.extract("epoch", MatchJob.finished_at - MatchJob.started_at)
+  recent = (await session.execute(
+    select(
+      func.count(),
+      func.percentile_cont(0.5).within_group(wait),
+      func.percentile_cont(0.95).within_group(wait),
+      func.percentile_cont(0.5).within_group(run),
+      func.percentile_cont(0.95).within_group(run),
+    ).where(MatchJob.status == "done", MatchJob.finished_at >= utcnow() - timedelta(seconds=MATCH_JOB_METRICS_WINDOW_SECONDS))
+  )).one()
+  completed, wait_p50, wait_p95, run_p50, run_p95 = recent
+
+  def seconds(value):
+    return round(float(value), 3) if value is not None else None
+
+  return {
+    "depth": counts.get("pending", 0),
+    "running": counts.get("running", 0),
+    "failed": counts.get("failed", 0),
+    "oldest_pending_age_s": seconds((utcnow() - oldest_pending).total_seconds()) if oldest_pending else None,
+    "window_s": MATCH_JOB_METRICS_WINDOW_SECONDS,
+    "completed": completed,
+    "wait_p50_s": seconds(wait_p50),
+    "wait_p95_s": seconds(wait_p95),
+    "run_p50_s": seconds(run_p50),
+    "run_p95_s": seconds(run_p95),
+  }
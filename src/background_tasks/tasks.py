@@ -1,36 +1,256 @@
+import asyncio
+import logging
+import os
+import numpy as np
+from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete, update, func, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import selectinload
 
 from src.entities.scholarship import Scholarship
 from src.entities.user import User
+from src.entities.cv import Cv
 from src.entities.scholarship_match import ScholarshipMatch
 from src.ai_models.model import AsymmetricScholarshipMatcher
-from src.utils.cv_statement import CvToStatement
+from src.ai_models.embeddings import load_scholarship_embeddings, load_cv_embeddings
+from src.ai_models.index import ScholarshipIndex, sync_scholarship_index
+from src.ai_models.eligibility import candidate_profile, scholarship_eligibility, eligibility_matrix, is_eligible
+from src.ai_models.lexical import LexicalIndex, blend, cv_query, hybrid_top_k, scholarship_text, sync_lexical_index
+from src.background_tasks.bulk import upsert_matches
+from src.sio.bus import publish
 
-async def match_user_scholarship(scholarship: Scholarship, matcher_model: AsymmetricScholarshipMatcher, session: AsyncSession) -> None:
+MATCH_THRESHOLD = 30.0
+# 0 keeps every scholarship above the threshold
+MATCH_TOP_K = int(os.getenv("MATCH_TOP_K", "0"))
+MATCH_FANOUT_CHUNK_SIZE = int(os.getenv("MATCH_FANOUT_CHUNK_SIZE", "1000"))
+# matches per Socket.IO `match_batch` event; small enough for a Postgres NOTIFY payload
+MATCH_EVENT_BATCH_SIZE = int(os.getenv("MATCH_EVENT_BATCH_SIZE", "25"))
+# users of a fan-out chunk whose match events are published at the same time
+MATCH_EVENT_PUBLISH_CONCURRENCY = int(os.getenv("MATCH_EVENT_PUBLISH_CONCURRENCY", "32"))
 
-  users = (await session.execute(select(User).options(selectinload(User.cv)))).scalars().all()
-  for user in users:
-    if user.cv is None:
-      continue
-    cv_steatement = CvToStatement(user.cv.__dict__).get_statement()
-    persent=matcher_model.calculate_match_persent(cv_steatement, scholarship.__dict__)
-    print(persent)
-    if persent <= 30.0:
-      continue
-    scholarship_match = ScholarshipMatch(user_id=user.id, scholarship_id=scholarship.id, match_persent=persent)
-    session.add(scholarship_match)
+async def match_new_scholarships(scholarships: List[Scholarship], matcher_model: AsymmetricScholarshipMatcher, session: AsyncSession, lexical_index: LexicalIndex | None = None) -> None:
+  """
+  Score a batch of new scholarships against every CV in one pass over the users, streaming CVs in
+  keyset-paginated chunks. Each chunk is read once and scored against all K scholarships with one
+  (chunk x dim) @ (dim x K) product, then committed on its own, so memory stays flat with the number
+  of users and finished chunks survive a crash. Keyset pages (rather than a server-side cursor) are
+  used because the per-chunk commits would close the cursor.
+  With a `lexical_index`, scores are blended with the BM25 scores of each CV against the new scholarships.
+  """
+  if not scholarships:
+    return
+  scholarship_ids = [scholarship.id for scholarship in scholarships]
+  rules = [scholarship_eligibility(scholarship) for scholarship in scholarships]
+  scholarship_embeddings = await load_scholarship_embeddings(scholarships, matcher_model)
+  await session.commit()
+  if lexical_index is not None:
+    lexical_index.add(scholarship_ids, [scholarship_text(scholarship.__dict__) for scholarship in scholarships])
+
+  last_cv_id = None
+  while True:
+    query = (
+      select(Cv, User.match_generation, User.pending_generation)
+      .join(User, User.id == Cv.user_id)
+      .order_by(Cv.id)
+      .limit(MATCH_FANOUT_CHUNK_SIZE)
+    )
+    if last_cv_id is not None:
+      query = query.where(Cv.id > last_cv_id)
+    chunk = (await session.execute(query)).all()
+    if not chunk:
+      break
+    cvs = [cv for cv, _, _ in chunk]
+    last_cv_id = cvs[-1].id
+
+    # only CVs eligible for at least one of the scholarships are encoded and scored
+    eligible = eligibility_matrix([candidate_profile(cv) for cv in cvs], rules)
+    survivors = np.flatnonzero(eligible.any(axis=1))
+    persents = np.zeros((0, len(scholarships)), dtype=np.float32)
+    if len(survivors):
+      cv_embeddings = await load_cv_embeddings([cvs[i] for i in survivors], matcher_model)
+      persents = await matcher_model.executor.run(matcher_model.score_embeddings, scholarship_embeddings.T, cv_embeddings)
+      if lexical_index is not None:
+        persents = await matcher_model.executor.run(_blend_lexical, persents, [cvs[i] for i in survivors], scholarship_ids, lexical_index)
+      persents = np.where(eligible[survivors], persents, 0)
+    rows = []
+    for row, column in np.argwhere(persents > MATCH_THRESHOLD):
+      cv, match_generation, pending_generation = chunk[survivors[row]]
+      persent = float(persents[row, column])
+      # users with a recompute in flight get the match in the staged set too, so the swap does not lose it
+      for generation in {match_generation, pending_generation} - {None}:
+        rows.append({"user_id": cv.user_id, "scholarship_id": scholarship_ids[column], "generation": generation, "match_persent": persent})
+    await upsert_matches(session, rows)
+    await session.commit()
+    await _publish_fanout_matches(rows, chunk)
+    # drop the chunk from the identity map so memory does not grow with the user table
+    for cv in cvs:
+      session.expunge(cv)
+
+async def match_user_scholarships(user: User, matcher_model: AsymmetricScholarshipMatcher, scholarship_index: ScholarshipIndex, session: AsyncSession, lexical_index: LexicalIndex | None = None) -> None:
+  """
+  Rematch one user incrementally. `user.matched_at` is the newest scholarship change the last run
+  covered and `user.matched_cv_at` the CV version it used: only scholarships changed since the
+  watermark are scored, and a full recompute happens only when the CV itself changed.
+  Progress and match batches are pushed to the user's Socket.IO room as they are produced.
+  With a `lexical_index`, match persents blend embedding and BM25 scores (see `src/ai_models/lexical.py`).
+  """
+  await _publish_progress(user.id, user.match_generation, 0)
+  watermark = (await session.execute(select(func.max(Scholarship.updated_at)))).scalar()
+  cv_embedding = (await load_cv_embeddings([user.cv], matcher_model))[0]
+
+  if user.matched_at is None or user.matched_cv_at is None or user.cv.updated_at > user.matched_cv_at:
+    count = await _recompute_matches(user, cv_embedding, matcher_model, scholarship_index, session, lexical_index)
+    changed = []
+  else:
+    changed = await _score_changed_scholarships(user, cv_embedding, matcher_model, scholarship_index, session, lexical_index)
+    await upsert_matches(session, changed)
+    count = len(changed)
+
+  user.matched_at = watermark or user.matched_at
+  user.matched_cv_at = user.cv.updated_at
+  await session.commit()
+  await _publish_matches(user.id, user.match_generation, changed)
+  await _publish_progress(user.id, user.match_generation, 100, count=count)
+
+async def _recompute_matches(user: User, cv_embedding, matcher_model: AsymmetricScholarshipMatcher, scholarship_index: ScholarshipIndex, session: AsyncSession, lexical_index: LexicalIndex | None = None) -> int:
+  """
+  Build the full match set in a staging generation while readers keep the live one (flagged stale),
+  then swap generations. The swap is left for the caller's commit, so it lands atomically.
+  Staged matches are pushed to the client (tagged with the new generation) before the swap.
+  """
+  user_id = user.id
+  generation = user.match_generation + 1
+  # rows left behind by a crashed recompute of the same generation must not leak into the new set
+  await session.execute(delete(ScholarshipMatch).where(ScholarshipMatch.user_id == user_id, ScholarshipMatch.generation == generation))
+  user.pending_generation = generation
   await session.commit()
 
-async def match_user_scholarships(user: User, matcher_model: AsymmetricScholarshipMatcher, session: AsyncSession) -> None:
-  cv_steatement = CvToStatement(user.cv.__dict__).get_statement()
-  scholarships = (await session.execute(select(Scholarship))).scalars().all()
-  for scholarship in scholarships:
-    persent = matcher_model.calculate_match_persent(cv_steatement, scholarship.__dict__)
-    print(persent)
-    if persent <= 30.0:
+  try:
+    rows = await _score_all_scholarships(user, cv_embedding, generation, matcher_model, scholarship_index, session, lexical_index)
+    await _publish_progress(user_id, generation, 50)
+    await upsert_matches(session, rows)
+    await session.commit()
+    await _publish_matches(user_id, generation, rows, stale=True, progress=(50, 95))
+
+    await session.execute(delete(ScholarshipMatch).where(ScholarshipMatch.user_id == user_id, ScholarshipMatch.generation != generation))
+    user.match_generation = generation
+    user.pending_generation = None
+    return len(rows)
+  except Exception:
+    try:
+      await _abandon_generation(session, user_id, generation)
+    except Exception as e:
+      # the next rematch clears the staged generation anyway; keep the original error
+      logging.error(f"could not drop staged generation {generation} of user ID: {user_id}. Error: {e}")
+    raise
+
+async def _abandon_generation(session: AsyncSession, user_id, generation: int) -> None:
+  """
+  Drop a failed recompute's staged rows and clear `pending_generation`, so readers stop seeing the
+  live set as stale and fan-outs stop writing into the staged one. The caller re-raises, so the
+  queue still retries the rematch.
+  """
+  await session.rollback()
+  await session.execute(delete(ScholarshipMatch).where(ScholarshipMatch.user_id == user_id, ScholarshipMatch.generation == generation))
+  await session.execute(
+    update(User)
+    .where(User.id == user_id, User.pending_generation == generation)
+    .values(pending_generation=None)
+    .execution_options(synchronize_session=False)
+  )
+  await session.commit()
+
+async def _score_all_scholarships(user: User, cv_embedding, generation: int, matcher_model: AsymmetricScholarshipMatcher, scholarship_index: ScholarshipIndex, session: AsyncSession, lexical_index: LexicalIndex | None = None) -> List[dict]:
+  await sync_scholarship_index(scholarship_index, session, matcher_model)
+  top_k = MATCH_TOP_K or len(scholarship_index)
+  candidate = candidate_profile(user.cv)
+  if lexical_index is None:
+    winners = await matcher_model.executor.run(scholarship_index.top_k, cv_embedding, top_k, min_score=MATCH_THRESHOLD / 100, candidate=candidate)
+  else:
+    await sync_lexical_index(lexical_index, session)
+    query = cv_query(user.cv.__dict__)
+    winners = await matcher_model.executor.run(hybrid_top_k, scholarship_index, lexical_index, cv_embedding, query, top_k, MATCH_THRESHOLD / 100, candidate)
+  rows = []
+  for scholarship_id, score in winners:
+    persent = round(score * 100, 2)
+    if persent <= MATCH_THRESHOLD:
+      continue
+    rows.append({"user_id": user.id, "scholarship_id": scholarship_id, "generation": generation, "match_persent": persent})
+  return rows
+
+async def _score_changed_scholarships(user: User, cv_embedding, matcher_model: AsymmetricScholarshipMatcher, scholarship_index: ScholarshipIndex, session: AsyncSession, lexical_index: LexicalIndex | None = None) -> List[dict]:
+  """Score only the scholarships changed after the user's watermark and refresh them in the index"""
+  query = select(Scholarship).options(selectinload(Scholarship.embedding)).where(Scholarship.updated_at > user.matched_at)
+  scholarships = (await session.execute(query)).scalars().all()
+  if not scholarships:
+    return []
+  rules = [scholarship_eligibility(scholarship) for scholarship in scholarships]
+  vectors = await load_scholarship_embeddings(scholarships, matcher_model)
+  scholarship_index.add([scholarship.id for scholarship in scholarships], vectors, rules)
+  persents = await matcher_model.executor.run(matcher_model.score_embeddings, cv_embedding, vectors)
+  if lexical_index is not None:
+    scholarship_ids = [scholarship.id for scholarship in scholarships]
+    lexical_index.add(scholarship_ids, [scholarship_text(scholarship.__dict__) for scholarship in scholarships])
+    persents = (await matcher_model.executor.run(_blend_lexical, persents.reshape(1, -1), [user.cv], scholarship_ids, lexical_index))[0]
+
+  candidate = candidate_profile(user.cv)
+  rows, dropped = [], []
+  for scholarship, rule, persent in zip(scholarships, rules, persents):
+    persent = float(persent)
+    if persent <= MATCH_THRESHOLD or not is_eligible(candidate, rule):
+      dropped.append(scholarship.id)
       continue
-    scholarship_match = ScholarshipMatch(user_id=user.id, scholarship_id=scholarship.id, match_persent=persent)
-    session.add(scholarship_match)
-  await session.commit()
\ No newline at end of file
+    rows.append({"user_id": user.id, "scholarship_id": scholarship.id, "generation": user.match_generation, "match_persent": persent})
+  if dropped:
+    await session.execute(delete(ScholarshipMatch).where(
+      ScholarshipMatch.user_id == user.id,
+      ScholarshipMatch.generation == user.match_generation,
+      # one array parameter: an IN list binds one parameter per id and overflows asyncpg's limit
+      ScholarshipMatch.scholarship_id == any_(bindparam("dropped_ids", dropped, type_=ARRAY(UUID(as_uuid=True)))),
+    ))
+  return rows
+
+def _blend_lexical(persents: np.ndarray, cvs: List[Cv], scholarship_ids: list, lexical_index: LexicalIndex) -> np.ndarray:
+  """Blend an (N CVs x K scholarships) matrix of match persents with the CVs' BM25 scores against those scholarships"""
+  lexical = np.zeros_like(persents)
+  for row, cv in enumerate(cvs):
+    scores = lexical_index.scores(cv_query(cv.__dict__), scholarship_ids)
+    for column, scholarship_id in enumerate(scholarship_ids):
+      lexical[row, column] = scores.get(scholarship_id, 0.0)
+  return np.round(blend(persents, lexical * 100), 2).astype(np.float32)
+
+async def _publish_progress(user_id, generation: int, percent: int, count: int | None = None) -> None:
+  data = {"generation": generation, "percent": percent, "done": percent >= 100}
+  if count is not None:
+    data["count"] = count
+  await publish(user_id, "match_progress", data)
+
+async def _publish_matches(user_id, generation: int, rows: List[dict], stale: bool = False, progress: tuple | None = None) -> None:
+  """Push rows as `match_batch` events (best first); with `progress` (start, end) percentages, report progress per batch"""
+  for start in range(0, len(rows), MATCH_EVENT_BATCH_SIZE):
+    batch = rows[start:start + MATCH_EVENT_BATCH_SIZE]
+    await publish(user_id, "match_batch", {
+      "generation": generation,
+      "stale": stale,
+      "matches": [{"scholarship_id": row["scholarship_id"], "match_persent": row["match_persent"]} for row in batch],
+    })
+    if progress is not None:
+      low, high = progress
+      await _publish_progress(user_id, generation, low + (high - low) * (start + len(batch)) // len(rows))
+
+async def _publish_fanout_matches(rows: List[dict], chunk) -> None:
+  """New scholarships matched in a fan-out chunk, pushed to each user's live generation"""
+  live = {cv.user_id: match_generation for cv, match_generation, _ in chunk}
+  by_user = {}
+  for row in rows:
+    if row["generation"] == live[row["user_id"]]:
+      by_user.setdefault(row["user_id"], []).append(row)
+  # concurrently, so a chunk waits on the slowest users' deliveries rather than on the sum of them
+  slots = asyncio.Semaphore(MATCH_EVENT_PUBLISH_CONCURRENCY)
+
+  async def publish_user(user_id, user_rows: List[dict]) -> None:
+    async with slots:
+      await _publish_matches(user_id, live[user_id], user_rows)
+
+  await asyncio.gather(*(publish_user(user_id, user_rows) for user_id, user_rows in by_user.items()))
@@ -0,0 +1,129 @@
+"""
+Match job worker. Runs outside the API processes so matching neither competes with HTTP
+traffic nor dies with a request worker:
+
+    python -m src.background_tasks.worker
+
+Each job gets its own session. `MATCH_WORKER_CONCURRENCY` caps the jobs a worker runs at once;
+start more workers to scale out, since jobs are claimed with SKIP LOCKED.
+"""
+import asyncio
+import logging
+import os
+import signal
+import time
+import uuid
+from datetime import timedelta
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from src.database.core import async_session_meker
+from src.entities.scholarship import Scholarship
+from src.entities.match_job import MatchJob
+from src.exceptions.exceptions import NotFoundExeption
+from src.users.services import get_user
+from src.dependencies import dependencies
+from src.background_tasks.tasks import match_new_scholarships, match_user_scholarships
+from src.background_tasks.queue import SCHOLARSHIP_FANOUT, USER_REMATCH, claim_job, complete_job, fail_job, purge_finished_jobs
+
+load_dotenv()
+
+MATCH_WORKER_CONCURRENCY = int(os.getenv("MATCH_WORKER_CONCURRENCY", "2"))
+MATCH_WORKER_POLL_SECONDS = float(os.getenv("MATCH_WORKER_POLL_SECONDS", "1"))
+MATCH_JOB_RETENTION_HOURS = float(os.getenv("MATCH_JOB_RETENTION_HOURS", "24"))
+PURGE_INTERVAL_SECONDS = 3600
+
+
+async def run_job(job: MatchJob) -> None:
+  matcher_model = dependencies.get_matcher()
+  async with async_session_meker() as session:
+    if job.kind == SCHOLARSHIP_FANOUT:
+      scholarship_ids = list(dict.fromkeys(uuid.UUID(scholarship_id) for scholarship_id in job.payload["scholarship_ids"]))
+      query = select(Scholarship).options(selectinload(Scholarship.embedding)).where(Scholarship.id.in_(scholarship_ids))
+      # scholarships deleted before the job ran simply drop out
+      scholarships = (await session.execute(query)).scalars().all()
+      await match_new_scholarships(scholarships, matcher_model, session, dependencies.get_lexical_index())
+    elif job.kind == USER_REMATCH:
+      try:
+        user = await get_user(session, uuid.UUID(job.payload["user_id"]))
+      except NotFoundExeption:
+        return
+      if user.cv is None:
+        return
+      await dependencies.train_scholarship_index()
+      await match_user_scholarships(user, matcher_model, dependencies.get_scholarship_index(), session, dependencies.get_lexical_index())
+    else:
+      raise ValueError(f"unknown match job kind {job.kind!r}")
+
+async def process(job: MatchJob) -> None:
+  started = time.perf_counter()
+  try:
+    await run_job(job)
+  except Exception as e:
+    logging.error(f"match job {job.id} ({job.kind}) failed on attempt {job.attempts}. Error: {e}")
+    await _record_outcome(job, fail_job, repr(e))
+    return
+  if await _record_outcome(job, complete_job):
+    logging.info(f"match job {job.id} ({job.kind}) done in {time.perf_counter() - started:.2f}s")
+
+async def _record_outcome(job: MatchJob, finish, *args) -> bool:
+  """Store a job's outcome with `complete_job` or `fail_job`; a job whose outcome is lost stays claimed until its lease expires"""
+  try:
+    async with async_session_meker() as session:
+      await finish(session, job, *args)
+    return True
+  except Exception as e:
+    logging.error(f"failed to record the outcome of match job {job.id} ({job.kind}). Error: {e}")
+    return False
+
+async def serve(stopping: asyncio.Event) -> None:
+  slots = asyncio.Semaphore(MATCH_WORKER_CONCURRENCY)
+  running = set()
+  last_purge = 0.0
+  while not stopping.is_set():
+    await slots.acquire()
+    try:
+      async with async_session_meker() as session:
+        if time.monotonic() - last_purge > PURGE_INTERVAL_SECONDS:
+          await purge_finished_jobs(session, timedelta(hours=MATCH_JOB_RETENTION_HOURS))
+          last_purge = time.monotonic()
+        job = await claim_job(session)
+    except Exception as e:
+      logging.error(f"failed to poll the match job queue. Error: {e}")
+      job = None
+    if job is None:
+      slots.release()
+      try:
+        await asyncio.wait_for(stopping.wait(), timeout=MATCH_WORKER_POLL_SECONDS)
+      except asyncio.TimeoutError:
+        pass
+      continue
+    task = asyncio.create_task(process(job))
+    running.add(task)
+    task.add_done_callback(running.discard)
+    task.add_done_callback(lambda _: slots.release())
+  # let claimed jobs finish; anything cut short is reclaimed after MATCH_JOB_TIMEOUT_SECONDS
+  if running:
+    await asyncio.wait(running)
+
+async def main() -> None:
+  await dependencies.load_matcher()
+  status = dependencies.matcher_status()
+  if status["status"] != "ready":
+    raise SystemExit(f"matcher is {status['status']}, not starting the worker")
+  logging.info(f"match worker ready: {status}")
+
+  stopping = asyncio.Event()
+  loop = asyncio.get_running_loop()
+  for sig in (signal.SIGINT, signal.SIGTERM):
+    loop.add_signal_handler(sig, stopping.set)
+  try:
+    await serve(stopping)
+  finally:
+    dependencies.get_matcher().clear()
+
+
+if __name__ == "__main__":
+  logging.basicConfig(level=logging.INFO)
+  asyncio.run(main())
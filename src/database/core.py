@@ -5,6 +5,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from collections.abc import AsyncGenerator
 
 import os
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -23,6 +24,11 @@ async_session_meker = async_sessionmaker(async_engine, expire_on_commit=False)
 Base = declarative_base()
 
 
+def utcnow() -> datetime:
+    """Python-side timestamp default, so new values are known without a refresh after flush"""
+    return datetime.now(timezone.utc)
+
+
 async def get_async_session()-> AsyncGenerator[AsyncSession, None]:
     async with async_session_meker() as session:
         yield session
@@ -1,22 +1,184 @@
-from fastapi import HTTPException, Depends
+from fastapi import Depends
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+import asyncio
+import logging
+import os
+from dotenv import load_dotenv
 
 from ..ai_models.model import AsymmetricScholarshipMatcher
+from ..ai_models.index import ScholarshipIndex, sync_scholarship_index
+from ..ai_models.ann_index import IVFScholarshipIndex
+from ..ai_models.lexical import LexicalIndex, hybrid_enabled, sync_lexical_index
+from ..ai_models.sidecar import MATCHER_MODE, MatcherClient
+from ..database.core import async_session_meker
+from ..exceptions.exceptions import ServiceUnavailableExeption
+
+load_dotenv()
+
+# "exact" scans every scholarship vector, "ivf" is the approximate index for very large catalogues
+SCHOLARSHIP_INDEX_BACKEND = os.getenv("SCHOLARSHIP_INDEX_BACKEND", "exact")
+IVF_INDEX_PATH = os.getenv("IVF_INDEX_PATH", "data/scholarship_ivf.npz")
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0")) or None
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+# scholarships needed to train the IVF index; a smaller catalogue is served by the exact index until it grows
+IVF_MIN_TRAINING_SIZE = int(os.getenv("IVF_MIN_TRAINING_SIZE", "1000"))
+# run the match job worker inside the API process (single node; pairs with the in-process Socket.IO bus)
+MATCH_WORKER_EMBEDDED = os.getenv("MATCH_WORKER_EMBEDDED", "false").lower() == "true"
 
 _matcher_model: AsymmetricScholarshipMatcher | None = None
+_scholarship_index: ScholarshipIndex | IVFScholarshipIndex | None = None
+_lexical_index: LexicalIndex | None = None
+_matcher_status: str = "loading"
+_training_ivf: bool = False
+
+async def load_scholarship_index(matcher_model: AsymmetricScholarshipMatcher) -> ScholarshipIndex | IVFScholarshipIndex:
+    async with async_session_meker() as session:
+        if SCHOLARSHIP_INDEX_BACKEND == "ivf" and os.path.exists(IVF_INDEX_PATH):
+            index = await asyncio.to_thread(IVFScholarshipIndex.load, IVF_INDEX_PATH, nprobe=IVF_NPROBE)
+            await sync_scholarship_index(index, session, matcher_model)
+        else:
+            index = ScholarshipIndex()
+            await sync_scholarship_index(index, session, matcher_model)
+            if SCHOLARSHIP_INDEX_BACKEND == "ivf" and len(index) >= IVF_MIN_TRAINING_SIZE:
+                index = await asyncio.to_thread(IVFScholarshipIndex.from_index, index, nlist=IVF_NLIST, nprobe=IVF_NPROBE)
+                await asyncio.to_thread(index.save, IVF_INDEX_PATH)
+            elif SCHOLARSHIP_INDEX_BACKEND == "ivf":
+                logging.warning(f"{len(index)} scholarships are too few to train the IVF index (IVF_MIN_TRAINING_SIZE={IVF_MIN_TRAINING_SIZE}), using the exact index until the catalogue grows")
+        await session.commit()
+    return index
+
+async def train_scholarship_index() -> None:
+    """
+    Swap the exact index an "ivf" backend fell back to at startup for a trained IVF index once the
+    catalogue reaches IVF_MIN_TRAINING_SIZE. Called before rematches; the next index sync adds
+    whatever changed while it trained.
+    """
+    global _scholarship_index, _training_ivf
+    index = _scholarship_index
+    if SCHOLARSHIP_INDEX_BACKEND != "ivf" or _training_ivf or not isinstance(index, ScholarshipIndex) or len(index) < IVF_MIN_TRAINING_SIZE:
+        return
+    _training_ivf = True
+    try:
+        trained = await asyncio.to_thread(IVFScholarshipIndex.from_index, index, nlist=IVF_NLIST, nprobe=IVF_NPROBE)
+        await asyncio.to_thread(trained.save, IVF_INDEX_PATH)
+        _scholarship_index = trained
+        logging.info(f"trained {trained}")
+    except Exception as e:
+        logging.error(f"failed to train the IVF index, staying on the exact index. Error: {e}")
+    finally:
+        _training_ivf = False
+
+async def load_matcher(parse_cvs: bool = False, match_jobs: bool = True) -> None:
+    """
+    Load and warm the model off the event loop (or reach the sidecar), then build the scholarship index.
+    With `parse_cvs` (API processes) the CV parse pool is started too, unless the sidecar parses.
+    The scholarship and lexical indexes are only read by match jobs, so they are built only with `match_jobs`.
+    """
+    global _matcher_model, _scholarship_index, _matcher_status
+    if MATCHER_MODE == "sidecar":
+        matcher = MatcherClient()
+        # the sidecar may still be starting; stay "loading" until it answers
+        while True:
+            try:
+                await matcher.awarmup()
+                break
+            except Exception as e:
+                logging.warning(f"waiting for the matcher sidecar. Error: {e}")
+                await asyncio.sleep(2)
+    else:
+        try:
+            matcher = await asyncio.to_thread(AsymmetricScholarshipMatcher)
+            await matcher.awarmup()
+        except Exception as e:
+            logging.error(f"failed to load the matcher model. Error: {e}")
+            _matcher_status = "failed"
+            return
+        if parse_cvs:
+            try:
+                await matcher.parse_pool.awarmup()
+            except Exception as e:
+                # matching works without it; uploads fail until the pool can start
+                logging.error(f"failed to start the CV parse pool. Error: {e}")
+
+    # like the lexical index, only match jobs read the scholarship index; API processes without
+    # the embedded worker skip it rather than each keeping (and backfilling, and training) a copy
+    index = None
+    if match_jobs:
+        try:
+            index = await load_scholarship_index(matcher)
+            logging.info(f"loaded {index}")
+        except Exception as e:
+            # the index is synced again before every match run, so a cold start is recoverable
+            logging.error(f"failed to load the scholarship index at startup. Error: {e}")
+            index = ScholarshipIndex()
+    lexical_index = LexicalIndex() if match_jobs and hybrid_enabled() else None
+    if lexical_index is not None:
+        try:
+            async with async_session_meker() as session:
+                await sync_lexical_index(lexical_index, session)
+            logging.info(f"loaded {lexical_index}")
+        except Exception as e:
+            logging.error(f"failed to load the lexical index at startup. Error: {e}")
+    _matcher_model, _scholarship_index, _lexical_index = matcher, index, lexical_index
+    _matcher_status = "ready"
+
+async def run_embedded_worker(loading: asyncio.Task, stopping: asyncio.Event) -> None:
+    from ..background_tasks.worker import serve
+    try:
+        await loading
+    except asyncio.CancelledError:
+        return
+    if _matcher_status == "ready":
+        await serve(stopping)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global _matcher_model
-    _matcher_model = AsymmetricScholarshipMatcher()
+    # the app serves (and reports not-ready) while the model loads in the background
+    loading = asyncio.create_task(load_matcher(parse_cvs=True, match_jobs=MATCH_WORKER_EMBEDDED))
+    stopping = asyncio.Event()
+    worker = asyncio.create_task(run_embedded_worker(loading, stopping)) if MATCH_WORKER_EMBEDDED else None
     yield
-    _matcher_model.clear()
+    stopping.set()
+    loading.cancel()
+    if worker is not None:
+        await worker
+    if isinstance(_scholarship_index, IVFScholarshipIndex):
+        await asyncio.to_thread(_scholarship_index.save, IVF_INDEX_PATH)
+    if _scholarship_index is not None:
+        _scholarship_index.clear()
+    if _lexical_index is not None:
+        _lexical_index.clear()
+    if _matcher_model is not None:
+        _matcher_model.clear()
+
 
+def matcher_status() -> dict:
+    return {
+        "status": _matcher_status,
+        "model": _matcher_model.model_name if _matcher_model else None,
+        "indexed_scholarships": len(_scholarship_index) if _scholarship_index is not None else 0,
+    }
 
 def get_matcher():
   if _matcher_model is None:
-    raise HTTPException(status_code=404, detail="Model not found")
+    raise ServiceUnavailableExeption(detail=f"matcher is {_matcher_status}")
+  return _matcher_model
+
+def get_optional_matcher() -> AsymmetricScholarshipMatcher | None:
+  """The matcher, or None while it loads (for endpoints that can do without it)"""
   return _matcher_model
 
-matcher_model: AsymmetricScholarshipMatcher = Depends(get_matcher)
\ No newline at end of file
+def get_scholarship_index() -> ScholarshipIndex | IVFScholarshipIndex | None:
+  """The scholarship vector index, or None once loaded in a process that runs no match jobs"""
+  if _scholarship_index is None and _matcher_status != "ready":
+    raise ServiceUnavailableExeption(detail=f"scholarship index is {_matcher_status}")
+  return _scholarship_index
+
+def get_lexical_index() -> LexicalIndex | None:
+  """The BM25 index used for hybrid scoring, or None when HYBRID_LEXICAL_WEIGHT is 0 or this process runs no match jobs"""
+  return _lexical_index
+
+matcher_model: AsymmetricScholarshipMatcher = Depends(get_matcher)
+optional_matcher_model: AsymmetricScholarshipMatcher | None = Depends(get_optional_matcher)
+scholarship_index: ScholarshipIndex = Depends(get_scholarship_index)
@@ -1,9 +1,10 @@
-from ..database.core import Base
+from ..database.core import Base, utcnow
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import ForeignKey, String, LargeBinary, DateTime, func
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
+from datetime import datetime
 
 class Cv(Base):
   __tablename__ = "cv"
@@ -21,3 +22,10 @@ class Cv(Base):
   nationality: Mapped[str] = mapped_column(String, nullable=True)
   gender: Mapped[str] = mapped_column(String, nullable=True)
   date_of_birth: Mapped[str] = mapped_column(String, nullable=True)
+  # bumped explicitly on content changes; embedding backfills must not count as a CV edit
+  updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now())
+
+  embedding: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
+  embedding_model: Mapped[str] = mapped_column(String(255), nullable=True)
+  embedding_hash: Mapped[str] = mapped_column(String(64), nullable=True)
+  embedding_dtype: Mapped[str] = mapped_column(String(16), nullable=True)
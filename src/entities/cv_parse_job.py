@@ -0,0 +1,23 @@
+from sqlalchemy import ForeignKey, String, Text, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+from ..database.core import Base, utcnow
+
+
+class CvParseJob(Base):
+  __tablename__ = "cv_parse_jobs"
+  id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+  user_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+  # pending -> running -> done | failed
+  status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending", server_default="pending")
+  error: Mapped[str] = mapped_column(Text, nullable=True)
+  # the cv row written when parsing finished
+  cv_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("cv.id", ondelete="SET NULL"), nullable=True)
+
+  created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now())
+  started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+  finished_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,31 @@
+from sqlalchemy import String, Integer, Text, DateTime, Index, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from datetime import datetime
+import uuid
+
+from ..database.core import Base, utcnow
+
+
+class MatchJob(Base):
+  __tablename__ = "match_jobs"
+  __table_args__ = (
+    # at most one pending job per dedup key; running and finished jobs do not block a new one
+    Index("uq_match_jobs_pending_dedup_key", "dedup_key", unique=True, postgresql_where=text("status = 'pending'")),
+    Index("ix_match_jobs_status_run_after", "status", "run_after"),
+  )
+  id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+  kind: Mapped[str] = mapped_column(String(32), nullable=False)
+  payload: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+  dedup_key: Mapped[str] = mapped_column(String(255), nullable=True)
+
+  # pending -> running -> done | failed; "merged" when a retry found an identical pending job
+  status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending", server_default="pending")
+  attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+  max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=5, server_default="5")
+  last_error: Mapped[str] = mapped_column(Text, nullable=True)
+
+  created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now())
+  run_after: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now())
+  started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+  finished_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -1,9 +1,11 @@
-from sqlalchemy import String, Text, ARRAY, Boolean
+from sqlalchemy import String, Text, ARRAY, Boolean, DateTime, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
+from datetime import datetime
 
-from ..database.core import Base
+from ..database.core import Base, utcnow
+from .scholarship_embedding import ScholarshipEmbedding
 
 class Scholarship(Base):
     __tablename__ = 'scholarships'
@@ -17,5 +19,7 @@ class Scholarship(Base):
     requirements: Mapped[str] = mapped_column(Text, nullable=True)
     country: Mapped[str] = mapped_column(String(100), nullable=True)
     is_fully_funded: Mapped[bool] = mapped_column(Boolean, default=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow, server_default=func.now(), index=True)
 
-    scholarship_matches: Mapped[list["ScholarshipMatch"]] = relationship(back_populates="scholarship")
\ No newline at end of file
+    scholarship_matches: Mapped[list["ScholarshipMatch"]] = relationship(back_populates="scholarship")
+    embedding: Mapped["ScholarshipEmbedding"] = relationship(back_populates="scholarship", uselist=False, cascade="all, delete-orphan")
\ No newline at end of file
@@ -0,0 +1,17 @@
+from sqlalchemy import ForeignKey, String, Integer, LargeBinary
+from sqlalchemy.orm import relationship, Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+
+from ..database.core import Base
+
+
+class ScholarshipEmbedding(Base):
+  __tablename__ = "scholarship_embeddings"
+  scholarship_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("scholarships.id", ondelete="CASCADE"), primary_key=True)
+  scholarship: Mapped["Scholarship"] = relationship(back_populates="embedding")
+
+  model_name: Mapped[str] = mapped_column(String(255), nullable=False)
+  text_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+  dimension: Mapped[int] = mapped_column(Integer, nullable=False)
+  dtype: Mapped[str] = mapped_column(String(16), nullable=False, default="float32", server_default="float32")
+  vector: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
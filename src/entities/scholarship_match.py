@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, Float
+from sqlalchemy import ForeignKey, Float, Integer, UniqueConstraint
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -8,8 +8,11 @@ from ..database.core import Base
 
 class ScholarshipMatch(Base):
   __tablename__ = "scholarship_matchs"
+  __table_args__ = (UniqueConstraint("user_id", "scholarship_id", "generation", name="uq_scholarship_matchs_user_scholarship_generation"),)
   id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
   match_persent: Mapped[float] = mapped_column(Float, nullable=False)
+  # rows of users.match_generation are live; a full recompute stages users.pending_generation
+  generation: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
   user_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
   user: Mapped["User"] = relationship(back_populates="scholarship_matches")
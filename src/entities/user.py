@@ -1,7 +1,8 @@
-from sqlalchemy import String, Enum as SQLEnum
+from sqlalchemy import String, Integer, Enum as SQLEnum, DateTime
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 import uuid
+from datetime import datetime
 
 from ..database.core import Base
 from ..shared.enums import UserRole
@@ -21,6 +22,12 @@ class User(Base):
     hashed_password: Mapped[str] = mapped_column(String, nullable=False)
     role: Mapped[str] = mapped_column(SQLEnum(UserRole), nullable=False, default=UserRole.user)
     profile_image: Mapped[str] = mapped_column(String, nullable=True)
+    # watermarks of the last match run: newest scholarship change and the CV version it covered
+    matched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    matched_cv_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    # generation of scholarship_matchs rows readers see, and the one being staged by a running recompute
+    match_generation: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    pending_generation: Mapped[int] = mapped_column(Integer, nullable=True)
 
 
     skills = relationship("Skill", secondary="users_skills", back_populates="users")
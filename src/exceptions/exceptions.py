@@ -19,4 +19,7 @@ class NotAuthenticated(NEXTstepApiExeption):
 
 class NotAuthorizedException(NEXTstepApiExeption):
     def __init__(self):
-        super().__init__(detail="Not Authorized", status_code=status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+        super().__init__(detail="Not Authorized", status_code=status.HTTP_401_UNAUTHORIZED)
+class ServiceUnavailableExeption(NEXTstepApiExeption):
+    def __init__(self, detail: str | None = None):
+        super().__init__(detail=detail or "Service Unavailable", status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from ..dependencies.dependencies import matcher_status
+from ..database.core import session_dep
+from ..background_tasks.queue import queue_metrics
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"]
+)
+
+@router.get("/live")
+async def liveness():
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def readiness():
+    matcher = matcher_status()
+    status_code = status.HTTP_200_OK if matcher["status"] == "ready" else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(status_code=status_code, content=matcher)
+
+@router.get("/queue")
+async def match_queue(session: session_dep):
+    return await queue_metrics(session)
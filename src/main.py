@@ -2,9 +2,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
-# import socketio
+import socketio
 
-# from .sio.event_handlers import sio
+from .sio.event_handlers import sio
 from .exceptions import register_app_exceptions
 from .api import register_routers
 from .logging import config_level, LogLevels
@@ -37,4 +37,4 @@ app.mount("/api/v1/static", StaticFiles(directory="public/images"), name="static
 register_routers(app)
 register_app_exceptions(app)
 
-# app = socketio.ASGIApp(socketio_server=sio, other_asgi_app=app)
\ No newline at end of file
+app = socketio.ASGIApp(socketio_server=sio, other_asgi_app=app)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Query, status, BackgroundTasks
+from fastapi import APIRouter, Query, status
 from uuid import UUID
 
 from ..database.core import session_dep
@@ -6,8 +6,9 @@ from .model import ScholarshipListResponse, ScholarshipOneResponse, ScholarshipC
 from ..auth.services import current_user
 from ..shared.model import Parameters
 from .services import get_all_scholarships, get_one_scholarship, create_new_scholarship, get_users_matched_scholarships, rematch
-from ..dependencies.dependencies import matcher_model
+from ..dependencies.dependencies import matcher_model, scholarship_index
 from ..ai_models.model import AsymmetricScholarshipMatcher
+from ..ai_models.index import ScholarshipIndex
 
 router = APIRouter(
     prefix="/scholarship",
@@ -21,18 +22,18 @@ async def get_scholarships(session: session_dep, params: Parameters = Query()):
     return {"count": len(results), "results": results}
 
 @router.post("", status_code=status.HTTP_201_CREATED)
-async def create_scholarship(current_user: current_user, sesssion: session_dep, scholarship_data: ScholarshipCreate, background_tasks: BackgroundTasks, matcher_model: AsymmetricScholarshipMatcher = matcher_model):
-    await create_new_scholarship(current_user, sesssion, scholarship_data, background_tasks, matcher_model)
+async def create_scholarship(current_user: current_user, sesssion: session_dep, scholarship_data: ScholarshipCreate, matcher_model: AsymmetricScholarshipMatcher = matcher_model, scholarship_index: ScholarshipIndex = scholarship_index):
+    await create_new_scholarship(current_user, sesssion, scholarship_data, matcher_model, scholarship_index)
     return None
 
 @router.get("/matched-scholarships", response_model=MatchedScholarshipListResponse)
 async def get_scholarship_matches(current_user: current_user, session: session_dep) -> MatchedScholarshipListResponse:
-    matches = await get_users_matched_scholarships(current_user.get_uuid(), session)
-    return {"count": len(matches), "results": matches}
+    matches, generation, stale = await get_users_matched_scholarships(current_user.get_uuid(), session)
+    return {"count": len(matches), "generation": generation, "stale": stale, "results": matches}
 
 @router.post("/rematch", status_code=status.HTTP_201_CREATED)
-async def rematch_scholarship(current_user: current_user, session: session_dep, background_tasks:BackgroundTasks, matcher_model: AsymmetricScholarshipMatcher = matcher_model) -> None:
-    await rematch(current_user.get_uuid(), session, matcher_model, background_tasks)
+async def rematch_scholarship(current_user: current_user, session: session_dep) -> None:
+    await rematch(current_user.get_uuid(), session)
     return None
 
 @router.get("/{id}", response_model=ScholarshipOneResponse)
@@ -42,6 +42,9 @@ class ScholarshipListResponse(BaseModel):
 class MatchedScholarshipListResponse(BaseModel):
     status: str = "success"
     count: int
+    # generation being served; stale while a rematch is computing the next one
+    generation: int = 0
+    stale: bool = False
     results: list[ScholarshipMatches]
 
 class ScholarshipOneResponse(BaseModel):
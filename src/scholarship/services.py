@@ -1,6 +1,5 @@
-from fastapi import BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, delete
+from sqlalchemy import select, desc
 from sqlalchemy.orm import selectinload
 from uuid import UUID
 
@@ -10,9 +9,13 @@ from src.shared.model import Parameters
 from src.auth.models import TokenData
 from src.entities.scholarship import Scholarship
 from src.entities.scholarship_match import ScholarshipMatch
+from src.entities.user import User
 from src.scholarship.model import ScholarshipCreate
 from src.ai_models.model import AsymmetricScholarshipMatcher
-from src.background_tasks.tasks import match_user_scholarship, match_user_scholarships
+from src.ai_models.embeddings import embed_scholarship
+from src.ai_models.index import ScholarshipIndex
+from src.ai_models.eligibility import scholarship_eligibility
+from src.background_tasks.queue import enqueue_rematch, enqueue_scholarship_fanout
 
 async def get_all_scholarships(session: AsyncSession, params: Parameters):
     query = select(Scholarship).limit(params.limit).offset(params.offset)
@@ -27,27 +30,37 @@ async def get_one_scholarship(id: UUID, session: AsyncSession):
         raise NotFoundExeption(name=f"scholarship with id {id}")
     return result
 
-async def create_new_scholarship(current_user: TokenData,session: AsyncSession, scholarahip_data: ScholarshipCreate, background_tasks: BackgroundTasks,matcher_model: AsymmetricScholarshipMatcher):
+async def create_new_scholarship(current_user: TokenData,session: AsyncSession, scholarahip_data: ScholarshipCreate, matcher_model: AsymmetricScholarshipMatcher, scholarship_index: ScholarshipIndex | None):
     new_scholarship = Scholarship(**scholarahip_data.model_dump())
+    vector = await embed_scholarship(new_scholarship, matcher_model)
     user = await get_user(session, current_user.get_uuid())
-    background_tasks.add_task(match_user_scholarship, new_scholarship, matcher_model, session)
     session.add(new_scholarship)
+    await session.flush()
+    # committed together with the scholarship, so the fan-out cannot be lost or run before it exists
+    await enqueue_scholarship_fanout(session, [new_scholarship.id])
     await session.commit()
+    # API processes without the embedded worker keep no index; the worker's sync picks the scholarship up
+    if scholarship_index is not None:
+        scholarship_index.add([new_scholarship.id], vector, [scholarship_eligibility(new_scholarship)])
 
 async def get_users_matched_scholarships(user_id: UUID, session: AsyncSession):
+    """The live generation of the user's matches; `stale` is set while a recompute is staging the next one"""
+    generations = (await session.execute(select(User.match_generation, User.pending_generation).where(User.id == user_id))).one_or_none()
+    if generations is None:
+        raise NotFoundExeption(name="user")
+    generation, pending_generation = generations
     query =  (
     select(ScholarshipMatch)
     .options(selectinload(ScholarshipMatch.scholarship))
-    .where(ScholarshipMatch.user_id == user_id)
+    .where(ScholarshipMatch.user_id == user_id, ScholarshipMatch.generation == generation)
     .order_by(desc(ScholarshipMatch.match_persent))
     )
     matches = (await session.execute(query)).scalars().all()
-    return matches
+    return matches, generation, pending_generation is not None
 
-async def rematch(user_id: UUID, session: AsyncSession, matcher_model: AsymmetricScholarshipMatcher, background_tasks: BackgroundTasks):
-    delete_query = delete(ScholarshipMatch).where(ScholarshipMatch.user_id == user_id)
-    await session.execute(delete_query)
-    await session.commit()
+async def rematch(user_id: UUID, session: AsyncSession):
     user = await get_user(session, user_id)
-    background_tasks.add_task(match_user_scholarships, user, matcher_model, session)
-    return
\ No newline at end of file
+    if user.cv is None:
+        raise NotFoundExeption(name="cv")
+    await enqueue_rematch(session, user_id)
+    await session.commit()
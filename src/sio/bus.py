@@ -0,0 +1,160 @@
+"""
+Message bus carrying match events to Socket.IO clients.
+
+The Socket.IO server lives in the API processes, while matching usually runs in
+`python -m src.background_tasks.worker`. `SOCKETIO_MESSAGE_QUEUE` selects how events cross
+that gap (and fan out between several API workers):
+
+    ""                      in-process only; events reach clients when matching runs inside the
+                            API process (single node, MATCH_WORKER_EMBEDDED=true)
+    postgres                LISTEN/NOTIFY on the application database
+    redis://... / amqp://   python-socketio's Redis or AMQP managers
+"""
+import abc
+import asyncio
+import json
+import logging
+import os
+from typing import Any, AsyncGenerator, Dict
+from uuid import UUID
+import asyncpg
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+from dotenv import load_dotenv
+
+from ..database.core import DATABASE_URL
+
+load_dotenv()
+
+SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
+SOCKETIO_CHANNEL = os.getenv("SOCKETIO_CHANNEL", "socketio")
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+NOTIFY_MAX_BYTES = 7999
+# an idle LISTEN connection is pinged this often, since a connection the network dropped may never report it
+LISTEN_PING_SECONDS = 30
+
+
+def user_room(user_id: UUID | str) -> str:
+    return f"user:{user_id}"
+
+
+class PostgresManager(AsyncPubSubManager):
+    """Socket.IO client manager that shares events between processes through Postgres LISTEN/NOTIFY"""
+
+    name = "postgres"
+
+    def __init__(self, dsn: str, channel: str = SOCKETIO_CHANNEL, write_only: bool = False, logger=None, json=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.dsn = dsn
+        self._connection: asyncpg.Connection | None = None
+        self._publishing = asyncio.Lock()
+
+    async def _publish(self, data: Dict) -> None:
+        payload = self.json.dumps(data)
+        if len(payload.encode("utf-8")) > NOTIFY_MAX_BYTES:
+            self._get_logger().error(f"dropping a {data.get('event')} event larger than the NOTIFY limit")
+            return
+        async with self._publishing:
+            if self._connection is None or self._connection.is_closed():
+                self._connection = await asyncpg.connect(self.dsn)
+            await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def _listen(self) -> AsyncGenerator[str, None]:
+        while True:
+            # one queue per connection, so the close of an old one cannot end the next; None marks
+            # a lost connection and events sent while reconnecting are lost (publishing is best effort)
+            messages: asyncio.Queue = asyncio.Queue()
+            connection = await self._connect_listener(messages)
+            try:
+                while True:
+                    try:
+                        message = await asyncio.wait_for(messages.get(), LISTEN_PING_SECONDS)
+                    except asyncio.TimeoutError:
+                        await asyncio.wait_for(connection.execute("SELECT 1"), LISTEN_PING_SECONDS)
+                        continue
+                    if message is None:
+                        break
+                    yield message
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                self._get_logger().error(f"listen connection on {self.channel} failed. Error: {e}")
+            finally:
+                connection.terminate()
+            self._get_logger().error(f"lost the listen connection on {self.channel}, reconnecting")
+
+    async def _connect_listener(self, messages: asyncio.Queue) -> asyncpg.Connection:
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                connection.add_termination_listener(lambda _: messages.put_nowait(None))
+                await connection.add_listener(self.channel, lambda *args: messages.put_nowait(args[-1]))
+                return connection
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                self._get_logger().error(f"cannot listen on {self.channel}, retrying. Error: {e}")
+                await asyncio.sleep(2)
+
+
+def create_client_manager(write_only: bool = False) -> socketio.AsyncManager | None:
+    """Client manager for SOCKETIO_MESSAGE_QUEUE; None keeps python-socketio's in-process manager"""
+    url = SOCKETIO_MESSAGE_QUEUE
+    if not url:
+        return None
+    if url == "postgres":
+        return PostgresManager(DATABASE_URL.replace("+asyncpg", ""), write_only=write_only)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return socketio.AsyncRedisManager(url, channel=SOCKETIO_CHANNEL, write_only=write_only)
+    if url.startswith(("amqp://", "amqps://")):
+        return socketio.AsyncAioPikaManager(url, channel=SOCKETIO_CHANNEL, write_only=write_only)
+    raise ValueError(f"unsupported SOCKETIO_MESSAGE_QUEUE {url!r}")
+
+
+class MessageBus(abc.ABC):
+    @abc.abstractmethod
+    async def publish(self, user_id: UUID, event: str, data: Any) -> None:
+        ...
+
+class InProcessBus(MessageBus):
+    """Emits through the Socket.IO server running in this process (its client manager handles other API workers)"""
+
+    def __init__(self, server: socketio.AsyncServer):
+        self.server = server
+
+    async def publish(self, user_id: UUID, event: str, data: Any) -> None:
+        await self.server.emit(event, data, to=user_room(user_id))
+
+class ManagerBus(MessageBus):
+    """Emits from a process without a Socket.IO server (the match worker) through a write-only client manager"""
+
+    def __init__(self, manager: socketio.AsyncManager):
+        self.manager = manager
+
+    async def publish(self, user_id: UUID, event: str, data: Any) -> None:
+        await self.manager.emit(event, data, to=user_room(user_id))
+
+class NullBus(MessageBus):
+    async def publish(self, user_id: UUID, event: str, data: Any) -> None:
+        return None
+
+
+_bus: MessageBus | None = None
+
+def configure_bus(bus: MessageBus) -> None:
+    global _bus
+    _bus = bus
+
+def get_bus() -> MessageBus:
+    global _bus
+    if _bus is None:
+        manager = create_client_manager(write_only=True)
+        if manager is None:
+            logging.warning("no Socket.IO server in this process and SOCKETIO_MESSAGE_QUEUE is unset; match events are dropped")
+            _bus = NullBus()
+        else:
+            _bus = ManagerBus(manager)
+    return _bus
+
+async def publish(user_id: UUID, event: str, data: Any) -> None:
+    """Best effort: a lost event only means the client falls back to GET /matched-scholarships"""
+    try:
+        await get_bus().publish(user_id, event, json.loads(json.dumps(data, default=str)))
+    except Exception as e:
+        logging.error(f"failed to publish {event} to user {user_id}. Error: {e}")
@@ -1,34 +1,39 @@
 import socketio
+import logging
 from ..auth.services import varify_token
+from .bus import InProcessBus, configure_bus, create_client_manager, user_room
 
 sio = socketio.AsyncServer(
     async_mode='asgi',
-    cors_allowed_origins="*"  # mirror CORS policy
+    cors_allowed_origins="*",  # mirror CORS policy
+    client_manager=create_client_manager(),
 )
 
+# match events produced in this process go straight through this server
+configure_bus(InProcessBus(sio))
+
 @sio.event
 async def connect(sid, environ, auth):
     """
     Handle a new client connection. Perform simple token-based auth.
     The `auth` argument contains the handshake auth data from the client.
     Raise ConnectionRefusedError to reject the connection if authentication fails.
+    Authenticated clients join their user room, where match progress and results are pushed.
     """
     try:
-        token = auth.get('token')
-        token_data = varify_token(token)
-        print(f"Client connected: {sid}")
-    except ConnectionRefusedError as e:
-        await sio.disconnect(sid=sid)
-    except Exception as e:
-        await sio.disconnect(sid=sid)
-    # except 
+        token_data = varify_token((auth or {}).get('token'))
+    except Exception:
+        raise ConnectionRefusedError("authentication failed")
+    if token_data.get_uuid() is None:
+        raise ConnectionRefusedError("authentication failed")
+    await sio.enter_room(sid, user_room(token_data.get_uuid()))
+    logging.info(f"Client connected: {sid}")
 
 @sio.event
-async def disconnect(sid):
+async def disconnect(sid, reason=None):
     """Handle client disconnect."""
-    print(f"Client disconnected: {sid}")
+    logging.info(f"Client disconnected: {sid}")
 
 @sio.event
 async def test(sid, data):
     await sio.emit('test', data)
-
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Form, File, UploadFile
+from fastapi import APIRouter, Form, File, UploadFile, BackgroundTasks
+from uuid import UUID
 from typing import Annotated
 
 from ..auth.services import current_user
-from .model import UserResponseWithCv, UserUpdate, PasswordResetModel, CvUpdate
+from .model import UserResponseWithCv, UserUpdate, PasswordResetModel, CvUpdate, CvParseJobResponse
 from ..entities.user import User
-from .services import (get_user, update_user, change_password, update_user_details, get_user_with_matched_scholarships, pasrse_upload_cv, update_user_cv, get_cv)
+from ..entities.cv_parse_job import CvParseJob
+from .services import (get_user, update_user, change_password, update_user_details, get_user_with_matched_scholarships, pasrse_upload_cv, update_user_cv, get_cv, get_cv_parse_job)
 from ..database.core import session_dep
+from ..dependencies.dependencies import matcher_model, optional_matcher_model
+from ..ai_models.model import AsymmetricScholarshipMatcher
 
 router = APIRouter(
     prefix="/users",
@@ -34,11 +38,14 @@ async def update_user_current_details(*, current_user: current_user, skills: Ann
 
 # Cv Controllers
 @router.patch("/me/cv", status_code=201)
-async def update_cv(*, current_user: current_user, cv: CvUpdate, session: session_dep) -> None:
-    await update_user_cv(session, current_user.get_uuid(), cv)
+async def update_cv(*, current_user: current_user, cv: CvUpdate, session: session_dep, matcher_model: AsymmetricScholarshipMatcher | None = optional_matcher_model) -> None:
+    await update_user_cv(session, current_user.get_uuid(), cv, matcher_model)
     return None
 
-@router.post("/me/upload-cv", status_code=201)
-async def upload_cv(*, current_user: current_user, cv: get_cv, session: session_dep) -> None:
-    await pasrse_upload_cv(session, current_user.get_uuid(), cv)
-    return None
\ No newline at end of file
+@router.post("/me/upload-cv", status_code=202, response_model=CvParseJobResponse)
+async def upload_cv(*, background_tasks: BackgroundTasks, current_user: current_user, cv: get_cv, session: session_dep, matcher_model: AsymmetricScholarshipMatcher = matcher_model) -> CvParseJob:
+    return await pasrse_upload_cv(background_tasks, session, current_user.get_uuid(), cv, matcher_model)
+
+@router.get("/me/cv-parse-jobs/{job_id}", response_model=CvParseJobResponse)
+async def get_cv_parse_job_status(job_id: UUID, current_user: current_user, session: session_dep) -> CvParseJob:
+    return await get_cv_parse_job(session, current_user.get_uuid(), job_id)
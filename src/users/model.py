@@ -2,6 +2,7 @@ from pydantic import BaseModel
 from uuid import UUID
 from fastapi import Form
 from typing import Annotated
+from datetime import datetime
 
 from ..shared.enums import UserRole
 
@@ -45,3 +46,12 @@ class PasswordResetModel(BaseModel):
     old_password: str
     new_password: str
     confirm_password: str
+
+class CvParseJobResponse(BaseModel):
+    id: UUID
+    status: str
+    error: str | None = None
+    cv_id: UUID | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
@@ -1,23 +1,32 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update
 from sqlalchemy.orm import selectinload
-from sqlalchemy.exc import IntegrityError
 from uuid import UUID
-from fastapi import HTTPException, UploadFile, Depends, File
+from fastapi import HTTPException, UploadFile, Depends, File, BackgroundTasks
 from typing import Annotated
 import json
+import os
+from datetime import timedelta
+from dotenv import load_dotenv
 
 from .model import PasswordResetModel, UserUpdate, CvUpdate
 from ..entities.user import User
 from ..entities.skill import Skill
 from ..entities.cv import Cv
+from ..entities.cv_parse_job import CvParseJob
 from ..entities.scholarship_match import ScholarshipMatch
 from ..auth.services import varify_password, get_password_hash
 import logging
 from ..exceptions.exceptions import NotFoundExeption, NEXTstepApiExeption
 
-from ..utils.cv_parser import CvParser
-from ..utils.cv_statement import CvToStatement
+from ..ai_models.model import AsymmetricScholarshipMatcher
+from ..ai_models.embeddings import embed_cv
+from ..database.core import utcnow, async_session_meker
+
+load_dotenv()
+
+# a parse job still pending or running after this long was lost with its process
+CV_PARSE_JOB_TIMEOUT_SECONDS = int(os.getenv("CV_PARSE_JOB_TIMEOUT_SECONDS", "600"))
 
 async def get_user(session: AsyncSession, user_id: str) -> User:
     query = select(User).options(selectinload(User.skills)).options(selectinload(User.cv)).where(User.id == user_id)
@@ -115,7 +124,7 @@ async def add_get_skills(session: AsyncSession, skills: list[str]) -> list[Skill
         logging.error(f"error during the update of user ID detailes: Error: {e}")
         raise HTTPException(status_code=500, detail="internal server error")
     
-async def update_user_cv(session: AsyncSession, user_id: UUID, cv: CvUpdate) -> None:
+async def update_user_cv(session: AsyncSession, user_id: UUID, cv: CvUpdate, matcher_model: AsymmetricScholarshipMatcher | None) -> None:
     try:
         user = await get_user(session, user_id)
         if not user.cv:
@@ -123,6 +132,14 @@ async def update_user_cv(session: AsyncSession, user_id: UUID, cv: CvUpdate) ->
         cv_update_data = cv.model_dump(exclude_unset=True)
         for key, value in cv_update_data.items():
             setattr(user.cv, key, value)
+        user.cv.updated_at = utcnow()
+        # the edit is saved regardless of the embedding: a vector left stale (or a matcher still
+        # loading) is re-encoded by hash at the next match
+        if matcher_model is not None:
+            try:
+                await embed_cv(user.cv, matcher_model, fail_fast=False)
+            except Exception as e:
+                logging.warning(f"could not re-embed the cv of user ID: {user_id}, keeping the stale vector. Error: {e}")
         session.add(user.cv)
         await session.commit()
     except NEXTstepApiExeption:
@@ -131,23 +148,89 @@ async def update_user_cv(session: AsyncSession, user_id: UUID, cv: CvUpdate) ->
         logging.error(f"error during the update of user ID detailes: Error: {e}")
         raise HTTPException(status_code=500, detail="internal server error")
     
-async def pasrse_upload_cv(session: AsyncSession, user_id: UUID, cv: UploadFile) -> None:
+async def pasrse_upload_cv(background_tasks: BackgroundTasks, session: AsyncSession, user_id: UUID, cv: UploadFile, matcher_model: AsymmetricScholarshipMatcher) -> CvParseJob:
+    # turn the upload away before reading it when the parse queue is already full
+    parse_pool = getattr(matcher_model, "parse_pool", None)
+    if parse_pool is not None:
+        parse_pool.ensure_capacity()
     try:
-        user = await get_user(session, user_id)
-        if user.cv:
-            query = delete(Cv).where(Cv.id == user.cv.id)
-            await session.execute(query)
+        await get_user(session, user_id)
+        cv_bytes = await cv.read()
+        job = CvParseJob(user_id=user_id)
+        session.add(job)
+        await session.commit()
+    except NEXTstepApiExeption:
+        raise
+    except Exception as e:
+        await session.rollback()
+        logging.error(f"error creating a cv parse job for user ID: {user_id}. Error: {e}")
+        raise HTTPException(status_code=500, detail="internal server error")
+
+    background_tasks.add_task(run_cv_parse_job, job.id, user_id, cv_bytes, matcher_model)
+    logging.info(f"queued cv parse job {job.id} for user ID: {user_id}")
+    return job
+
+async def run_cv_parse_job(job_id: UUID, user_id: UUID, cv_bytes: bytes, matcher_model: AsymmetricScholarshipMatcher) -> None:
+    """Parses and stores an uploaded cv after the upload request has returned"""
+    async with async_session_meker() as session:
+        # every transition is conditional, so a job the status endpoint already timed out stays failed
+        if not await _transition_cv_parse_job(session, job_id, "pending", status="running", started_at=utcnow()):
             await session.commit()
+            logging.warning(f"cv parse job {job_id} is no longer pending, skipping it")
+            return
+        await session.commit()
+        try:
+            result = await matcher_model.aparse_cv(cv_bytes)
+            result.update({"skills": json.dumps(result.get("skills"))})
+            new_cv = Cv(**result, user_id=user_id)
+            try:
+                await embed_cv(new_cv, matcher_model, fail_fast=False)
+            except Exception as e:
+                # the cv is still saved without a vector; matching encodes missing vectors
+                logging.warning(f"could not embed the cv of parse job {job_id}, saving it without a vector. Error: {e}")
 
-        cv_parser = CvParser(cv.file)
-        result = cv_parser.get_result()
-        result.update({"skills": json.dumps(result.get("skills"))})
-        cv = Cv(**result, user_id=user_id)
-        session.add(cv)
+            # the old cv is only replaced once the new one parsed
+            await session.execute(delete(Cv).where(Cv.user_id == user_id))
+            session.add(new_cv)
+            await session.flush()
+            if not await _transition_cv_parse_job(session, job_id, "running", status="done", cv_id=new_cv.id, finished_at=utcnow()):
+                # reported as failed meanwhile; keep the previous cv so the outcome matches the status
+                await session.rollback()
+                logging.warning(f"cv parse job {job_id} timed out before it finished, discarding its cv")
+                return
+            await session.commit()
+            logging.info(f"cv parse job {job_id} finished for user ID: {user_id}")
+        except Exception as e:
+            await session.rollback()
+            logging.error(f"cv parse job {job_id} failed for user ID: {user_id}. Error: {e}")
+            error = getattr(e, "detail", None) or str(e) or type(e).__name__
+            await _transition_cv_parse_job(session, job_id, "running", status="failed", error=error, finished_at=utcnow())
+            await session.commit()
+
+async def _transition_cv_parse_job(session: AsyncSession, job_id: UUID, from_status: str, **values) -> bool:
+    """Update a parse job only while it is still in `from_status` (the caller commits)"""
+    statement = (
+        update(CvParseJob)
+        .where(CvParseJob.id == job_id, CvParseJob.status == from_status)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return (await session.execute(statement)).rowcount > 0
+
+async def get_cv_parse_job(session: AsyncSession, user_id: UUID, job_id: UUID) -> CvParseJob:
+    job = await session.get(CvParseJob, job_id)
+    if job is None or job.user_id != user_id:
+        raise NotFoundExeption(name="cv parse job")
+    # background tasks die with the process that ran them; do not leave such jobs pending forever.
+    # A running job is timed from when parsing started, a pending one (not picked up yet) from its upload
+    timeout = timedelta(seconds=CV_PARSE_JOB_TIMEOUT_SECONDS)
+    since = job.started_at if job.status == "running" else job.created_at
+    if job.status in ("pending", "running") and utcnow() - since > timeout:
+        await _transition_cv_parse_job(session, job_id, job.status, status="failed", error="interrupted", finished_at=utcnow())
         await session.commit()
-    except IntegrityError as e:
-        logging.error(f"error during the update of user ID detailes: Error: {e}")
-        raise HTTPException(status_code=500, detail="internal server error")
+        # either timed out now or finished meanwhile
+        await session.refresh(job)
+    return job
     
     
 def validate_cv(cv: UploadFile = File(...)):
@@ -1,8 +1,7 @@
 import pdfplumber
-import spacy
 import re
 
-nlp = spacy.load("en_core_web_sm")
+from src.utils.nlp import get_nlp
 
 def extract_text_from_pdf(pdf_path):
     text = ""
@@ -91,7 +90,7 @@ def extract_major(doc, majors):
 
 if __name__ == "__main__":
     cv = extract_text_from_pdf("file.pdf")
-    doc = nlp(cv)
+    doc = get_nlp()(cv)
 
     skills = ["python", "java", "c++", "machine learning", "deep learning", "data science", "nlp", "sql", "aws", "azure", "tensorflow", "keras", "reactjs"]
     majors = ["Computer Science and Engineering", "Information Technology", "Software Engineering", "Data Science", "Artificial Intelligence", "Natural Language Processing"]
@@ -182,17 +181,17 @@ if __name__ == "__main__":
 #     return None
 
 # def extract_major(doc, majors):
-    major_tokens = {tuple(major.lower().split()): major for major in majors}
-    found_majors = set()
+#     major_tokens = {tuple(major.lower().split()): major for major in majors}
+#     found_majors = set()
     
-    # Lowercase all input tokens for case-insensitive comparison
-    tokens = [token.text.lower() for token in doc]
-
-    # Iterate through tokens using a sliding window
-    for i in range(len(tokens)):
-        for length in range(2, 5):  # Handle 2+ word majors
-            phrase = tuple(tokens[i:i+length])
-            if phrase in major_tokens:
-                found_majors.add(major_tokens[phrase])
+#     # Lowercase all input tokens for case-insensitive comparison
+#     tokens = [token.text.lower() for token in doc]
+
+#     # Iterate through tokens using a sliding window
+#     for i in range(len(tokens)):
+#         for length in range(2, 5):  # Handle 2+ word majors
+#             phrase = tuple(tokens[i:i+length])
+#             if phrase in major_tokens:
+#                 found_majors.add(major_tokens[phrase])
     
-    return list(found_majors)
\ No newline at end of file
+#     return list(found_majors)
\ No newline at end of file
@@ -0,0 +1,249 @@
+"""
+Bulk import of CV PDFs, for onboarding many users at once instead of one upload each.
+
+    python -m src.utils.cv_import SOURCE [--checkpoint FILE] [--workers N] [--n-process N]
+                                         [--batch-size N] [--chunk-size N] [--embed] [--rematch]
+
+SOURCE is a directory of `<user_id>.pdf` files or a CSV manifest with `user_id` and `path`
+columns (relative paths are resolved against the manifest's directory); a user listed twice
+keeps the last row. CVs go through in chunks: text is extracted by `--workers` processes, run
+through spaCy with `nlp.pipe` (`--batch-size`, `--n-process`), parsed by the same extractors as
+an upload and bulk-inserted, replacing any existing CV of the user. Each committed chunk is
+appended to the checkpoint file, so an interrupted import picks up after the last committed
+chunk; CVs that failed are retried.
+
+Without `--embed` the CV vectors are left empty and computed by the next matching run; with it,
+spaCy runs in this process only (`--n-process` is ignored). `--rematch` queues a rematch for
+every imported user.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Set, Tuple
+from uuid import UUID
+from sqlalchemy import select, delete, insert
+
+from src.background_tasks.queue import enqueue_rematch
+from src.database.core import async_session_meker
+from src.entities.cv import Cv
+from src.entities.user import User
+# registers the mappers the User relationships refer to; nothing else imports them in this CLI
+from src.entities.scholarship import Scholarship  # noqa: F401
+from src.utils.cv_parser import parse_cv_doc
+from src.utils.pdf_text import extract_text
+from src.utils.cv_statement import CvToStatement
+from src.utils.nlp import get_nlp
+from src.utils.taxonomy import refresh_taxonomy
+
+DEFAULT_CHECKPOINT = "cv_import.checkpoint"
+
+
+def read_source(source: str) -> List[Tuple[str, str]]:
+    """
+    (user_id, pdf path) pairs of a directory or a CSV manifest, one per user: a user listed more
+    than once keeps the last row, since a second row in the same chunk would insert a second CV
+    """
+    if os.path.isdir(source):
+        names = sorted(name for name in os.listdir(source) if name.lower().endswith(".pdf"))
+        rows = [(os.path.splitext(name)[0], os.path.join(source, name)) for name in names]
+    else:
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, newline="") as manifest:
+            rows = [(row["user_id"].strip(), os.path.join(base, row["path"].strip())) for row in csv.DictReader(manifest)]
+
+    by_user = {}
+    for user_id, path in rows:
+        # canonical form, so differently cased spellings of one id count as the same user
+        user_id = str(_uuid(user_id) or user_id)
+        by_user.pop(user_id, None)
+        by_user[user_id] = path
+    if len(by_user) < len(rows):
+        logging.warning(f"{len(rows) - len(by_user)} duplicate user ids in {source}, keeping the last row of each")
+    return list(by_user.items())
+
+def read_checkpoint(path: str) -> Set[str]:
+    """User ids whose CVs were already imported"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as checkpoint:
+        for line in checkpoint:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # a line cut short by a crash
+                continue
+            if entry.get("status") == "done":
+                done.add(entry["user_id"])
+    return done
+
+def write_checkpoint(path: str, entries: List[Dict]) -> None:
+    with open(path, "a") as checkpoint:
+        for entry in entries:
+            checkpoint.write(json.dumps(entry) + "\n")
+        checkpoint.flush()
+        os.fsync(checkpoint.fileno())
+
+def _uuid(value: str) -> UUID | None:
+    try:
+        return UUID(value)
+    except ValueError:
+        return None
+
+
+class CvImporter:
+    def __init__(self, checkpoint: str = DEFAULT_CHECKPOINT, workers: int = os.cpu_count() or 1, n_process: int = 2,
+                 batch_size: int = 64, chunk_size: int = 512, embed: bool = False, rematch: bool = False):
+        self.checkpoint = checkpoint
+        self.workers = workers
+        # spaCy forks its n_process workers; forking after torch has loaded the model can deadlock them
+        self.n_process = 1 if embed else n_process
+        if embed and n_process > 1:
+            logging.warning("--embed loads the model in this process, running spaCy with n_process=1")
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.rematch = rematch
+        self.matcher = None
+        if embed:
+            # imported here, so extraction workers (which re-import this module) do not load the model stack
+            from src.ai_models.model import AsymmetricScholarshipMatcher
+            self.matcher = AsymmetricScholarshipMatcher()
+        self.stats = {"imported": 0, "failed": 0, "skipped": 0, "extract_s": 0.0, "nlp_s": 0.0, "embed_s": 0.0, "db_s": 0.0}
+
+    async def run(self, items: List[Tuple[str, str]]) -> Dict:
+        done = read_checkpoint(self.checkpoint)
+        pending = [(user_id, path) for user_id, path in items if user_id not in done]
+        self.stats["skipped"] = len(items) - len(pending)
+        logging.info(f"importing {len(pending)} CVs ({self.stats['skipped']} already in {self.checkpoint})")
+
+        async with async_session_meker() as session:
+            await refresh_taxonomy(session, force=True)
+
+        started = time.perf_counter()
+        # spawned, like the upload parse pool, so workers do not inherit the database connections
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for offset in range(0, len(pending), self.chunk_size):
+                await self._import_chunk(pending[offset:offset + self.chunk_size], pool)
+                elapsed = time.perf_counter() - started
+                processed = self.stats["imported"] + self.stats["failed"]
+                logging.info(f"{processed}/{len(pending)} CVs, {processed / elapsed:.1f} docs/sec")
+
+        seconds = time.perf_counter() - started
+        report = {key: round(value, 2) if isinstance(value, float) else value for key, value in self.stats.items()}
+        report["seconds"] = round(seconds, 2)
+        report["docs_per_sec"] = round((self.stats["imported"] + self.stats["failed"]) / seconds, 2) if seconds else 0.0
+        return report
+
+    async def _import_chunk(self, chunk: List[Tuple[str, str]], pool: ProcessPoolExecutor) -> None:
+        entries = []
+        valid = []
+        for user_id, path in chunk:
+            if _uuid(user_id) is None:
+                entries.append({"user_id": user_id, "path": path, "status": "failed", "error": "invalid user id"})
+            else:
+                valid.append((user_id, path))
+
+        async with async_session_meker() as session:
+            await refresh_taxonomy(session)
+            ids = [_uuid(user_id) for user_id, _ in valid]
+            known = set((await session.execute(select(User.id).where(User.id.in_(ids)))).scalars()) if ids else set()
+        parsable = []
+        for user_id, path in valid:
+            if _uuid(user_id) in known:
+                parsable.append((user_id, path))
+            else:
+                entries.append({"user_id": user_id, "path": path, "status": "failed", "error": "unknown user"})
+
+        started = time.perf_counter()
+        futures = [pool.submit(extract_text, path) for _, path in parsable]
+        texts = []
+        for (user_id, path), future in zip(parsable, futures):
+            try:
+                texts.append((user_id, path, future.result()))
+            except Exception as e:
+                entries.append({"user_id": user_id, "path": path, "status": "failed", "error": f"{type(e).__name__}: {e}"})
+        self.stats["extract_s"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        # consumed in full: an unfinished `nlp.pipe` generator leaves its worker processes waiting
+        docs = list(get_nlp().pipe((text for _, _, text in texts), batch_size=self.batch_size, n_process=self.n_process))
+        rows, imported = [], []
+        for (user_id, path, text), doc in zip(texts, docs):
+            try:
+                result = parse_cv_doc(text, doc)
+            except Exception as e:
+                entries.append({"user_id": user_id, "path": path, "status": "failed", "error": f"{type(e).__name__}: {e}"})
+                continue
+            result.update({"skills": json.dumps(result.get("skills")), "user_id": _uuid(user_id)})
+            rows.append(result)
+            imported.append({"user_id": user_id, "path": path, "status": "done"})
+        self.stats["nlp_s"] += time.perf_counter() - started
+
+        if self.matcher is not None and rows:
+            from src.ai_models.embeddings import set_cv_embedding
+            started = time.perf_counter()
+            statements = [CvToStatement(row).get_statement() for row in rows]
+            vectors = await self.matcher.executor.run(self.matcher.encode_texts, statements)
+            for row, statement, vector in zip(rows, statements, vectors):
+                cv = Cv(**row)
+                set_cv_embedding(cv, statement, vector, self.matcher)
+                row.update(embedding=cv.embedding, embedding_dtype=cv.embedding_dtype, embedding_model=cv.embedding_model, embedding_hash=cv.embedding_hash)
+            self.stats["embed_s"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        if rows:
+            async with async_session_meker() as session:
+                user_ids = [row["user_id"] for row in rows]
+                # an import replaces the user's CV, like an upload does
+                await session.execute(delete(Cv).where(Cv.user_id.in_(user_ids)))
+                await session.execute(insert(Cv), rows)
+                if self.rematch:
+                    for user_id in user_ids:
+                        await enqueue_rematch(session, user_id)
+                await session.commit()
+        self.stats["db_s"] += time.perf_counter() - started
+
+        entries.extend(imported)
+        # checkpointed only after the commit, so a crash re-imports at most this chunk
+        write_checkpoint(self.checkpoint, entries)
+        failed = sum(1 for entry in entries if entry["status"] == "failed")
+        self.stats["imported"] += len(entries) - failed
+        self.stats["failed"] += failed
+        for entry in entries:
+            if entry["status"] == "failed":
+                logging.warning(f"could not import {entry['path']} for user {entry['user_id']}: {entry['error']}")
+
+    def clear(self) -> None:
+        if self.matcher is not None:
+            self.matcher.clear()
+
+
+async def main(args: argparse.Namespace) -> Dict:
+    importer = CvImporter(checkpoint=args.checkpoint, workers=args.workers, n_process=args.n_process, batch_size=args.batch_size,
+                          chunk_size=args.chunk_size, embed=args.embed, rematch=args.rematch)
+    try:
+        return await importer.run(read_source(args.source))
+    finally:
+        importer.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory of <user_id>.pdf files or a CSV manifest with user_id,path columns")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="text extraction processes")
+    parser.add_argument("--n-process", type=int, default=2, help="spaCy processes (nlp.pipe n_process; 1 with --embed)")
+    parser.add_argument("--batch-size", type=int, default=64, help="texts per nlp.pipe batch")
+    parser.add_argument("--chunk-size", type=int, default=512, help="CVs per database transaction and checkpoint entry")
+    parser.add_argument("--embed", action="store_true", help="compute CV vectors now instead of at the next match")
+    parser.add_argument("--rematch", action="store_true", help="queue a rematch for every imported user")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(asyncio.run(main(args)), indent=2))
@@ -1,16 +1,20 @@
 import re
-import spacy
-import pdfplumber
+from spacy.tokens import Doc
+
+from src.utils.nlp import get_nlp
+from src.utils.pdf_text import extract_text
+from src.utils.taxonomy import get_taxonomy
 
 class CvParser:
-    def __init__(self, cv):
-        
-        self.nlp = spacy.load("en_core_web_sm")
-        self.skills = ["python", "java", "c++", "machine learning", "deep learning", "data science", "nlp", "sql", "aws", "azure", "tensorflow", "keras", "reactjs"]
-        self.majors = ["Computer Science and Engineering", "Information Technology", "Software Engineering", "Data Science", "Artificial Intelligence", "Natural Language Processing"]
+    def __init__(self, cv=None, text: str | None = None, doc: Doc | None = None):
+        # shared per process; loading a pipeline per CV cost more than parsing it
+        self.nlp = get_nlp()
+        # skills and majors, compiled once per process into a phrase matcher
+        self.taxonomy = get_taxonomy()
         self.cv_file = cv
-        self.cv_text = self.extract_text_from_pdf()
-        self.doc = self.nlp(self.cv_text)
+        # bulk imports pass the text and the doc they already ran through `nlp.pipe`
+        self.cv_text = text if text is not None else self.extract_text_from_pdf()
+        self.doc = doc if doc is not None else self.nlp(self.cv_text)
         self.result = {
             'skills': [],
             'university': None,
@@ -40,29 +44,10 @@ class CvParser:
         return self.result
     
     def extract_text_from_pdf(self):
-      text = ""
-      with pdfplumber.open(self.cv_file) as pdf:
-          for page in pdf.pages:
-              page_text = page.extract_text()
-              if page_text:
-                  text += page_text
-      return text
+      return extract_text(self.cv_file)
     
     def extract_skills(self):
-      skill_tokens = {tuple(skill.lower().split()): skill for skill in self.skills}
-      found_skills = set()
-      
-      # Lowercase all input tokens for case-insensitive comparison
-      tokens = [token.text.lower() for token in self.doc]
-
-      # Iterate through tokens using a sliding window
-      for i in range(len(tokens)):
-          for length in range(1, 2):  # Handle 2+ word majors
-              phrase = tuple(tokens[i:i+length])
-              if phrase in skill_tokens:
-                  found_skills.add(skill_tokens[phrase])
-      
-      self.result.update({'skills': list(found_skills)})
+      self.result.update({'skills': self.taxonomy.skills(self.doc)})
 
     def extract_dob(self):
       dob_match = re.search(r"(?:date of birth|dob)[\s:]*([\d]{1,2}[-/.\s]?\d{1,2}[-/.\s]?\d{2,4})", self.cv_text, re.I)
@@ -110,18 +95,16 @@ class CvParser:
         return None
 
     def extract_major(self):
-        major_tokens = {tuple(major.lower().split()): major for major in self.majors}
-        found_majors = set()
-        
-        # Lowercase all input tokens for case-insensitive comparison
-        tokens = [token.text.lower() for token in self.doc]
-
-        # Iterate through tokens using a sliding window
-        for i in range(len(tokens)):
-            for length in range(2, 5):  # Handle 2+ word majors
-                phrase = tuple(tokens[i:i+length])
-                if phrase in major_tokens:
-                    found_majors.add(major_tokens[phrase])
-        if not found_majors:
+        majors = self.taxonomy.majors(self.doc)
+        if not majors:
             return
-        self.result.update({'major': list(found_majors)[0]})
+        self.result.update({'major': majors[0]})
+
+
+def parse_cv(cv_bytes: bytes) -> dict:
+    """Parse raw PDF bytes into the `Cv` fields"""
+    return CvParser(cv_bytes).get_result()
+
+def parse_cv_doc(text: str, doc: Doc) -> dict:
+    """The `Cv` fields of a CV whose text was already extracted and run through the pipeline"""
+    return CvParser(text=text, doc=doc).get_result()
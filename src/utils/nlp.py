@@ -0,0 +1,40 @@
+"""
+Process-wide spaCy pipeline shared by every CV parsing path.
+
+Loading `en_core_web_sm` takes hundreds of milliseconds and allocates every component, so it is
+loaded once per process, on first use, and trimmed to what the extractors read: tokens and
+named entities. The tagger, parser, lemmatizer and attribute ruler are excluded, and the shared
+tok2vec is dropped too when no remaining component listens to it (the small English pipeline's
+NER has its own embedding layer).
+"""
+import logging
+import os
+import threading
+import spacy
+from spacy.language import Language
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+SPACY_EXCLUDE = ["tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer"]
+
+_nlp: Language | None = None
+_lock = threading.Lock()
+
+
+def load_nlp(model: str = SPACY_MODEL) -> Language:
+    """A fresh trimmed pipeline (tokenizer + NER); use `get_nlp` for the shared one"""
+    nlp = spacy.load(model, exclude=SPACY_EXCLUDE)
+    if "tok2vec" in nlp.pipe_names and not nlp.get_pipe("tok2vec").listening_components:
+        nlp.remove_pipe("tok2vec")
+    return nlp
+
+def get_nlp() -> Language:
+    global _nlp
+    if _nlp is None:
+        with _lock:
+            if _nlp is None:
+                _nlp = load_nlp()
+                logging.info(f"loaded spaCy {SPACY_MODEL} with {_nlp.pipe_names}")
+    return _nlp
@@ -0,0 +1,100 @@
+"""
+Process pool for CV parsing.
+
+pdfplumber's layout analysis and most of the extractors are pure Python, so parsing on a thread
+still holds the GIL and stalls the event loop of the process doing it. CVs are parsed in
+`CV_PARSE_WORKERS` separate processes instead, each loading the shared spaCy pipeline and the
+skill taxonomy once when it starts. Workers are spawned rather than forked, so they do not inherit the parent's torch
+threads or open connections.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List
+from dotenv import load_dotenv
+
+from src.exceptions.exceptions import ServiceUnavailableExeption
+from src.utils.cv_parser import parse_cv
+from src.utils.nlp import get_nlp
+from src.utils.taxonomy import refresh_taxonomy_blocking
+
+load_dotenv()
+
+CV_PARSE_WORKERS = int(os.getenv("CV_PARSE_WORKERS", "2"))
+# uploads admitted at once (parsing plus waiting); more are turned away with a 503
+CV_PARSE_MAX_QUEUE = int(os.getenv("CV_PARSE_MAX_QUEUE", "32"))
+
+
+def _preload() -> None:
+    get_nlp()
+    refresh_taxonomy_blocking(force=True)
+
+def _parse(cv_bytes: bytes) -> Dict:
+    # picks up skills added since the worker started (throttled to one check per refresh interval)
+    refresh_taxonomy_blocking()
+    return parse_cv(cv_bytes)
+
+def _ready() -> List[str]:
+    return list(get_nlp().pipe_names)
+
+
+class CvParsePool:
+    def __init__(self, max_workers: int = CV_PARSE_WORKERS, max_queue: int = CV_PARSE_MAX_QUEUE):
+        self.max_workers = max_workers
+        self.max_queue = max(max_queue, max_workers)
+        self._executor: ProcessPoolExecutor | None = None
+        self._admission: asyncio.Semaphore | None = None
+        self._admitted = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._admitted
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_preload,
+            )
+        return self._executor
+
+    async def awarmup(self) -> None:
+        """Start every worker process and wait until each has loaded spaCy"""
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+        # workers are spawned on demand, so concurrent calls start all of them
+        await asyncio.gather(*(loop.run_in_executor(pool, _ready) for _ in range(self.max_workers)))
+
+    def ensure_capacity(self) -> None:
+        # counts uploads waiting for the semaphore too, and works before the first parse created it
+        if self._admitted >= self.max_queue:
+            logging.warning(f"CV parse queue is full ({self._admitted}/{self.max_queue})")
+            raise ServiceUnavailableExeption(detail="CV parsing is busy, try again later")
+
+    async def parse(self, cv_bytes: bytes) -> Dict:
+        if self._admission is None:
+            # created lazily so it binds to the running loop
+            self._admission = asyncio.Semaphore(self.max_queue)
+        self._admitted += 1
+        try:
+            async with self._admission:
+                return await asyncio.get_running_loop().run_in_executor(self._pool(), _parse, cv_bytes)
+        except BrokenProcessPool:
+            # a worker died (or could not load spaCy); start a fresh pool for the next upload
+            logging.error("CV parse pool is broken, restarting it")
+            self.shutdown()
+            raise ServiceUnavailableExeption(detail="CV parsing is unavailable")
+        finally:
+            self._admitted -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def __str__(self):
+        return f"CvParsePool(workers={self.max_workers}, max_queue={self.max_queue}, depth={self._admitted})"
@@ -0,0 +1,98 @@
+"""
+Page-by-page text extraction for CV PDFs.
+
+pdfplumber rebuilds every page's layout in pure Python, which costs around 50ms a page and keeps
+the layout objects of every page around until the document is closed. The default backend is
+pdfium (pypdfium2), which reads the text layer natively at a fraction of that; pdfplumber is only
+used when pdfium cannot open the file or returns mostly unmapped glyphs. Either way pages are
+read one at a time and released, and extraction stops at `CV_MAX_PAGES` pages or
+`CV_MAX_TEXT_BYTES` bytes of text, so a 40-page portfolio costs no more than a CV.
+
+pdfium is not thread-safe; call this from one thread per process (the parse pool and the bulk
+importer use processes).
+"""
+import io
+import logging
+import os
+from typing import BinaryIO, Generator, Iterator
+import pdfplumber
+import pypdfium2 as pdfium
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CV_MAX_PAGES = int(os.getenv("CV_MAX_PAGES", "10"))
+CV_MAX_TEXT_BYTES = int(os.getenv("CV_MAX_TEXT_BYTES", str(256 * 1024)))
+# "auto" (pdfium, then pdfplumber when needed), "pdfium" or "pdfplumber"
+CV_PDF_BACKEND = os.getenv("CV_PDF_BACKEND", "auto")
+# share of U+FFFD (glyphs without a unicode mapping) above which pdfium's text is not trusted
+GARBLED_TEXT_RATIO = 0.1
+
+BACKENDS = ("auto", "pdfium", "pdfplumber")
+
+PdfSource = str | bytes | BinaryIO
+
+
+def iter_pdfium_pages(source: PdfSource, max_pages: int = CV_MAX_PAGES) -> Iterator[str]:
+    pdf = pdfium.PdfDocument(source)
+    try:
+        for index in range(min(len(pdf), max_pages)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                yield textpage.get_text_bounded().replace("\r\n", "\n")
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+def iter_pdfplumber_pages(source: PdfSource, max_pages: int = CV_MAX_PAGES) -> Iterator[str]:
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with pdfplumber.open(source) as pdf:
+        for index, page in enumerate(pdf.pages):
+            if index >= max_pages:
+                break
+            yield page.extract_text() or ""
+            # drops the page's cached layout objects
+            page.close()
+
+def collect_text(pages: Generator[str, None, None], max_bytes: int = CV_MAX_TEXT_BYTES) -> str:
+    """Join page texts until `max_bytes` of UTF-8 text; stops reading pages once the budget is spent"""
+    parts, used = [], 0
+    for text in pages:
+        encoded = text.encode("utf-8")
+        if used + len(encoded) > max_bytes:
+            # cut on a character boundary
+            parts.append(encoded[:max_bytes - used].decode("utf-8", errors="ignore"))
+            break
+        parts.append(text)
+        used += len(encoded) + 1
+    # a generator stopped early closes its document here rather than when it is collected
+    pages.close()
+    return "\n".join(parts)
+
+def _garbled(text: str) -> bool:
+    return bool(text) and text.count("\ufffd") / len(text) > GARBLED_TEXT_RATIO
+
+def extract_text(cv_file: PdfSource, max_pages: int = CV_MAX_PAGES, max_bytes: int = CV_MAX_TEXT_BYTES, backend: str = CV_PDF_BACKEND) -> str:
+    """Text of the first `max_pages` pages of a PDF given as a path, bytes or a binary file object"""
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown PDF backend {backend!r}, expected one of {BACKENDS}")
+    if backend == "pdfplumber":
+        return collect_text(iter_pdfplumber_pages(cv_file, max_pages), max_bytes)
+
+    start = cv_file.tell() if hasattr(cv_file, "tell") else None
+    try:
+        text = collect_text(iter_pdfium_pages(cv_file, max_pages), max_bytes)
+        if backend == "pdfium" or not _garbled(text):
+            return text
+        logging.info("pdfium returned mostly unmapped glyphs, extracting with pdfplumber")
+    except pdfium.PdfiumError as e:
+        if backend == "pdfium":
+            raise
+        logging.info(f"pdfium could not read the PDF, extracting with pdfplumber. Error: {e}")
+    if start is not None:
+        cv_file.seek(start)
+    return collect_text(iter_pdfplumber_pages(cv_file, max_pages), max_bytes)
@@ -0,0 +1,134 @@
+"""
+Skill and major taxonomy matched against parsed CVs.
+
+Terms are compiled into one spaCy `PhraseMatcher` on the `LOWER` attribute, so extraction is a
+single pass over the document whatever the size of the taxonomy, and multi-word skills match as
+well as single tokens. Skills are the built-in defaults plus every name in the `skills` table;
+majors are the built-in list. The matcher is built once per process and rebuilt only when the
+number of skills in the table changes, which is checked at most every
+`SKILL_TAXONOMY_REFRESH_SECONDS` (skills are only ever added).
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Iterable, List
+from dotenv import load_dotenv
+from spacy.language import Language
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import Doc
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.database.core import DATABASE_URL
+from src.entities.skill import Skill
+from src.utils.nlp import get_nlp
+
+load_dotenv()
+
+SKILL_TAXONOMY_REFRESH_SECONDS = float(os.getenv("SKILL_TAXONOMY_REFRESH_SECONDS", "300"))
+
+DEFAULT_SKILLS = ["python", "java", "c++", "machine learning", "deep learning", "data science", "nlp", "sql", "aws", "azure", "tensorflow", "keras", "reactjs"]
+DEFAULT_MAJORS = ["Computer Science and Engineering", "Information Technology", "Software Engineering", "Data Science", "Artificial Intelligence", "Natural Language Processing"]
+
+SKILL = "SKILL"
+MAJOR = "MAJOR"
+
+_taxonomy: "Taxonomy | None" = None
+_skill_count: int | None = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+class Taxonomy:
+    def __init__(self, nlp: Language, skills: Iterable[str], majors: Iterable[str] = DEFAULT_MAJORS):
+        self.matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+        # lowercased token sequence -> the name it is reported as (the first spelling wins)
+        self.names = {SKILL: {}, MAJOR: {}}
+        for label, terms in ((SKILL, skills), (MAJOR, majors)):
+            terms = [term for term in dict.fromkeys(term.strip() for term in terms) if term]
+            patterns = []
+            for term, pattern in zip(terms, nlp.tokenizer.pipe(terms)):
+                key = self._key(pattern)
+                if key not in self.names[label]:
+                    self.names[label][key] = term
+                    patterns.append(pattern)
+            self.matcher.add(label, patterns)
+        self._labels = {nlp.vocab.strings[SKILL]: SKILL, nlp.vocab.strings[MAJOR]: MAJOR}
+
+    @staticmethod
+    def _key(tokens) -> str:
+        return " ".join(token.lower_ for token in tokens)
+
+    def find(self, doc: Doc, label: str) -> List[str]:
+        """Names of the `label` terms in the document, in order of first occurrence"""
+        found = {}
+        for match_id, start, end in self.matcher(doc):
+            if self._labels[match_id] == label:
+                name = self.names[label][self._key(doc[start:end])]
+                found.setdefault(name, start)
+        return sorted(found, key=found.get)
+
+    def skills(self, doc: Doc) -> List[str]:
+        return self.find(doc, SKILL)
+
+    def majors(self, doc: Doc) -> List[str]:
+        return self.find(doc, MAJOR)
+
+    def __len__(self):
+        return sum(len(names) for names in self.names.values())
+
+    def __str__(self):
+        return f"Taxonomy(skills={len(self.names[SKILL])}, majors={len(self.names[MAJOR])})"
+
+
+def get_taxonomy() -> Taxonomy:
+    """The process-wide taxonomy; only the defaults until `refresh_taxonomy` has read the skills table"""
+    global _taxonomy
+    if _taxonomy is None:
+        with _lock:
+            if _taxonomy is None:
+                _taxonomy = Taxonomy(get_nlp(), DEFAULT_SKILLS)
+    return _taxonomy
+
+async def refresh_taxonomy(session: AsyncSession, force: bool = False) -> Taxonomy:
+    """Rebuild the taxonomy if the skills table changed since the last check"""
+    global _taxonomy, _skill_count, _checked_at
+    if not force and time.monotonic() - _checked_at < SKILL_TAXONOMY_REFRESH_SECONDS:
+        return get_taxonomy()
+    _checked_at = time.monotonic()
+    # core columns only, so this works without the mappers of the User relationships
+    skills = Skill.__table__
+    count = (await session.execute(select(func.count()).select_from(skills))).scalar_one()
+    if count == _skill_count and _taxonomy is not None:
+        return _taxonomy
+    names = (await session.execute(select(skills.c.name).order_by(skills.c.name))).scalars().all()
+    started = time.perf_counter()
+    taxonomy = Taxonomy(get_nlp(), [*DEFAULT_SKILLS, *names])
+    with _lock:
+        _taxonomy, _skill_count = taxonomy, count
+    logging.info(f"built {taxonomy} in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return taxonomy
+
+def refresh_taxonomy_blocking(force: bool = False) -> Taxonomy:
+    """`refresh_taxonomy` for processes without an event loop (the CV parse workers)"""
+    if not force and time.monotonic() - _checked_at < SKILL_TAXONOMY_REFRESH_SECONDS:
+        return get_taxonomy()
+
+    async def refresh() -> Taxonomy:
+        # a throwaway engine: pooled connections would be bound to this short-lived loop
+        engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+        try:
+            async with AsyncSession(engine) as session:
+                return await refresh_taxonomy(session, force=True)
+        finally:
+            await engine.dispose()
+
+    try:
+        return asyncio.run(refresh())
+    except Exception as e:
+        # keep parsing with the taxonomy we have; the next check retries
+        logging.warning(f"could not refresh the skill taxonomy. Error: {e}")
+        return get_taxonomy()